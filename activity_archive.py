@@ -0,0 +1,189 @@
+"""
+أرشفة سجل النشاطات القديمة في ملفات شهرية مضغوطة
+
+سجلات النشاط الأقدم من ACTIVITY_LOG_RETENTION_DAYS تنقل من جدول activity_logs
+إلى ملف لكل شهر (activity_YYYY-MM.jsonl.gz): سطر JSON لكل نشاط مع اسم المستخدم
+حتى يبقى السجل مقروءاً بعد حذف المستخدم. الملفات تضاف إليها الدفعات فقط
+(كل دفعة عضو gzip مستقل، وقراءة الملف تفك الأعضاء بالتتابع).
+
+ملف الفهرس (index.json) فيه لكل شهر عدد السجلات وأول وآخر تاريخ والعمليات
+والمستخدمين الموجودين فيه، فيتخطى البحث الأشهر التي لا يمكن أن تطابق الفلاتر.
+
+الأرشفة تحفظ الدفعة في الملف والفهرس أولاً ثم تحذفها من الجدول، ويسجل الفهرس
+آخر دفعة لم يكتمل حذفها حتى لا تتكرر في الملف إذا توقفت الأرشفة بينهما.
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from flask import current_app
+from sqlalchemy import delete, select
+from models import db, User, ActivityLog
+from pagination import KeysetPage
+
+# عدد السجلات في كل دفعة أرشفة
+ARCHIVE_BATCH_SIZE = 1000
+
+INDEX_NAME = 'index.json'
+
+FIELDS = ('id', 'user_id', 'action', 'target_type', 'target_id', 'details', 'ip_address')
+
+
+def _folder():
+    folder = current_app.config['ACTIVITY_ARCHIVE_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _segment_path(month):
+    return os.path.join(_folder(), f'activity_{month}.jsonl.gz')
+
+
+def load_index():
+    """فهرس الأرشيف: {'months': {الشهر: معلومات الملف}, 'pending': آخر دفعة لم تحذف}"""
+    try:
+        with open(os.path.join(_folder(), INDEX_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'months': {}, 'pending': None}
+
+
+def _save_index(index):
+    path = os.path.join(_folder(), INDEX_NAME)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _append_segment(month, entries):
+    with open(_segment_path(month), 'ab') as f:
+        f.write(gzip.compress(''.join(json.dumps(e, ensure_ascii=False) + '\n' for e in entries).encode('utf-8')))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _index_month(index, month, entries):
+    info = index['months'].setdefault(month, {'count': 0, 'first': None, 'last': None, 'actions': [], 'users': []})
+    dates = [e['created_at'] for e in entries]
+    info['count'] += len(entries)
+    info['first'] = min(filter(None, [info['first']] + dates))
+    info['last'] = max(filter(None, [info['last']] + dates))
+    info['actions'] = sorted(set(info['actions']) | {e['action'] for e in entries})
+    info['users'] = sorted(set(info['users']) | {e['user_id'] for e in entries})
+
+
+def _delete_archived(pending):
+    db.session.execute(delete(ActivityLog).where(
+        ActivityLog.id <= pending['last_id'],
+        ActivityLog.created_at < datetime.fromisoformat(pending['cutoff'])
+    ))
+    db.session.commit()
+
+
+def archive_activity_log(cutoff=None, progress=None):
+    """نقل سجلات النشاط الأقدم من cutoff إلى ملفات الأرشيف
+
+    cutoff الافتراضي قبل ACTIVITY_LOG_RETENTION_DAYS من الآن. progress دالة
+    اختيارية تستدعى بعد كل دفعة بعدد السجلات المؤرشفة. ترجع عدد السجلات المؤرشفة.
+    """
+    if cutoff is None:
+        cutoff = datetime.utcnow() - timedelta(days=current_app.config['ACTIVITY_LOG_RETENTION_DAYS'])
+
+    index = load_index()
+    # دفعة حفظت في الأرشيف في تشغيل سابق ولم تحذف من الجدول
+    if index.get('pending'):
+        _delete_archived(index['pending'])
+        index['pending'] = None
+        _save_index(index)
+
+    archived = 0
+    while True:
+        rows = db.session.execute(
+            select(ActivityLog, User.name).outerjoin(User, ActivityLog.user_id == User.id)
+            .where(ActivityLog.created_at < cutoff)
+            .order_by(ActivityLog.id).limit(ARCHIVE_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        by_month = {}
+        for log, user_name in rows:
+            entry = {field: getattr(log, field) for field in FIELDS}
+            entry['user_name'] = user_name
+            entry['created_at'] = log.created_at.isoformat() if log.created_at else None
+            month = log.created_at.strftime('%Y-%m') if log.created_at else '0000-00'
+            by_month.setdefault(month, []).append(entry)
+
+        for month, entries in by_month.items():
+            _append_segment(month, entries)
+            _index_month(index, month, entries)
+        index['pending'] = {'last_id': rows[-1][0].id, 'cutoff': cutoff.isoformat()}
+        _save_index(index)
+
+        db.session.expunge_all()
+        _delete_archived(index['pending'])
+        index['pending'] = None
+        _save_index(index)
+
+        archived += len(rows)
+        if progress:
+            progress(archived)
+    return archived
+
+
+# ===== البحث في الأرشيف =====
+
+def archived_months():
+    """الأشهر المؤرشفة من الأحدث للأقدم"""
+    return sorted(load_index()['months'], reverse=True)
+
+
+def _matches(entry, filters):
+    if filters.get('action') and entry['action'] != filters['action']:
+        return False
+    if filters.get('target_type') and entry['target_type'] != filters['target_type']:
+        return False
+    if filters.get('user_id') and entry['user_id'] != filters['user_id']:
+        return False
+    if filters.get('date_from') and entry['created_at'] < filters['date_from'].isoformat():
+        return False
+    if filters.get('date_to') and entry['created_at'] > filters['date_to'].isoformat():
+        return False
+    return True
+
+
+def _as_log(entry):
+    """سجل مؤرشف بنفس شكل ActivityLog الذي يستخدمه القالب"""
+    return SimpleNamespace(
+        **{field: entry[field] for field in FIELDS},
+        created_at=datetime.fromisoformat(entry['created_at']) if entry['created_at'] else None,
+        user=SimpleNamespace(name=entry['user_name'] or '-')
+    )
+
+
+def search_archive(month, filters, after=None, per_page=50):
+    """صفحة من سجلات الشهر المؤرشف المطابقة للفلاتر، من الأحدث للأقدم
+
+    filters قاموس فيه action و target_type و user_id و date_from و date_to
+    (كلها اختيارية). after عدد السجلات المطابقة في الصفحات السابقة.
+    """
+    info = load_index()['months'].get(month)
+    if info is None:
+        return KeysetPage([], None)
+    # تخطي الشهر دون فتح الملف إذا كان الفهرس يستبعده
+    if (filters.get('action') and filters['action'] not in info['actions']) or \
+            (filters.get('user_id') and filters['user_id'] not in info['users']):
+        return KeysetPage([], None)
+
+    with gzip.open(_segment_path(month), 'rt', encoding='utf-8') as f:
+        entries = [entry for entry in map(json.loads, f) if _matches(entry, filters)]
+    entries.sort(key=lambda e: (e['created_at'] or '', e['id']), reverse=True)
+
+    offset = int(after) if after and after.isdigit() else 0
+    page = entries[offset:offset + per_page]
+    next_cursor = str(offset + per_page) if len(entries) > offset + per_page else None
+    return KeysetPage([_as_log(entry) for entry in page], next_cursor, offset)
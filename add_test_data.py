@@ -2,7 +2,11 @@
 سكريبت إضافة بيانات تجريبية للنظام
 """
 from app import app, db
-from models import User, Role, Gender, ShiftTime, Status, LeaveType, LeaveRequest, Schedule, Attendance, SystemSettings
+from models import User, Role, Gender, ShiftTime, Status, LeaveType, LeaveRequest, Attendance, SystemSettings
+from attendance_summary import rebuild_attendance_summary
+from data_versions import mark_data_changed
+from leave_ledger import rebuild_leave_ledger
+from schedule_generation import WEEK_DAYS, ScheduleTemplate, generate_schedules
 from datetime import datetime, timedelta
 import random
 
@@ -46,6 +50,7 @@ def add_test_data():
                 supervisors.append(sup)
                 print(f'  ✓ موجود مسبقاً: {sup.name}')
         
+        mark_data_changed('users')
         db.session.commit()
         print(f'✅ تم إضافة {len(supervisors)} مشرف رئيسي\n')
         
@@ -77,6 +82,7 @@ def add_test_data():
                 sub_supervisors.append(sub)
                 print(f'  ✓ موجود مسبقاً: {sub.name}')
         
+        mark_data_changed('users')
         db.session.commit()
         print(f'✅ تم إضافة {len(sub_supervisors)} مشرف فرعي\n')
         
@@ -138,34 +144,26 @@ def add_test_data():
                 employees.append(emp)
                 print(f'  ✅ تم إضافة: {name}')
         
+        mark_data_changed('users')
         db.session.commit()
         print(f'✅ تم إضافة {len(employees)} موظف\n')
         
         # 4. إضافة الجداول
         print('[4/7] إضافة الجداول الأسبوعية...')
-        days = ['السبت', 'الأحد', 'الاثنين', 'الثلاثاء', 'الأربعاء', 'الخميس', 'الجمعة']
-        schedule_count = 0
+        shift_times = ['8:00 ص - 12:00 م', '12:00 م - 4:00 م', '4:00 م - 8:00 م', '5:00 م - 9:00 م']
         
+        # أيام العمل (6 أيام، يوم راحة) - الجداول تكتب بجملة واحدة لكل مشرف
+        employees_by_supervisor = {}
         for emp in employees:
-            # حذف الجداول القديمة
-            Schedule.query.filter_by(employee_id=emp.id).delete()
-            
-            # أيام العمل (6 أيام، يوم راحة)
-            rest_day = random.choice(days)
-            shift_times = ['8:00 ص - 12:00 م', '12:00 م - 4:00 م', '4:00 م - 8:00 م', '5:00 م - 9:00 م']
-            shift = random.choice(shift_times)
-            
-            for day in days:
-                schedule = Schedule(
-                    employee_id=emp.id,
-                    day_of_week=day,
-                    shift_time=shift,
-                    is_rest_day=(day == rest_day),
-                    start_date=datetime.now().date(),
-                    created_by=emp.supervisor_id
-                )
-                db.session.add(schedule)
-                schedule_count += 1
+            rest_day = random.choice(WEEK_DAYS)
+            work_days = [day for day in WEEK_DAYS if day != rest_day]
+            employees_by_supervisor.setdefault(emp.supervisor_id, {})[emp.id] = ScheduleTemplate(
+                work_days, random.choice(shift_times), datetime.now().date()
+            )
+        
+        schedule_count = 0
+        for supervisor_id, templates in employees_by_supervisor.items():
+            schedule_count += generate_schedules(templates, supervisor_id)
         
         db.session.commit()
         print(f'✅ تم إضافة {schedule_count} سجل جدول\n')
@@ -235,6 +233,9 @@ def add_test_data():
             db.session.add(leave_req)
             leave_count += 1
         
+        db.session.flush()
+        rebuild_leave_ledger()
+        mark_data_changed('leave_requests')
         db.session.commit()
         print(f'✅ تم إضافة {leave_count} طلب إجازة\n')
         
@@ -270,6 +271,9 @@ def add_test_data():
                 db.session.add(attendance)
                 attendance_count += 1
         
+        db.session.flush()
+        rebuild_attendance_summary()
+        mark_data_changed('attendance')
         db.session.commit()
         print(f'✅ تم إضافة {attendance_count} سجل حضور\n')
         
@@ -7,6 +7,12 @@ from routes_employee import employee_bp
 from routes_supervisor import supervisor_bp
 from routes_admin import admin_bp
 from routes_certificates import cert_bp
+from routes_jobs import jobs_bp
+from routes_attachments import attachments_bp
+import migrations
+from settings_cache import get_settings
+from identity_cache import load_identity
+from pdf_reports import register_fonts
 from datetime import datetime, timedelta
 import os
 import openpyxl
@@ -15,6 +21,7 @@ from functools import wraps
 app = Flask(__name__)
 app.config.from_object(Config)
 Config.init_app(app)
+register_fonts(app.config['PDF_FONT_PATH'])
 
 db.init_app(app)
 login_manager = LoginManager()
@@ -27,16 +34,17 @@ app.register_blueprint(employee_bp)
 app.register_blueprint(supervisor_bp)
 app.register_blueprint(admin_bp)
 app.register_blueprint(cert_bp)
+app.register_blueprint(jobs_bp)
+app.register_blueprint(attachments_bp)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return load_identity(user_id)
 
 # جعل الإعدادات متاحة في جميع القوالب
 @app.context_processor
 def inject_settings():
-    settings = SystemSettings.query.first()
-    return dict(system_settings=settings, now=datetime.utcnow)
+    return dict(system_settings=get_settings(), now=datetime.utcnow)
 
 # Decorators للتحقق من الأدوار
 def role_required(*roles):
@@ -54,6 +62,8 @@ def role_required(*roles):
 def init_database():
     with app.app_context():
         db.create_all()
+        # تطبيق ترحيلات قاعدة البيانات المعلقة (للقواعد المنشأة بإصدار سابق)
+        migrations.upgrade(db.engine)
         
         # إنشاء مدير النظام الأساسي إذا لم يكن موجوداً
         admin = User.query.filter_by(role=Role.MAIN_ADMIN).first()
@@ -120,6 +130,9 @@ def login():
         user = User.query.filter_by(national_id=national_id, is_active=True).first()
         
         if user and user.check_password(password):
+            # حفظ تشفير كلمة المرور المؤجل من الاستيراد
+            if db.session.is_modified(user):
+                db.session.commit()
             login_user(user, remember=True)
             next_page = request.args.get('next')
             flash(f'مرحباً بك {user.name}', 'success')
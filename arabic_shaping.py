@@ -0,0 +1,45 @@
+"""
+تشكيل النص العربي لتقارير PDF
+
+reportlab لا يدعم وصل الحروف العربية ولا اتجاه الكتابة من اليمين لليسار، لذلك
+يمر كل نص عبر arabic_reshaper ثم bidi.get_display قبل وضعه في التقرير. القيم في
+التقارير تتكرر كثيراً (أنواع الإجازات، الحالات، الأقسام، الفترات، الجنس) فيتم حفظ
+نتيجة التشكيل في ذاكرة مؤقتة محدودة الحجم بدلاً من تكرار الحساب لكل خلية.
+"""
+from functools import lru_cache
+from arabic_reshaper import reshape
+from bidi.algorithm import get_display
+
+# أقصى عدد نصوص محفوظة بعد تشكيلها
+SHAPE_CACHE_SIZE = 4096
+
+# ما يعرض بدلاً من القيمة الفارغة
+EMPTY = '-'
+
+
+@lru_cache(maxsize=SHAPE_CACHE_SIZE)
+def _shape(text):
+    return get_display(reshape(text))
+
+
+def shape(text, empty=EMPTY):
+    """تحويل النص العربي للعرض الصحيح في PDF"""
+    if text is None or text == '':
+        return empty
+    return _shape(str(text))
+
+
+def shape_column(values, empty=EMPTY):
+    """تشكيل عمود كامل من القيم مع تشكيل كل قيمة مختلفة مرة واحدة فقط"""
+    values = list(values)
+    shaped = {value: shape(value, empty) for value in set(values)}
+    return [shaped[value] for value in values]
+
+
+def shape_columns(rows, columns, empty=EMPTY):
+    """تشكيل أعمدة محددة (بأرقامها) في قائمة صفوف، وترك بقية الأعمدة كما هي"""
+    rows = [list(row) for row in rows]
+    for index in columns:
+        for row, value in zip(rows, shape_column([row[index] for row in rows], empty)):
+            row[index] = value
+    return rows
@@ -0,0 +1,36 @@
+"""
+سكريبت أرشفة سجل النشاطات القديمة (مناسب للتشغيل الدوري بـ cron)
+
+الاستخدام:
+    python archive_activity_log.py         أرشفة السجلات الأقدم من ACTIVITY_LOG_RETENTION_DAYS
+    python archive_activity_log.py DAYS    أرشفة السجلات الأقدم من عدد الأيام المحدد
+"""
+import sys
+from datetime import datetime, timedelta
+from app import app
+from activity_archive import archive_activity_log
+
+
+def main(args):
+    if args and not args[0].isdigit():
+        print(__doc__)
+        return False
+
+    with app.app_context():
+        days = int(args[0]) if args else app.config['ACTIVITY_LOG_RETENTION_DAYS']
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        print(f"جاري أرشفة سجلات النشاط الأقدم من {cutoff:%Y-%m-%d}...")
+
+        try:
+            archived = archive_activity_log(cutoff, progress=lambda count: print(f"  ... تمت أرشفة {count} سجل"))
+            print(f"✅ تمت أرشفة {archived} سجل نشاط")
+            return True
+        except Exception as e:
+            print(f"\n❌ خطأ أثناء الأرشفة: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main(sys.argv[1:]) else 1)
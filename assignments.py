@@ -0,0 +1,65 @@
+"""
+إسناد الموظفين للمشرفين بجملة UPDATE واحدة
+
+الصلاحيات تتحقق داخل SQL: يتم تحديث الموظفين المطابقين لشرط النطاق فقط (مثل
+موظفي المشرف الرئيسي)، والمشرف الجديد يجب أن يحقق شرطه في استعلام EXISTS، فلا
+يتم تحميل الموظفين أو المشرف في الجلسة. معرفات الموظفين المطابقين تقرأ أولاً حتى
+تنقل سجلات من تغير مشرفه فقط في ملخص الحضور. عدد الموظفين التابعين لكل مشرف
+يحسب بـ COUNT مجمع واحد لكل الصفحة.
+"""
+from sqlalchemy import exists, func, select, update
+from models import db, User, Role
+from attendance_summary import reattribute_attendance
+from data_versions import mark_data_changed
+
+SUPERVISOR_ROLES = (Role.MAIN_SUPERVISOR, Role.SUB_SUPERVISOR)
+
+
+def assign_employees_to(employee_ids, supervisor_id, employee_scope=None, supervisor_scope=None):
+    """إسناد الموظفين إلى المشرف دون commit
+
+    employee_scope شرط إضافي على الموظفين المسموح بتحديثهم، و supervisor_scope
+    شرط إضافي على المشرف الجديد. supervisor_id بقيمة None يلغي الإسناد.
+    ترجع عدد الموظفين الذين تم إسنادهم فعلاً.
+    """
+    employee_ids = list(employee_ids)
+    if not employee_ids:
+        return 0
+
+    conditions = [User.id.in_(employee_ids), User.role == Role.EMPLOYEE]
+    if employee_scope is not None:
+        conditions.append(employee_scope)
+
+    if supervisor_id is not None:
+        target = db.aliased(User)
+        target_conditions = [target.id == supervisor_id, target.role.in_(SUPERVISOR_ROLES)]
+        if supervisor_scope is not None:
+            target_conditions.append(supervisor_scope(target))
+        conditions.append(exists().where(*target_conditions))
+
+    eligible = db.session.execute(select(User.id, User.supervisor_id).where(*conditions)).all()
+    # الموظفون الذين يتغير مشرفهم فعلاً تنقل سجلاتهم في ملخص الحضور
+    moved = [employee_id for employee_id, current in eligible if current != supervisor_id]
+    if moved:
+        mark_data_changed('users')
+        with reattribute_attendance(moved):
+            db.session.execute(
+                update(User).where(User.id.in_(moved)).values(supervisor_id=supervisor_id),
+                execution_options={'synchronize_session': False}
+            )
+    return len(eligible)
+
+
+def subordinate_counts(supervisor_ids, role=Role.EMPLOYEE):
+    """عدد التابعين لكل مشرف باستعلام واحد: رقم المشرف -> العدد
+
+    role لحصر العد في دور معين، وبقيمة None يعد كل التابعين.
+    """
+    supervisor_ids = list(supervisor_ids)
+    counts = dict.fromkeys(supervisor_ids, 0)
+    if supervisor_ids:
+        query = db.session.query(User.supervisor_id, func.count(User.id)).filter(User.supervisor_id.in_(supervisor_ids))
+        if role is not None:
+            query = query.filter(User.role == role)
+        counts.update(query.group_by(User.supervisor_id).all())
+    return counts
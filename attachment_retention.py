@@ -0,0 +1,93 @@
+"""
+حذف مرفقات الإجازات بعد مدة الاحتفاظ (attachment_retention_days في إعدادات النظام)
+
+الطلبات التي انتهت مدة مرفقاتها تقرأ على دفعات بالفهرس على created_at، ثم
+تحذف ملفات الدفعة القديمة (attachment_path) وينقص عداد مراجع مرفقات المخزن
+(attachment_digest)، ويفرغ العمودان لطلبات الدفعة بجملة UPDATE واحدة. بعد
+الدفعات يحذف من المخزن المحتوى الذي لم يعد يشير إليه أي طلب. يشغل دورياً
+بـ python sweep_attachments.py أو من صفحة الإعدادات كمهمة خلفية.
+"""
+import os
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import or_, select, update
+from models import db, LeaveRequest
+from settings_cache import get_settings
+from attachment_store import release_attachments, purge_attachments
+
+# عدد الطلبات في كل دفعة
+SWEEP_BATCH_SIZE = 500
+
+
+def retention_days():
+    """مدة الاحتفاظ بالمرفقات من إعدادات النظام، أو القيمة الافتراضية"""
+    settings = get_settings()
+    days = settings.attachment_retention_days if settings else None
+    return days or current_app.config['ATTACHMENT_RETENTION_DAYS']
+
+
+def attachment_file(path):
+    """المسار الكامل لملف المرفق، أو None إذا كان خارج مجلد المرفقات"""
+    folder = os.path.realpath(current_app.config['ATTACHMENT_FOLDER'])
+    full_path = os.path.realpath(os.path.join(current_app.config['BASE_DIR'], path))
+    if os.path.commonpath([folder, full_path]) != folder:
+        return None
+    return full_path
+
+
+def _remove_file(path):
+    """حذف ملف المرفق وإرجاع حجمه (صفر إذا لم يكن موجوداً)"""
+    full_path = attachment_file(path)
+    if full_path is None:
+        return 0
+    try:
+        size = os.path.getsize(full_path)
+        os.remove(full_path)
+        return size
+    except OSError:
+        return 0
+
+
+def sweep_attachments(days=None, progress=None, batch_size=SWEEP_BATCH_SIZE):
+    """حذف مرفقات الطلبات الأقدم من مدة الاحتفاظ
+
+    progress دالة اختيارية تستدعى بعد كل دفعة بالقيم (عدد المرفقات، البايتات).
+    ترجع (عدد المرفقات المحذوفة، البايتات المستعادة).
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days or retention_days())
+    swept = reclaimed = 0
+
+    while True:
+        batch = db.session.execute(
+            select(LeaveRequest.id, LeaveRequest.attachment_path, LeaveRequest.attachment_digest)
+            .where(LeaveRequest.created_at < cutoff,
+                   or_(LeaveRequest.attachment_path.isnot(None), LeaveRequest.attachment_digest.isnot(None)))
+            .order_by(LeaveRequest.created_at, LeaveRequest.id).limit(batch_size)
+        ).all()
+        if not batch:
+            break
+
+        reclaimed += sum(_remove_file(path) for _, path, _ in batch if path)
+        release_attachments([digest for _, _, digest in batch])
+        db.session.execute(
+            update(LeaveRequest).where(LeaveRequest.id.in_([request_id for request_id, _, _ in batch]))
+            .values(attachment_path=None, attachment_digest=None),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+
+        swept += len(batch)
+        if progress:
+            progress(swept, reclaimed)
+
+    # محتوى المخزن الذي وصل عداد مراجعه إلى صفر (من هذه الدفعات أو من حذف المستخدمين)
+    reclaimed += purge_attachments()[1]
+    return swept, reclaimed
+
+
+def format_bytes(size):
+    """حجم مقروء مثل 12.5 MB"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
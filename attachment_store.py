@@ -0,0 +1,263 @@
+"""
+مخزن مرفقات الإجازات بالمحتوى (content-addressed)
+
+الملف المرفوع يكتب على دفعات إلى ملف مؤقت داخل المخزن مع حساب بصمته SHA-256
+أثناء الكتابة، ثم ينقل إلى <أول حرفين>/<البصمة>. إذا كان المحتوى نفسه موجوداً
+(تقرير طبي رفع أكثر من مرة) يحذف الملف المؤقت ويزاد عداد المراجع فقط.
+
+الصور تعاد ترميزها قبل حساب البصمة (image_pipeline) فتحفظ دون بيانات وصفية
+وبدقة محدودة، وتنشأ لها صورة مصغرة بجانبها (<البصمة>.thumb.jpg).
+
+جدول attachments فيه صف لكل محتوى مع عدد الطلبات التي تشير إليه. عند حذف طلب
+أو انتهاء مدة مرفقه ينقص العداد، والمحتوى الذي وصل عداده إلى صفر يحذف ملفه
+وصفه في purge_attachments (يستدعيها حذف المرفقات الدوري بعد commit). الملفات
+التي بقيت دون صف (رفع تراجعت معاملته) تحذف أيضاً بعد ATTACHMENT_ORPHAN_GRACE_SECONDS.
+
+الرفع يزيد عداد الصف قبل وضع الملف، وحذف المحتوى يحذف الملفات قبل commit حذف
+الصفوف، فرفع نفس المحتوى أثناء الحذف ينتظر قفل الصف ثم يعيد إنشاء الملف.
+"""
+import hashlib
+import mimetypes
+import os
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from models import db, Attachment
+from image_pipeline import is_image, normalize_image, make_thumbnail
+
+# حجم الدفعة عند قراءة الملف المرفوع
+CHUNK_SIZE = 64 * 1024
+
+# أنواع الملفات المسموح برفعها كمرفقات
+ALLOWED_MIMETYPES = {'application/pdf', 'image/jpeg', 'image/png'}
+
+# عدد البصمات في كل استعلام عند البحث عن الملفات اليتيمة
+ORPHAN_BATCH_SIZE = 500
+
+
+def _folder():
+    folder = current_app.config['ATTACHMENT_STORE_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def attachment_path(digest):
+    """مسار ملف المحتوى في المخزن"""
+    return os.path.join(_folder(), digest[:2], digest)
+
+
+def thumbnail_path(digest):
+    """مسار الصورة المصغرة للمحتوى"""
+    return f'{attachment_path(digest)}.thumb.jpg'
+
+
+def ensure_thumbnail(digest):
+    """إنشاء الصورة المصغرة إذا لم تكن موجودة وإرجاع مسارها"""
+    path = thumbnail_path(digest)
+    if not os.path.exists(path):
+        make_thumbnail(attachment_path(digest), path, current_app.config['ATTACHMENT_THUMBNAIL_SIZE'])
+    return path
+
+
+def attachment_mimetype(filename):
+    """نوع الملف من امتداد اسمه، أو None إذا لم يكن من الأنواع المسموحة"""
+    mimetype, _ = mimetypes.guess_type(filename or '')
+    return mimetype if mimetype in ALLOWED_MIMETYPES else None
+
+
+def _upsert_statement(dialect, row):
+    """INSERT ... ON CONFLICT يزيد عداد المراجع للمحتوى الموجود"""
+    table = Attachment.__table__
+
+    if dialect == 'sqlite':
+        stmt = sqlite.insert(table).values(row)
+        return stmt.on_conflict_do_update(index_elements=['digest'], set_={'ref_count': table.c.ref_count + 1})
+    if dialect == 'postgresql':
+        stmt = postgresql.insert(table).values(row)
+        return stmt.on_conflict_do_update(index_elements=['digest'], set_={'ref_count': table.c.ref_count + 1})
+    if dialect in ('mysql', 'mariadb'):
+        stmt = mysql.insert(table).values(row)
+        return stmt.on_duplicate_key_update({'ref_count': table.c.ref_count + 1})
+
+
+def _add_reference(digest, size, mimetype):
+    row = {'digest': digest, 'size': size, 'mimetype': mimetype, 'ref_count': 1, 'created_at': datetime.utcnow()}
+    stmt = _upsert_statement(db.engine.dialect.name, row)
+    if stmt is not None:
+        db.session.execute(stmt)
+        return
+    attachment = db.session.get(Attachment, digest)
+    if attachment:
+        attachment.ref_count += 1
+    else:
+        db.session.add(Attachment(**row))
+    db.session.flush()
+
+
+def store_upload(file, mimetype):
+    """حفظ الملف المرفوع في المخزن دون commit وإرجاع بصمته
+
+    ترفع ValueError إذا كان الملف المرفوع بنوع صورة وليس صورة صالحة.
+
+    عداد مراجع المحتوى يزيد مع معاملة الطلب، فإذا تراجعت المعاملة يبقى الملف
+    في المخزن دون صف حتى يحذفه purge_attachments أو يرفع المحتوى نفسه مرة أخرى.
+    """
+    folder = _folder()
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            digest, size = _copy_hashed(file.stream, f)
+
+        if is_image(mimetype):
+            # الصورة المحفوظة هي المعاد ترميزها، فالبصمة والحجم لها
+            image_path = f'{tmp_path}.image'
+            try:
+                normalize_image(tmp_path, image_path, mimetype,
+                                current_app.config['ATTACHMENT_IMAGE_MAX_SIDE'],
+                                current_app.config['ATTACHMENT_IMAGE_QUALITY'])
+                os.replace(image_path, tmp_path)
+            finally:
+                if os.path.exists(image_path):
+                    os.remove(image_path)
+            with open(tmp_path, 'rb') as f:
+                digest, size = _copy_hashed(f)
+
+        # الصف قبل الملف: إذا كان purge_attachments يحذف نفس المحتوى تنتظر الجملة
+        # commit الحذف (بعد حذف الملف) فيعاد إنشاء الملف هنا
+        _add_reference(digest, size, mimetype)
+        path = attachment_path(digest)
+        try:
+            # المحتوى موجود مسبقاً - تحديث وقته يمنع حذفه كملف يتيم قبل commit الطلب
+            os.utime(path)
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if is_image(mimetype):
+        ensure_thumbnail(digest)
+    return digest
+
+
+def _copy_hashed(source, dest=None):
+    """قراءة source على دفعات (ونسخها إلى dest) وإرجاع (البصمة، الحجم)"""
+    sha256 = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+        sha256.update(chunk)
+        if dest is not None:
+            dest.write(chunk)
+        size += len(chunk)
+    return sha256.hexdigest(), size
+
+
+def release_attachments(digests):
+    """إنقاص عداد المراجع لكل بصمة في القائمة (مرة لكل طلب) دون commit"""
+    for digest, count in Counter(d for d in digests if d).items():
+        db.session.execute(
+            update(Attachment).where(Attachment.digest == digest)
+            .values(ref_count=Attachment.ref_count - count),
+            execution_options={'synchronize_session': False}
+        )
+
+
+def purge_attachments():
+    """حذف المحتوى الذي لم يعد يشير إليه أي طلب، والملفات اليتيمة في المخزن
+
+    ترجع (عدد الملفات المحذوفة، البايتات المستعادة).
+    """
+    removed = reclaimed = 0
+    rows = db.session.execute(
+        select(Attachment.digest, Attachment.size).where(Attachment.ref_count <= 0)
+    ).all()
+    if rows:
+        digests = [digest for digest, _ in rows]
+        db.session.execute(
+            delete(Attachment).where(Attachment.digest.in_(digests), Attachment.ref_count <= 0),
+            execution_options={'synchronize_session': False}
+        )
+        # الملفات تحذف والصفوف المحذوفة ما زالت مقفلة حتى commit - محتوى أعيد رفعه
+        # قبل الحذف بقي صفه، والرفع بعده ينتظر commit ثم يعيد إنشاء الملف
+        remaining = set(db.session.execute(
+            select(Attachment.digest).where(Attachment.digest.in_(digests))
+        ).scalars())
+        for digest, size in rows:
+            if digest in remaining:
+                continue
+            try:
+                os.remove(attachment_path(digest))
+                removed += 1
+                reclaimed += size
+            except OSError:
+                pass
+            if os.path.exists(thumbnail_path(digest)):
+                os.remove(thumbnail_path(digest))
+        db.session.commit()
+
+    orphans, orphan_bytes = _purge_orphan_files()
+    return removed + orphans, reclaimed + orphan_bytes
+
+
+def _purge_orphan_files():
+    """حذف ملفات المخزن التي ليس لها صف في attachments وتركت منذ مدة المهلة
+
+    الملف المؤقت لرفع لم ينته، أو ملف رفع لم يصل commit بعد، أحدث من المهلة فلا يحذف.
+    ترجع (عدد ملفات المحتوى المحذوفة، البايتات المستعادة).
+    """
+    folder = _folder()
+    cutoff = time.time() - current_app.config['ATTACHMENT_ORPHAN_GRACE_SECONDS']
+
+    stale = {}
+    for entry in os.scandir(folder):
+        if entry.is_dir():
+            for item in os.scandir(entry.path):
+                if item.is_file() and item.stat().st_mtime < cutoff:
+                    stale.setdefault(item.name.split('.', 1)[0], []).append(item)
+        elif entry.name.endswith(('.tmp', '.tmp.image')) and entry.stat().st_mtime < cutoff:
+            # ملف مؤقت من رفع توقف قبل أن ينقل
+            os.remove(entry.path)
+
+    digests = list(stale)
+    for i in range(0, len(digests), ORPHAN_BATCH_SIZE):
+        batch = digests[i:i + ORPHAN_BATCH_SIZE]
+        for digest in db.session.execute(select(Attachment.digest).where(Attachment.digest.in_(batch))).scalars():
+            del stale[digest]
+
+    removed = reclaimed = 0
+    for digest, items in stale.items():
+        for item in items:
+            if item.name == digest:
+                size = _remove_orphan(item.path, cutoff)
+                if size is not None:
+                    removed += 1
+                    reclaimed += size
+            elif os.path.exists(item.path):
+                os.remove(item.path)
+    return removed, reclaimed
+
+
+def _remove_orphan(path, cutoff):
+    """حذف ملف محتوى يتيم وإرجاع حجمه، أو None إذا استخدمه رفع في هذه الأثناء
+
+    الملف ينقل جانباً أولاً ثم يفحص وقته: الرفع الذي وجده قبل النقل حدث وقته
+    فيعاد، والرفع بعد النقل لا يجده فيعيد إنشاءه.
+    """
+    moved = f'{path}.purge'
+    try:
+        os.replace(path, moved)
+    except OSError:
+        return None
+    stat = os.stat(moved)
+    if stat.st_mtime >= cutoff:
+        os.replace(moved, path)
+        return None
+    os.remove(moved)
+    return stat.st_size
@@ -0,0 +1,178 @@
+"""
+خدمات الحضور والغياب - تحميل سجلات اليوم وحفظ التحضير دفعة واحدة
+"""
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.dialects import sqlite, postgresql, mysql
+from sqlalchemy.orm import joinedload
+from models import db, Attendance
+from attendance_summary import employee_attribution, apply_summary_deltas
+from data_versions import mark_data_changed
+
+# عدد الصفوف في كل جملة INSERT (حد متغيرات SQLite)
+UPSERT_CHUNK_SIZE = 100
+
+# المحركات التي تدعم INSERT ... ON CONFLICT (أو ما يعادلها)
+UPSERT_DIALECTS = ('sqlite', 'postgresql', 'mysql', 'mariadb')
+
+# الحقول التي يمكن تحديثها في سجل الحضور
+ATTENDANCE_FIELDS = ('status', 'absence_status_id', 'notes')
+
+
+def load_day_attendance(date_obj, employee_ids):
+    """جلب سجلات حضور يوم واحد لمجموعة موظفين باستعلام واحد
+
+    ترجع قاموساً مفتاحه رقم الموظف وقيمته سجل الحضور (مع حالة الغياب محملة مسبقاً)،
+    والموظف الذي ليس له سجل لا يظهر في القاموس.
+    """
+    employee_ids = list(employee_ids)
+    if not employee_ids:
+        return {}
+
+    records = Attendance.query.options(
+        joinedload(Attendance.absence_status)
+    ).filter(
+        Attendance.date == date_obj,
+        Attendance.employee_id.in_(employee_ids)
+    ).all()
+
+    return {record.employee_id: record for record in records}
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _existing_statuses(keys):
+    """جلب حالة السجلات الموجودة مسبقاً باستعلام SELECT ... IN
+
+    ترجع قاموساً (الموظف، التاريخ) -> الحالة المحفوظة.
+    """
+    existing = {}
+    for chunk in _chunks(keys, 400):
+        rows = db.session.query(Attendance.employee_id, Attendance.date, Attendance.status).filter(
+            tuple_(Attendance.employee_id, Attendance.date).in_(chunk)
+        ).all()
+        existing.update(((row[0], row[1]), row[2]) for row in rows)
+    return existing
+
+
+def _summary_deltas(rows, existing):
+    """فروقات ملخص الحضور اليومي الناتجة عن حفظ الصفوف"""
+    attribution = employee_attribution({employee_id for employee_id, _ in rows})
+    deltas = Counter()
+    for (employee_id, date_obj), row in rows.items():
+        old_status = existing.get((employee_id, date_obj))
+        new_status = row.get('status')
+        if old_status == new_status:
+            continue
+        supervisor_id, department = attribution.get(employee_id, (0, ''))
+        if old_status is not None:
+            deltas[(date_obj, supervisor_id, department, old_status)] -= 1
+        deltas[(date_obj, supervisor_id, department, new_status)] += 1
+    return deltas
+
+
+def _upsert_statement(dialect, rows, update_fields):
+    """بناء جملة INSERT ... ON CONFLICT الخاصة بمحرك قاعدة البيانات"""
+    table = Attendance.__table__
+
+    if dialect == 'sqlite':
+        stmt = sqlite.insert(table).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=['employee_id', 'date'],
+            set_={field: stmt.excluded[field] for field in update_fields}
+        )
+    if dialect == 'postgresql':
+        stmt = postgresql.insert(table).values(rows)
+        return stmt.on_conflict_do_update(
+            constraint='_employee_date_uc',
+            set_={field: stmt.excluded[field] for field in update_fields}
+        )
+    if dialect in ('mysql', 'mariadb'):
+        stmt = mysql.insert(table).values(rows)
+        return stmt.on_duplicate_key_update(
+            {field: stmt.inserted[field] for field in update_fields}
+        )
+
+
+def save_attendance_batch(entries, recorded_by):
+    """حفظ دفعة من سجلات الحضور (إضافة أو تحديث) دون commit
+
+    كل عنصر في entries قاموس يحتوي على employee_id و date (كائن date) و status،
+    ويمكن أن يحتوي على absence_status_id و notes. الحقول غير الموجودة في الدفعة
+    لا يتم تعديلها في السجلات الموجودة.
+
+    ترجع قائمة نتائج بنفس ترتيب الإدخال، لكل صف: employee_id و date و result
+    حيث result إحدى القيم: created أو updated أو invalid.
+    """
+    results = []
+    rows = {}
+
+    for entry in entries:
+        employee_id = entry.get('employee_id')
+        date_obj = entry.get('date')
+        if not employee_id or not date_obj or not entry.get('status'):
+            results.append({'employee_id': employee_id, 'date': date_obj, 'result': 'invalid'})
+            continue
+
+        key = (int(employee_id), date_obj)
+        row = rows.setdefault(key, {'employee_id': key[0], 'date': date_obj})
+        for field in ATTENDANCE_FIELDS:
+            if field in entry:
+                row[field] = entry[field]
+        results.append({'employee_id': key[0], 'date': date_obj, 'result': None})
+
+    if not rows:
+        return results
+
+    existing = _existing_statuses(list(rows))
+    for item in results:
+        if item['result'] is None:
+            key = (item['employee_id'], item['date'])
+            item['result'] = 'updated' if key in existing else 'created'
+
+    # تحديث ملخص الحضور اليومي في نفس المعاملة
+    apply_summary_deltas(_summary_deltas(rows, existing))
+    mark_data_changed('attendance')
+
+    # تجميع الصفوف حسب الحقول الموجودة فيها: جملة INSERT واحدة تتطلب نفس
+    # الأعمدة، والحقل غير الموجود في الصف يجب ألا يحدث في السجل المحفوظ
+    now = datetime.utcnow()
+    groups = {}
+    for row in rows.values():
+        update_fields = tuple(field for field in ATTENDANCE_FIELDS if field in row) + ('recorded_by',)
+        row['recorded_by'] = recorded_by
+        row['created_at'] = now
+        groups.setdefault(update_fields, []).append(row)
+
+    dialect = db.session.get_bind().dialect.name
+    for update_fields, values in groups.items():
+        if dialect not in UPSERT_DIALECTS:
+            _save_attendance_orm(values, existing, update_fields)
+            continue
+        for chunk in _chunks(values, UPSERT_CHUNK_SIZE):
+            db.session.execute(_upsert_statement(dialect, chunk, update_fields))
+
+    return results
+
+
+def _save_attendance_orm(values, existing, update_fields):
+    """بديل للمحركات التي لا تدعم ON CONFLICT"""
+    existing_records = {}
+    keys = [(row['employee_id'], row['date']) for row in values if (row['employee_id'], row['date']) in existing]
+    if keys:
+        for record in Attendance.query.filter(
+            tuple_(Attendance.employee_id, Attendance.date).in_(keys)
+        ).all():
+            existing_records[(record.employee_id, record.date)] = record
+
+    for row in values:
+        record = existing_records.get((row['employee_id'], row['date']))
+        if record:
+            for field in update_fields:
+                setattr(record, field, row[field])
+        else:
+            db.session.add(Attendance(**row))
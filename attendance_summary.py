@@ -0,0 +1,179 @@
+"""
+ملخص الحضور اليومي (attendance_daily_summary)
+
+جدول فيه عدد سجلات الحضور لكل (تاريخ، مشرف، قسم، حالة) حتى تقرأ لوحات التحكم
+صفوفاً قليلة محسوبة مسبقاً بدلاً من عد سجلات الحضور في كل زيارة.
+
+يتم تحديث الملخص بالفروقات داخل نفس المعاملة التي تحفظ الحضور
+(attendance_service.save_attendance_batch). المشرف والقسم يؤخذان من بيانات
+الموظف وقت الحفظ، فعند تغيير مشرف الموظف أو قسمه تنقل سجلاته في الملخص إلى
+المشرف أو القسم الجديد في نفس المعاملة (reattribute_attendance). ويمكن إعادة
+بناء الملخص من جدول الحضور بـ rebuild_attendance_summary (أو python rebuild_attendance_summary.py).
+"""
+from collections import Counter
+from contextlib import contextmanager
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import sqlite, postgresql, mysql
+from models import db, User, Attendance, AttendanceDailySummary
+
+# عدد الصفوف في كل جملة INSERT
+SUMMARY_CHUNK_SIZE = 200
+
+KEY_FIELDS = ('date', 'supervisor_id', 'department', 'status')
+
+
+def employee_attribution(employee_ids):
+    """المشرف والقسم لكل موظف باستعلام واحد: رقم الموظف -> (المشرف، القسم)"""
+    employee_ids = list(employee_ids)
+    if not employee_ids:
+        return {}
+    rows = db.session.query(User.id, User.supervisor_id, User.department).filter(
+        User.id.in_(employee_ids)
+    ).all()
+    return {row[0]: (row[1] or 0, row[2] or '') for row in rows}
+
+
+def _upsert_statement(dialect, rows):
+    """INSERT ... ON CONFLICT يضيف الفرق إلى العدد الموجود"""
+    table = AttendanceDailySummary.__table__
+
+    if dialect == 'sqlite':
+        stmt = sqlite.insert(table).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=list(KEY_FIELDS),
+            set_={'count': table.c.count + stmt.excluded.count}
+        )
+    if dialect == 'postgresql':
+        stmt = postgresql.insert(table).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=list(KEY_FIELDS),
+            set_={'count': table.c.count + stmt.excluded.count}
+        )
+    if dialect in ('mysql', 'mariadb'):
+        stmt = mysql.insert(table).values(rows)
+        return stmt.on_duplicate_key_update({'count': table.c.count + stmt.inserted.count})
+
+
+def apply_summary_deltas(deltas):
+    """إضافة الفروقات إلى الملخص دون commit
+
+    deltas قاموس (التاريخ، المشرف، القسم، الحالة) -> الفرق في العدد (موجب أو سالب).
+    الصفوف التي يصبح عددها صفراً يتم حذفها.
+    """
+    rows = [dict(zip(KEY_FIELDS, key), count=value) for key, value in deltas.items() if value]
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql', 'mysql', 'mariadb'):
+        for i in range(0, len(rows), SUMMARY_CHUNK_SIZE):
+            db.session.execute(_upsert_statement(dialect, rows[i:i + SUMMARY_CHUNK_SIZE]))
+    else:
+        for row in rows:
+            summary = db.session.get(AttendanceDailySummary, tuple(row[f] for f in KEY_FIELDS))
+            if summary:
+                summary.count += row['count']
+            else:
+                db.session.add(AttendanceDailySummary(**row))
+        db.session.flush()
+
+    db.session.execute(
+        delete(AttendanceDailySummary).where(
+            AttendanceDailySummary.date.in_({row['date'] for row in rows}),
+            AttendanceDailySummary.count <= 0
+        )
+    )
+
+
+def _employee_attendance_deltas(employee_ids, sign):
+    employee_ids = list(employee_ids)
+    if not employee_ids:
+        return
+    rows = db.session.query(
+        Attendance.date,
+        func.coalesce(User.supervisor_id, 0),
+        func.coalesce(User.department, ''),
+        Attendance.status,
+        func.count(Attendance.id)
+    ).join(User, Attendance.employee_id == User.id).filter(
+        Attendance.employee_id.in_(employee_ids)
+    ).group_by(Attendance.date, User.supervisor_id, User.department, Attendance.status).all()
+
+    deltas = Counter()
+    for date_obj, supervisor_id, department, status, count in rows:
+        deltas[(date_obj, supervisor_id, department, status)] += sign * count
+    apply_summary_deltas(deltas)
+
+
+def discount_employee_attendance(employee_ids):
+    """خصم سجلات حضور الموظفين من الملخص (بمشرفهم وقسمهم الحاليين) - تستدعى قبل حذف سجلاتهم"""
+    _employee_attendance_deltas(employee_ids, -1)
+
+
+@contextmanager
+def reattribute_attendance(employee_ids):
+    """نقل سجلات حضور الموظفين في الملخص عند تغيير مشرفهم أو قسمهم دون commit
+
+    تخصم السجلات بالمشرف والقسم الحاليين عند الدخول، ويتم تغيير الموظفين داخل
+    الكتلة، ثم تضاف بالمشرف والقسم الجديدين عند الخروج:
+
+        with reattribute_attendance(moved_ids):
+            db.session.execute(update(User)...)
+    """
+    employee_ids = list(employee_ids)
+    _employee_attendance_deltas(employee_ids, -1)
+    yield
+    _employee_attendance_deltas(employee_ids, 1)
+
+
+def rebuild_attendance_summary(start=None, end=None, bind=None):
+    """إعادة بناء الملخص من جدول الحضور دون commit
+
+    start و end (شاملان) لتحديد فترة، وبدونهما يعاد بناء الملخص كاملاً.
+    bind اتصال أو جلسة للتنفيذ (الافتراضي db.session) ويستخدم في الترحيلات.
+    ترجع عدد صفوف الملخص المنشأة.
+    """
+    bind = bind if bind is not None else db.session
+
+    def in_range(column):
+        conditions = []
+        if start is not None:
+            conditions.append(column >= start)
+        if end is not None:
+            conditions.append(column <= end)
+        return conditions
+
+    bind.execute(delete(AttendanceDailySummary).where(*in_range(AttendanceDailySummary.date)))
+
+    grouped = select(
+        Attendance.date,
+        func.coalesce(User.supervisor_id, 0),
+        func.coalesce(User.department, ''),
+        Attendance.status,
+        func.count(Attendance.id)
+    ).join(User, Attendance.employee_id == User.id).where(
+        *in_range(Attendance.date)
+    ).group_by(
+        Attendance.date, func.coalesce(User.supervisor_id, 0),
+        func.coalesce(User.department, ''), Attendance.status
+    )
+
+    result = bind.execute(
+        insert(AttendanceDailySummary).from_select(list(KEY_FIELDS) + ['count'], grouped)
+    )
+    return result.rowcount
+
+
+def status_counts(date_obj, supervisor_id=None, statuses=None):
+    """عدد سجلات كل حالة في يوم من الملخص: الحالة -> العدد
+
+    supervisor_id لحصر العدد في موظفي مشرف معين.
+    """
+    query = db.session.query(
+        AttendanceDailySummary.status, func.sum(AttendanceDailySummary.count)
+    ).filter(AttendanceDailySummary.date == date_obj)
+    if supervisor_id is not None:
+        query = query.filter(AttendanceDailySummary.supervisor_id == supervisor_id)
+    if statuses:
+        query = query.filter(AttendanceDailySummary.status.in_(statuses))
+    return {status: int(count) for status, count in query.group_by(AttendanceDailySummary.status).all()}
@@ -0,0 +1,117 @@
+"""
+تسجيل النشاطات (سجل التدقيق) دون commit مستقل لكل نشاط
+
+وضعان حسب AUDIT_MODE:
+
+- transaction (الافتراضي): سجل النشاط يضاف إلى جلسة الطلب ويحفظ مع commit
+  العملية نفسها، فإذا تراجعت العملية لا يبقى لها سجل، ولا يكلف النشاط commit
+  إضافياً. يجب استدعاء log_activity قبل commit الطلب.
+- buffered: سجل النشاط يوضع في مخزن دائري في الذاكرة، وخيط كاتب في الخلفية
+  يحفظ المخزن على دفعات كل AUDIT_FLUSH_SECONDS ثانية (أو عند امتلاء دفعة) بجملة
+  INSERT واحدة. إذا امتلأ المخزن قبل الحفظ تسقط أقدم السجلات، وتفقد السجلات غير
+  المحفوظة إذا توقف العامل فجأة.
+"""
+import atexit
+import threading
+from collections import deque
+from datetime import datetime
+from flask import current_app, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import insert
+from models import db, ActivityLog
+
+
+def _entry(action, target_type, target_id, details):
+    return {
+        'user_id': current_user.id,
+        'action': action,
+        'target_type': target_type,
+        'target_id': target_id,
+        'details': details,
+        'ip_address': request.remote_addr if has_request_context() else None,
+        'created_at': datetime.utcnow(),
+    }
+
+
+def log_activity(action, target_type, target_id=None, details=None):
+    """تسجيل نشاط في سجل النشاطات دون commit"""
+    entry = _entry(action, target_type, target_id, details)
+    if current_app.config['AUDIT_MODE'] == 'buffered':
+        _get_writer(current_app._get_current_object()).append(entry)
+    else:
+        db.session.add(ActivityLog(**entry))
+
+
+class AuditWriter:
+    """مخزن دائري لسجلات النشاط مع خيط يحفظها على دفعات"""
+
+    def __init__(self, app):
+        self.app = app
+        self.buffer = deque(maxlen=app.config['AUDIT_BUFFER_SIZE'])
+        self.batch_size = app.config['AUDIT_BATCH_SIZE']
+        self.interval = app.config['AUDIT_FLUSH_SECONDS']
+        self.dropped = 0
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def append(self, entry):
+        with self._lock:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(entry)
+            if len(self.buffer) >= self.batch_size:
+                self._wakeup.set()
+
+    def _take(self):
+        with self._lock:
+            batch = [self.buffer.popleft() for _ in range(min(self.batch_size, len(self.buffer)))]
+            dropped, self.dropped = self.dropped, 0
+        return batch, dropped
+
+    def flush(self):
+        """حفظ كل السجلات الموجودة في المخزن. ترجع عدد السجلات المحفوظة"""
+        written = 0
+        with self.app.app_context():
+            while True:
+                batch, dropped = self._take()
+                if dropped:
+                    self.app.logger.warning('تم إسقاط %d سجل نشاط لامتلاء المخزن', dropped)
+                if not batch:
+                    break
+                try:
+                    db.session.execute(insert(ActivityLog), batch)
+                    db.session.commit()
+                    written += len(batch)
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception('فشل حفظ %d سجل نشاط', len(batch))
+                    break
+            db.session.remove()
+        return written
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer(app):
+    """كاتب السجلات للعامل الحالي - يبدأ عند أول نشاط (بعد fork عمال gunicorn)"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = AuditWriter(app)
+        return _writer
+
+
+def flush_activity_log():
+    """حفظ سجلات النشاط المخزنة في هذا العامل فوراً (في وضع buffered)"""
+    return _writer.flush() if _writer is not None else 0
@@ -0,0 +1,99 @@
+"""
+مقارنة تصفية الحضور بالشهر: extract مقابل النطاق نصف المفتوح
+
+ينشئ قاعدة SQLite مؤقتة فيها حضور عدة سنوات لكل الموظفين، ثم يقيس استعلام
+"حضور الموظف في شهر" بالطريقتين ويعرض خطة التنفيذ لكل منهما.
+
+الاستخدام:
+    python bench_date_windows.py [عدد الموظفين] [عدد السنوات]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from sqlalchemy import create_engine, extract, insert, select
+from models import db, User, Role, Attendance
+from date_windows import month_window, in_window
+
+# عدد الاستعلامات المقاسة لكل طريقة
+QUERIES = 200
+
+
+def _seed(conn, employees, years):
+    conn.execute(insert(User), [
+        {'national_id': str(6000000000 + i), 'name': f'معلم {i}', 'role': Role.EMPLOYEE, 'gender': 'ذكر'}
+        for i in range(employees)
+    ])
+    first_day = date(date.today().year - years + 1, 1, 1)
+    days = (date(date.today().year + 1, 1, 1) - first_day).days
+    for employee_id in range(1, employees + 1):
+        conn.execute(insert(Attendance), [
+            {'employee_id': employee_id, 'date': first_day + timedelta(days=offset), 'status': 'حاضر'}
+            for offset in range(days)
+        ])
+    return days * employees
+
+
+def _extract_query(employee_id, year, month):
+    return select(Attendance.id).where(
+        Attendance.employee_id == employee_id,
+        extract('month', Attendance.date) == month,
+        extract('year', Attendance.date) == year
+    )
+
+
+def _window_query(employee_id, year, month):
+    return select(Attendance.id).where(
+        Attendance.employee_id == employee_id,
+        in_window(Attendance.date, month_window(year, month))
+    )
+
+
+def _plan(conn, stmt):
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    return [row[3] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql)]
+
+
+def _measure(conn, build, samples):
+    start = time.perf_counter()
+    rows = 0
+    for employee_id, year, month in samples:
+        rows += len(conn.execute(build(employee_id, year, month)).all())
+    return (time.perf_counter() - start) / len(samples) * 1000, rows
+
+
+def main(args):
+    employees = int(args[0]) if args else 200
+    years = int(args[1]) if len(args) > 1 else 3
+
+    path = os.path.join(tempfile.mkdtemp(prefix='halaqat_bench_'), 'bench.db')
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine)
+
+    print(f"جاري إنشاء حضور {employees} موظف لمدة {years} سنوات...")
+    with engine.begin() as conn:
+        total = _seed(conn, employees, years)
+    print(f"✅ تم إنشاء {total} سجل حضور\n")
+
+    this_year = date.today().year
+    samples = [
+        (random.randint(1, employees), random.randint(this_year - years + 1, this_year), random.randint(1, 12))
+        for _ in range(QUERIES)
+    ]
+
+    with engine.connect() as conn:
+        for title, build in (('extract', _extract_query), ('نطاق [بداية، نهاية)', _window_query)):
+            elapsed, rows = _measure(conn, build, samples)
+            print(f"📊 {title}: {elapsed:.3f} ms للاستعلام ({rows} صف)")
+            for line in _plan(conn, build(*samples[0])):
+                print(f"    {line}")
+            print()
+
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
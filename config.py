@@ -16,6 +16,10 @@ class Config:
     # إعدادات الجلسة
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
     
+    # الذاكرة المؤقتة لهوية المستخدم المسجل: المدة بالثواني وأقصى عدد مستخدمين
+    USER_CACHE_TTL = 30
+    USER_CACHE_SIZE = 1024
+    
     # مجلد رفع الملفات
     UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
@@ -27,9 +31,62 @@ class Config:
     SECONDARY_COLOR = '#14FFEC'  # لون فيروزي
     ACCENT_COLOR = '#323232'  # رمادي غامق
     
-    # مدة حذف المرفقات (بالأيام)
+    # الخط العربي لتقارير PDF (يتم تسجيله مرة واحدة عند بدء التشغيل)
+    PDF_FONT_PATH = os.environ.get('PDF_FONT_PATH') or \
+        os.path.join(BASE_DIR, 'static', 'fonts', 'DejaVuSans.ttf')
+    
+    # عدد الموظفين في صفحة التحضير
+    ATTENDANCE_PAGE_SIZE = 100
+    
+    # عدد الصفوف في كل دفعة من القوائم الطويلة (تحميل المزيد)
+    LIST_PAGE_SIZE = 50
+    
+    # ملف ختم إصدار إعدادات النظام - يتم استبداله عند حفظ الإعدادات حتى تعيد
+    # جميع العمليات (عمال gunicorn) تحميلها من قاعدة البيانات
+    SETTINGS_VERSION_FILE = os.path.join(UPLOAD_FOLDER, '.settings_version')
+    
+    # مهام الخلفية (jobs.py): مجلد الملفات الناتجة، عدد الخيوط في كل عامل، مدة
+    # الاحتفاظ بالمهام المنتهية، والمدة دون نبض من العامل التي تعتبر بعدها المهمة
+    # غير المنتهية فاشلة، وكل كم ثانية يسجل العامل نبض مهامه
+    JOB_FOLDER = os.path.join(UPLOAD_FOLDER, 'jobs')
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_RETENTION_HOURS = 24
+    JOB_TIMEOUT_MINUTES = 60
+    JOB_HEARTBEAT_SECONDS = 60
+    
+    # الذاكرة المؤقتة لتقارير PDF (report_cache.py): المجلد والحجم الأقصى
+    REPORT_CACHE_FOLDER = os.path.join(UPLOAD_FOLDER, 'report_cache')
+    REPORT_CACHE_MAX_BYTES = 100 * 1024 * 1024  # 100MB
+    
+    # سجل النشاطات (audit.py): transaction يحفظ النشاط مع commit العملية نفسها،
+    # و buffered يخزنه في الذاكرة ويحفظه خيط في الخلفية على دفعات
+    AUDIT_MODE = os.environ.get('AUDIT_MODE', 'transaction')
+    AUDIT_BUFFER_SIZE = 10000
+    AUDIT_BATCH_SIZE = 500
+    AUDIT_FLUSH_SECONDS = 2
+    
+    # أرشفة سجل النشاطات (activity_archive.py): السجلات الأقدم من المدة تنقل إلى
+    # ملفات شهرية مضغوطة في مجلد الأرشيف
+    ACTIVITY_ARCHIVE_FOLDER = os.path.join(UPLOAD_FOLDER, 'activity_archive')
+    ACTIVITY_LOG_RETENTION_DAYS = 180
+    
+    # مجلد مرفقات الإجازات، ومدة حذفها الافتراضية (بالأيام) إذا لم تحدد في إعدادات النظام
+    ATTACHMENT_FOLDER = os.path.join(BASE_DIR, 'static', 'uploads', 'attachments')
     ATTACHMENT_RETENTION_DAYS = 60
     
+    # مخزن المرفقات بالمحتوى (attachment_store.py): كل محتوى يحفظ مرة واحدة باسم
+    # بصمته SHA-256 ويعرض عبر /attachments/<digest> وليس كملف static
+    ATTACHMENT_STORE_FOLDER = os.path.join(UPLOAD_FOLDER, 'attachment_store')
+    ATTACHMENT_MAX_AGE = 365 * 24 * 3600
+    # ملفات المخزن دون صف في attachments (رفع تراجعت معاملته) تحذف بعد هذه المدة بالثواني
+    ATTACHMENT_ORPHAN_GRACE_SECONDS = 3600
+    
+    # صور المرفقات (image_pipeline.py): تحفظ دون بيانات وصفية وبحد أقصى للضلع
+    # الأطول، ومعها صورة مصغرة لقائمة طلبات الإجازات
+    ATTACHMENT_IMAGE_MAX_SIDE = 2000
+    ATTACHMENT_IMAGE_QUALITY = 85
+    ATTACHMENT_THUMBNAIL_SIZE = 240
+    
     # أنواع الإجازات الافتراضية
     DEFAULT_LEAVE_TYPES = [
         {'name': 'إجازة مرضية', 'max_days': 10, 'requires_attachment': True},
@@ -42,4 +99,5 @@ class Config:
     @staticmethod
     def init_app(app):
         os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+        os.makedirs(app.config['JOB_FOLDER'], exist_ok=True)
         os.makedirs(os.path.join(Config.BASE_DIR, 'static', 'uploads'), exist_ok=True)
@@ -0,0 +1,49 @@
+"""
+إعدادات الاختبارات - قاعدة بيانات مؤقتة وأدوات مساعدة
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+# يجب ضبط قاعدة البيانات قبل استيراد التطبيق حتى لا تلمس الاختبارات halaqat.db
+_test_db_dir = tempfile.mkdtemp(prefix='halaqat_test_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_test_db_dir, 'test.db')
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app as flask_app, init_database
+    flask_app.config['TESTING'] = True
+    flask_app.config['SETTINGS_VERSION_FILE'] = os.path.join(_test_db_dir, '.settings_version')
+    flask_app.config['JOB_FOLDER'] = os.path.join(_test_db_dir, 'jobs')
+    flask_app.config['REPORT_CACHE_FOLDER'] = os.path.join(_test_db_dir, 'report_cache')
+    flask_app.config['ACTIVITY_ARCHIVE_FOLDER'] = os.path.join(_test_db_dir, 'activity_archive')
+    flask_app.config['ATTACHMENT_FOLDER'] = os.path.join(_test_db_dir, 'attachments')
+    flask_app.config['ATTACHMENT_STORE_FOLDER'] = os.path.join(_test_db_dir, 'attachment_store')
+    init_database()
+    return flask_app
+
+
+@contextmanager
+def count_queries(app):
+    """عد جمل SQL المنفذة داخل الكتلة
+
+    يعيد قائمة تمتلئ بنص كل جملة، وطولها هو عدد الاستعلامات.
+    """
+    from models import db
+    statements = []
+
+    with app.app_context():
+        engine = db.engine
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', _before_cursor_execute)
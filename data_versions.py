@@ -0,0 +1,57 @@
+"""
+أختام إصدار البيانات للجداول التي تبنى منها التقارير
+
+مسارات الكتابة التي تغير بيانات التقارير تستدعي mark_data_changed بأسماء الجداول،
+وعند commit تلك المعاملة فقط يزيد عداد كل جدول في data_versions بجملة UPDATE
+واحدة. فيكفي قراءة العدادات باستعلام صغير واحد لمعرفة هل تغيرت البيانات منذ آخر
+مرة، في كل العمال وليس في العامل الحالي فقط، ولا تكلف بقية عمليات الكتابة (الدخول،
+سجل النشاط، التنبيهات...) أي كتابة على صفوف العدادات.
+
+الكتابة التي لا تستدعي mark_data_changed (أو التعديل المباشر على قاعدة البيانات)
+لا تغير العدادات، فقد يعرض تقرير محفوظ قديم حتى تغيير لاحق.
+"""
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from models import db, DataVersion
+
+# الجداول التي تتتبع إصداراتها
+TRACKED_TABLES = frozenset({'users', 'leave_types', 'leave_requests', 'attendance'})
+
+
+def data_versions(tables):
+    """عدادات الجداول: اسم الجدول -> الإصدار (0 إذا لم يتغير منذ إنشاء العدادات)"""
+    tables = sorted(tables)
+    rows = db.session.execute(
+        select(DataVersion.table_name, DataVersion.version).where(DataVersion.table_name.in_(tables))
+    ).all()
+    versions = dict.fromkeys(tables, 0)
+    versions.update(rows)
+    return versions
+
+
+def bump_data_versions(session, tables):
+    """زيادة عدادات الجداول داخل المعاملة الحالية (صفوفها ينشئها الترحيل 4)"""
+    session.execute(
+        update(DataVersion).where(DataVersion.table_name.in_(sorted(tables))).values(version=DataVersion.version + 1),
+        execution_options={'synchronize_session': False}
+    )
+
+
+# ===== تسجيل الجداول المتغيرة في معاملة الجلسة =====
+
+def mark_data_changed(*tables):
+    """تسجيل أن المعاملة الحالية تغير بيانات الجداول - تزيد عداداتها عند commit"""
+    changed = db.session.info.setdefault('data_changed_tables', set())
+    changed.update(table for table in tables if table in TRACKED_TABLES)
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_changed(session):
+    changed = session.info.pop('data_changed_tables', None)
+    if changed:
+        bump_data_versions(session, changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changes(session):
+    session.info.pop('data_changed_tables', None)
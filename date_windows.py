@@ -0,0 +1,46 @@
+"""
+فترات التاريخ كنطاقات نصف مفتوحة [البداية، النهاية)
+
+التصفية بـ extract('month', عمود) == شهر تلف العمود في دالة فلا يمكن لأي فهرس
+خدمتها، ويقرأ الاستعلام كل سجلات الموظف في كل السنوات. لذلك يتم تحويل الشهر أو
+السنة إلى نطاق: العمود >= أول يوم و العمود < أول يوم في الفترة التالية، فيستخدم
+الاستعلام الفهرس على التاريخ (مثل employee_id, date) كبحث في نطاق.
+"""
+from datetime import date
+from sqlalchemy import and_
+
+
+def month_window(year, month):
+    """الشهر كنطاق [أول يوم فيه، أول يوم في الشهر التالي)"""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def year_window(year):
+    """السنة كنطاق [1 يناير، 1 يناير من السنة التالية)"""
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def in_window(column, window):
+    """شرط SQL لوقوع العمود داخل النطاق"""
+    start, end = window
+    return and_(column >= start, column < end)
+
+
+def overlap_days(window, first, last):
+    """عدد أيام الفترة [first، last] (شاملة) التي تقع داخل النطاق"""
+    start, end = window
+    first = max(first, start)
+    # last شامل و end غير شامل
+    return max(0, min(last.toordinal() + 1, end.toordinal()) - first.toordinal())
+
+
+def requested_month(args, today=None):
+    """(السنة، الشهر) من معاملات الطلب year و month، مع الشهر الحالي كافتراضي"""
+    today = today or date.today()
+    year = args.get('year', today.year, type=int)
+    month = args.get('month', today.month, type=int)
+    if not 1 <= month <= 12 or not 1 <= year < 9999:
+        return today.year, today.month
+    return year, month
@@ -2,7 +2,10 @@
 سكريبت حذف البيانات التجريبية من النظام
 """
 from app import app, db
-from models import User, Role, LeaveRequest, Schedule, Attendance
+from models import Attendance
+from attendance_summary import rebuild_attendance_summary
+from data_versions import mark_data_changed
+from user_deletion import delete_users, test_data_filter
 
 def delete_test_data():
     """حذف البيانات التجريبية"""
@@ -23,48 +26,23 @@ def delete_test_data():
         print('جاري حذف البيانات...')
         print()
         
-        # 1. حذف سجلات الحضور التجريبية
-        print('[1/4] حذف سجلات الحضور...')
-        attendance_count = Attendance.query.filter(Attendance.notes == 'سجل تجريبي').delete()
-        # حذف جميع سجلات الحضور للموظفين التجريبيين
-        test_employees = User.query.filter(
-            User.national_id.like('4000%') | User.national_id.like('5000%')
-        ).all()
-        for emp in test_employees:
-            Attendance.query.filter_by(employee_id=emp.id).delete()
+        # 1. حذف سجلات الحضور التجريبية لجميع الموظفين
+        print('[1/2] حذف سجلات الحضور التجريبية...')
+        Attendance.query.filter(Attendance.notes == 'سجل تجريبي').delete()
+        rebuild_attendance_summary()
+        mark_data_changed('attendance')
         db.session.commit()
         print(f'  ✅ تم حذف سجلات الحضور')
         
-        # 2. حذف طلبات الإجازات التجريبية
-        print('[2/4] حذف طلبات الإجازات...')
-        for emp in test_employees:
-            LeaveRequest.query.filter_by(employee_id=emp.id).delete()
-        db.session.commit()
-        print(f'  ✅ تم حذف طلبات الإجازات')
-        
-        # 3. حذف الجداول التجريبية
-        print('[3/4] حذف الجداول...')
-        for emp in test_employees:
-            Schedule.query.filter_by(employee_id=emp.id).delete()
-        db.session.commit()
-        print(f'  ✅ تم حذف الجداول')
-        
-        # 4. حذف المستخدمين التجريبيين
-        print('[4/4] حذف المستخدمين...')
-        
-        # حذف الموظفين التجريبيين
-        employees_deleted = User.query.filter(
-            User.national_id.like('4000%') | User.national_id.like('5000%')
-        ).delete(synchronize_session=False)
+        # 2. حذف المستخدمين التجريبيين مع حضورهم وإجازاتهم وجداولهم على دفعات
+        print('[2/2] حذف المستخدمين التجريبيين...')
         
-        # حذف المشرفين التجريبيين
-        supervisors_deleted = User.query.filter(
-            User.national_id.like('2000%') | User.national_id.like('3000%')
-        ).delete(synchronize_session=False)
+        def report_progress(deleted, total):
+            print(f'  ... تم حذف {deleted} من {total}')
         
+        users_deleted = delete_users(test_data_filter(), progress=report_progress)
         db.session.commit()
-        print(f'  ✅ تم حذف {employees_deleted} موظف')
-        print(f'  ✅ تم حذف {supervisors_deleted} مشرف')
+        print(f'  ✅ تم حذف {users_deleted} مستخدم')
         
         print()
         print('╔════════════════════════════════════════════════════════════╗')
@@ -0,0 +1,140 @@
+"""
+استيراد الموظفين من ملف Excel على دفعات بذاكرة ثابتة
+"""
+import openpyxl
+from models import db, User, Role
+from attendance_summary import reattribute_attendance
+from data_versions import mark_data_changed
+
+# عدد الصفوف التي تتم معالجتها في كل دفعة
+IMPORT_CHUNK_SIZE = 500
+
+# عدد الأعمدة المتوقعة: الاسم، الهوية، الفترة، الوقت، الراحة، القسم، الجنس
+IMPORT_COLUMNS = 7
+
+# الحقول التي يتم تحديثها للموظف الموجود مسبقاً
+UPDATE_FIELDS = ('period', 'work_time', 'rest_days', 'department', 'gender')
+
+
+def _cell(row, index, default=''):
+    value = row[index]
+    return str(value).strip() if value else default
+
+
+def parse_employee_row(row):
+    """تحويل صف من ملف Excel إلى قاموس بيانات الموظف
+
+    ترجع None إذا كان الصف فارغاً.
+    """
+    if not row or not row[0]:
+        return None
+
+    # في وضع القراءة فقط قد تكون الصفوف أقصر من عدد الأعمدة
+    row = tuple(row) + (None,) * (IMPORT_COLUMNS - len(row))
+
+    return {
+        'name': _cell(row, 0),  # الاسم
+        'national_id': _cell(row, 1),  # الهوية
+        'period': _cell(row, 2),  # الفترة
+        'work_time': _cell(row, 3),  # الوقت
+        'rest_days': _cell(row, 4),  # أيام الراحة
+        'department': _cell(row, 5, 'الحلقات'),  # القسم
+        'gender': _cell(row, 6, 'ذكر'),  # الجنس
+    }
+
+
+def _iter_chunks(sheet, size):
+    chunk = []
+    for row in sheet.iter_rows(min_row=2, values_only=True):
+        data = parse_employee_row(row)
+        if data is None:
+            continue
+        chunk.append(data)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _import_chunk(chunk, known_ids, departments):
+    """إدخال وتحديث دفعة واحدة من الموظفين
+
+    known_ids قاموس رقم الهوية -> معرف المستخدم لمن تمت معالجتهم في هذا الاستيراد،
+    حتى يتم تحديث الصف المكرر في الملف بدلاً من إدخاله مرتين. departments قاموس
+    معرف المستخدم -> قسمه الحالي لنقل حضور من تغير قسمه في ملخص الحضور.
+    """
+    lookup = [row['national_id'] for row in chunk if row['national_id'] not in known_ids]
+    if lookup:
+        for national_id, user_id, department in db.session.query(
+            User.national_id, User.id, User.department
+        ).filter(User.national_id.in_(lookup)):
+            known_ids[national_id] = user_id
+            departments[user_id] = department
+
+    inserts = {}
+    updates = {}
+    updated_count = 0
+    for row in chunk:
+        national_id = row['national_id']
+        # معلومات الجدول التي يتم تحديثها للموظف الموجود
+        schedule = {field: row[field] for field in UPDATE_FIELDS}
+        if national_id in inserts:
+            inserts[national_id].update(schedule)
+            updated_count += 1
+        elif national_id in known_ids:
+            updates.setdefault(national_id, {'id': known_ids[national_id]}).update(schedule)
+            updated_count += 1
+        else:
+            inserts[national_id] = dict(row, role=Role.EMPLOYEE)
+
+    if updates:
+        moved = [mapping['id'] for mapping in updates.values()
+                 if (departments.get(mapping['id']) or '') != (mapping['department'] or '')]
+        with reattribute_attendance(moved):
+            db.session.bulk_update_mappings(User, list(updates.values()))
+        departments.update((mapping['id'], mapping['department']) for mapping in updates.values())
+
+    if inserts:
+        for mapping in inserts.values():
+            # كلمة مرور افتراضية = رقم الهوية، ويؤجل تشفيرها إلى أول دخول
+            mapping['password_pending'] = True
+        db.session.bulk_insert_mappings(User, list(inserts.values()))
+        db.session.flush()
+        for national_id, user_id in db.session.query(User.national_id, User.id).filter(
+            User.national_id.in_(list(inserts))
+        ):
+            known_ids[national_id] = user_id
+            departments[user_id] = inserts[national_id]['department']
+
+    return len(inserts), updated_count
+
+
+def import_employees(file, progress=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """استيراد الموظفين من ملف Excel دون commit
+
+    يقرأ الملف في وضع read_only ويعالجه على دفعات: استعلام IN واحد لكل دفعة
+    لمعرفة الموجودين، ثم إدخال وتحديث جماعي. progress دالة اختيارية تستدعى بعد
+    كل دفعة بالقيم (عدد الصفوف المعالجة، المضافين، المحدثين).
+
+    ترجع (عدد المضافين، عدد المحدثين).
+    """
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        sheet = wb.active
+        known_ids = {}
+        departments = {}
+        processed = added = updated = 0
+
+        mark_data_changed('users')
+        for chunk in _iter_chunks(sheet, chunk_size):
+            chunk_added, chunk_updated = _import_chunk(chunk, known_ids, departments)
+            processed += len(chunk)
+            added += chunk_added
+            updated += chunk_updated
+            if progress:
+                progress(processed, added, updated)
+    finally:
+        wb.close()
+
+    return added, updated
@@ -0,0 +1,200 @@
+"""
+تصدير التقارير إلى Excel و CSV بذاكرة ثابتة
+
+الصفوف تقرأ كقيم أعمدة (وليس كائنات ORM) على دفعات بـ yield_per، فلا تحمل
+النتيجة كاملة في الذاكرة. CSV يولد نصاً ويرسل للمتصفح دفعة بدفعة، و Excel يكتب
+بوضع write_only في ملف مؤقت على القرص ثم يرسل الملف على أجزاء.
+"""
+import csv
+import tempfile
+from datetime import datetime
+from io import StringIO
+from flask import Response, send_file, stream_with_context
+from openpyxl import Workbook
+from sqlalchemy import select
+from models import db, User, Role, LeaveRequest, LeaveType, Attendance, Certificate
+
+# عدد الصفوف التي تقرأ من قاعدة البيانات في كل دفعة
+EXPORT_BATCH_SIZE = 1000
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+    except ValueError:
+        return None
+
+
+def _int(value):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+# ===== الاستعلامات =====
+
+def _leaves_query(args):
+    stmt = select(
+        User.name, User.national_id, LeaveType.name, LeaveRequest.start_date, LeaveRequest.end_date,
+        LeaveRequest.days_count, LeaveRequest.status, LeaveRequest.created_at
+    ).join(User, LeaveRequest.employee_id == User.id).join(LeaveType, LeaveRequest.leave_type_id == LeaveType.id)
+
+    start_date = _date(args.get('start_date'))
+    end_date = _date(args.get('end_date'))
+    if start_date:
+        stmt = stmt.where(LeaveRequest.start_date >= start_date)
+    if end_date:
+        stmt = stmt.where(LeaveRequest.end_date <= end_date)
+    if args.get('status'):
+        stmt = stmt.where(LeaveRequest.status == args['status'])
+
+    return stmt.order_by(LeaveRequest.created_at.desc(), LeaveRequest.id.desc())
+
+
+def _attendance_query(args):
+    stmt = select(
+        User.name, User.national_id, Attendance.date, Attendance.status, Attendance.notes
+    ).join(User, Attendance.employee_id == User.id)
+
+    start_date = _date(args.get('start_date'))
+    end_date = _date(args.get('end_date'))
+    employee_id = _int(args.get('employee_id'))
+    if start_date:
+        stmt = stmt.where(Attendance.date >= start_date)
+    if end_date:
+        stmt = stmt.where(Attendance.date <= end_date)
+    if employee_id:
+        stmt = stmt.where(Attendance.employee_id == employee_id)
+
+    return stmt.order_by(Attendance.date.desc(), Attendance.id.desc())
+
+
+def _schedules_query(args):
+    stmt = select(
+        User.name, User.national_id, User.period, User.work_time, User.rest_days, User.department, User.gender
+    ).where(User.role == Role.EMPLOYEE, User.is_active == True)
+
+    for field in ('gender', 'department', 'period'):
+        if args.get(field):
+            stmt = stmt.where(getattr(User, field) == args[field])
+
+    # ترتيب حسب الفترة والوقت
+    return stmt.order_by(User.period, User.work_time, User.name)
+
+
+def _certificates_query(args):
+    return select(
+        Certificate.student_name, Certificate.nationality, Certificate.phone, Certificate.expected_completion_date,
+        Certificate.narration_type, Certificate.halaqah, Certificate.completion_type, Certificate.teacher_name,
+        Certificate.status, User.name, Certificate.created_at
+    ).join(User, Certificate.created_by == User.id).order_by(Certificate.created_at.desc(), Certificate.id.desc())
+
+
+class Export:
+    """تصدير مسجل: عنوان الورقة، عناوين الأعمدة، دالة بناء الاستعلام، وبداية اسم الملف"""
+
+    def __init__(self, title, headers, query, file_prefix):
+        self.title = title
+        self.headers = headers
+        self.query = query
+        self.file_prefix = file_prefix
+
+
+EXPORTS = {
+    'leaves': Export(
+        'الإجازات',
+        ['الموظف', 'الهوية', 'نوع الإجازة', 'من تاريخ', 'إلى تاريخ', 'الأيام', 'الحالة', 'تاريخ الطلب'],
+        _leaves_query, 'leaves_report'
+    ),
+    'attendance': Export(
+        'الحضور والغياب',
+        ['الموظف', 'الهوية', 'التاريخ', 'الحالة', 'الملاحظات'],
+        _attendance_query, 'attendance_report'
+    ),
+    'schedules': Export(
+        'جدول المعلمين',
+        ['الاسم', 'الهوية', 'الفترة', 'الوقت', 'أيام الراحة', 'القسم', 'الجنس'],
+        _schedules_query, 'schedule_table'
+    ),
+    'certificates': Export(
+        'الشهادات',
+        ['اسم الطالب', 'الجنسية', 'الجوال', 'تاريخ الإتمام المتوقع', 'نوع الرواية', 'المقرأة/الحلقات',
+         'نوع الختمة', 'المعلم', 'الحالة', 'أنشأها', 'تاريخ الإنشاء'],
+        _certificates_query, 'certificates'
+    ),
+}
+
+
+def export_rows(export, args):
+    """صفوف التصدير كقيم على دفعات من قاعدة البيانات"""
+    result = db.session.execute(export.query(args), execution_options={'yield_per': EXPORT_BATCH_SIZE})
+    for partition in result.partitions():
+        yield from partition
+
+
+# ===== الكتابة =====
+
+# بدايات نص تجعل Excel وأمثاله يقرؤون الخلية كمعادلة
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _cell(value):
+    """قيمة خلية آمنة: النص الذي يبدأ كمعادلة يسبق بـ ' فيعرض كنص ولا ينفذ"""
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(export, args):
+    """نص CSV كدفعات: سطر العناوين ثم دفعة لكل EXPORT_BATCH_SIZE صف
+
+    يبدأ بـ BOM حتى يفتح Excel الملف بترميز UTF-8 ويعرض العربية.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(export.headers)
+
+    for index, row in enumerate(export_rows(export, args), 1):
+        writer.writerow([_cell(value) for value in row])
+        if index % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def write_xlsx(export, args, fileobj):
+    """كتابة ملف Excel بوضع write_only (الصفوف لا تبقى في الذاكرة بعد كتابتها)"""
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet(export.title)
+    sheet.sheet_view.rightToLeft = True
+    sheet.append(export.headers)
+    for row in export_rows(export, args):
+        sheet.append([None if value is None else _cell(value) for value in row])
+    wb.save(fileobj)
+
+
+def export_response(name, file_format, args):
+    """رد Flask بملف التصدير، أو None إذا كان التصدير أو الصيغة غير معروفة"""
+    export = EXPORTS.get(name)
+    if export is None or file_format not in ('csv', 'xlsx'):
+        return None
+
+    download_name = f'{export.file_prefix}_{datetime.now().strftime("%Y%m%d")}.{file_format}'
+
+    if file_format == 'csv':
+        response = Response(stream_with_context(iter_csv(export, args)), mimetype='text/csv')
+        response.headers['Content-Disposition'] = f'attachment; filename={download_name}'
+        return response
+
+    # الملف المؤقت يحذف تلقائياً عند إغلاقه بعد انتهاء الإرسال
+    fileobj = tempfile.TemporaryFile()
+    write_xlsx(export, args, fileobj)
+    fileobj.seek(0)
+    return send_file(fileobj, mimetype=XLSX_MIMETYPE, as_attachment=True, download_name=download_name)
@@ -0,0 +1,155 @@
+"""
+ذاكرة مؤقتة لهوية المستخدم المسجل (user_loader) داخل كل عامل
+
+معرف الجلسة الذي يحفظه Flask-Login هو "رقم المستخدم:ختم الأمان" (User.get_id)،
+والختم مشتق من الدور وحالة التفعيل وكلمة المرور ورقم الهوية. عند تغيير أي منها
+يتغير الختم فلا تقبل الجلسات القديمة بعد ذلك.
+
+يتم حفظ قيم أعمدة المستخدم لمدة قصيرة (USER_CACHE_TTL) مع حد أقصى لعدد المستخدمين
+(USER_CACHE_SIZE، الأقدم استخداماً يحذف أولاً)، وعند الطلب يتم ربط نسخة منها
+بالجلسة دون استعلام. أي commit يعدل مستخدماً (الرصيد أو الاسم أو القسم أو حقول
+الأمان...) أو يحذفه يزيله من ذاكرة العامل الحالي فوراً، أما العمال الآخرون
+فيقرؤونه من قاعدة البيانات بعد انتهاء المدة، أو فوراً عند اختلاف الختم.
+"""
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from flask_login import user_logged_in
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from models import db, User
+
+_COLUMNS = User.__table__.columns.keys()
+
+
+class IdentityCache:
+    """قاموس LRU محدود الحجم: رقم المستخدم -> (وقت الانتهاء، الختم، قيم الأعمدة)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry
+
+    def put(self, user, ttl, max_size):
+        values = {name: getattr(user, name) for name in _COLUMNS}
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + ttl, user.security_stamp, values)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = IdentityCache()
+
+
+def _remember(user):
+    config = current_app.config
+    _cache.put(user, config['USER_CACHE_TTL'], config['USER_CACHE_SIZE'])
+
+
+def _attach(values):
+    """ربط نسخة من المستخدم المحفوظ بالجلسة الحالية دون استعلام"""
+    user = User.__mapper__.class_manager.new_instance()
+    for name, value in values.items():
+        set_committed_value(user, name, value)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+def _parse_session_id(session_id):
+    """(رقم المستخدم، الختم) من معرف الجلسة
+
+    ترفع ValueError للمعرف دون ختم: الجلسات وملفات "تذكرني" الصادرة قبل إضافة
+    الختم تحفظ رقم المستخدم فقط ولا يمكن التحقق منها، فيسجل صاحبها الدخول مرة أخرى.
+    """
+    user_id, _, stamp = str(session_id).partition(':')
+    if not stamp:
+        raise ValueError('معرف جلسة دون ختم أمان')
+    return int(user_id), stamp
+
+
+def load_identity(session_id):
+    """تحميل المستخدم لـ Flask-Login، أو None إذا كانت الجلسة غير صالحة"""
+    try:
+        user_id, stamp = _parse_session_id(session_id)
+    except ValueError:
+        return None
+
+    entry = _cache.get(user_id)
+    if entry is not None and entry[1] == stamp:
+        return _attach(entry[2])
+
+    user = db.session.get(User, user_id)
+    if user is None or not user.is_active:
+        return None
+    if user.security_stamp != stamp:
+        return None
+    _remember(user)
+    return user
+
+
+@user_logged_in.connect
+def _remember_on_login(app, user):
+    _remember(user)
+
+
+# ===== الإزالة من الذاكرة عند تعديل المستخدم =====
+
+def _changed_users(session):
+    return session.info.setdefault('identity_changed', set())
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_user_changes(session, flush_context, instances):
+    # القيم المحفوظة تربط بالجلسة كما هي، فأي عمود معدل يجعلها قديمة
+    changed = _changed_users(session)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, User) and session.is_modified(obj, include_collections=False):
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_changes(orm_execute_state):
+    # التحديث أو الحذف الجماعي لا يمر عبر flush ولا نعرف الصفوف المتأثرة
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and orm_execute_state.bind_mapper is User.__mapper__:
+        orm_execute_state.session.info['identity_clear_all'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _discard_changed(session):
+    if session.info.pop('identity_clear_all', False):
+        _cache.clear()
+    changed = session.info.pop('identity_changed', None)
+    if changed:
+        _cache.discard(changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changes(session):
+    session.info.pop('identity_clear_all', None)
+    session.info.pop('identity_changed', None)
@@ -0,0 +1,59 @@
+"""
+معالجة صور المرفقات عند رفعها (Pillow)
+
+صور الجوال تصل بحجم عدة ميغابايت مع بيانات EXIF (الموقع ونوع الجهاز...).
+normalize_image تعيد ترميز الصورة دون أي بيانات وصفية بعد تدويرها حسب اتجاه
+التصوير وتصغيرها إلى ATTACHMENT_IMAGE_MAX_SIDE، و make_thumbnail تنشئ صورة
+مصغرة JPEG لقائمة طلبات الإجازات. صور JPEG تفك بدقة مخفضة مباشرة (draft)
+فلا تحمل الصورة الكاملة في الذاكرة عند تصغيرها.
+"""
+import os
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# نوع الملف -> صيغة Pillow التي تحفظ بها الصورة
+IMAGE_FORMATS = {'image/jpeg': 'JPEG', 'image/png': 'PNG'}
+
+
+def is_image(mimetype):
+    return mimetype in IMAGE_FORMATS
+
+
+def _open(path, max_side):
+    """فتح الصورة مصغرة إلى max_side ومدورة حسب اتجاه التصوير"""
+    try:
+        with Image.open(path) as source:
+            source.draft('RGB', (max_side, max_side))
+            image = ImageOps.exif_transpose(source)
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ValueError('الملف ليس صورة صالحة') from e
+    return image
+
+
+def _flatten(image):
+    """تحويل الصورة إلى RGB (الشفافية على خلفية بيضاء) لحفظها JPEG"""
+    if image.mode in ('RGB', 'L'):
+        return image
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def normalize_image(src_path, dest_path, mimetype, max_side, quality):
+    """إعادة ترميز الصورة دون بيانات وصفية وبحد أقصى max_side للضلع الأطول"""
+    image = _open(src_path, max_side)
+    if IMAGE_FORMATS[mimetype] == 'JPEG':
+        _flatten(image).save(dest_path, 'JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(dest_path, 'PNG', optimize=True)
+
+
+def make_thumbnail(src_path, dest_path, size, quality=70):
+    """صورة مصغرة JPEG لا يتجاوز ضلعها الأطول size"""
+    image = _flatten(_open(src_path, size))
+    tmp_path = f'{dest_path}.{os.getpid()}.tmp'
+    image.save(tmp_path, 'JPEG', quality=quality, optimize=True)
+    os.replace(tmp_path, dest_path)
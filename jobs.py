@@ -0,0 +1,297 @@
+"""
+مهام الخلفية للتقارير والاستيراد الثقيلة
+
+تقارير PDF الكبيرة واستيراد ملفات Excel قد تستغرق وقتاً أطول من مهلة الطلب، لذلك
+تسجل كل مهمة في جدول jobs وتنفذ في مجموعة خيوط APScheduler داخل العامل الذي
+استقبل الطلب. الملف الناتج يحفظ في مجلد المهام (JOB_FOLDER)، والصفحة تستعلم عن
+حالة المهمة دورياً حتى تكتمل ثم تحمّل الملف، فيمكن لأي عامل الرد على الاستعلام
+والتحميل لأن الحالة في قاعدة البيانات والملف على القرص.
+
+رسالة التقدم أثناء التنفيذ تحفظ في ذاكرة العامل المنفذ فقط: الاستيراد يمسك
+معاملة كتابة مفتوحة حتى نهايته، ولا يمكن تحديث صف المهمة في SQLite أثناءها.
+
+كل عامل يسجل نبض المهام التي يحملها (في الطابور أو قيد التنفيذ) في heartbeat_at
+كل JOB_HEARTBEAT_SECONDS من خيط مستقل. تنظيف المهام لا يعتبر المهمة منقطعة إلا
+إذا لم يكن العامل الحالي يحملها وتوقف نبضها مدة JOB_TIMEOUT_MINUTES (توقف العامل
+الذي كان ينفذها)، ولا يحذف إلا المهام المنتهية.
+"""
+import atexit
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.background import BackgroundScheduler
+from flask import current_app
+from models import db, Job, JobStatus
+from employee_import import import_employees
+from reports import build_report
+from user_deletion import DELETION_SCOPES, delete_users
+from activity_archive import archive_activity_log
+from attachment_retention import sweep_attachments, format_bytes
+
+
+class JobResult:
+    """نتيجة المهمة: رسالة للمستخدم و/أو ملف للتحميل"""
+
+    def __init__(self, message=None, content=None, download_name=None, mimetype=None):
+        self.message = message
+        self.content = content
+        self.download_name = download_name
+        self.mimetype = mimetype
+
+
+class JobKind:
+    """نوع مهمة: عنوان يعرض للمستخدم ودالة التنفيذ run(params, progress)"""
+
+    def __init__(self, title, run):
+        self.title = title
+        self.run = run
+
+
+# أنواع المهام المسجلة
+JOB_KINDS = {}
+
+
+def job_kind(kind, title):
+    """تسجيل دالة كنوع مهمة"""
+    def decorator(run):
+        JOB_KINDS[kind] = JobKind(title, run)
+        return run
+    return decorator
+
+
+# ===== التنفيذ =====
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+# رسائل التقدم للمهام قيد التنفيذ في هذا العامل
+_progress = {}
+
+# المهام التي يحملها هذا العامل (في الطابور أو قيد التنفيذ)
+_active = set()
+_active_lock = threading.Lock()
+
+
+def _get_scheduler(app):
+    """مجدول المهام للعامل الحالي - يبدأ عند أول مهمة (بعد fork عمال gunicorn)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = BackgroundScheduler(
+                executors={
+                    'default': ThreadPoolExecutor(app.config['JOB_WORKERS']),
+                    # خيط مستقل للنبض حتى لا تؤخره المهام الطويلة
+                    'heartbeat': ThreadPoolExecutor(1),
+                },
+                # المهمة تنفذ مهما تأخرت في الطابور
+                job_defaults={'misfire_grace_time': None},
+            )
+            _scheduler.add_job(_heartbeat, 'interval', args=[app], executor='heartbeat',
+                               seconds=app.config['JOB_HEARTBEAT_SECONDS'], coalesce=True)
+            _scheduler.start()
+            atexit.register(_scheduler.shutdown, wait=False)
+        return _scheduler
+
+
+def _active_jobs():
+    with _active_lock:
+        return set(_active)
+
+
+def _heartbeat(app):
+    """تسجيل نبض المهام التي يحملها هذا العامل"""
+    job_ids = _active_jobs()
+    if not job_ids:
+        return
+    with app.app_context():
+        try:
+            Job.query.filter(Job.id.in_(job_ids)).update(
+                {'heartbeat_at': datetime.utcnow()}, synchronize_session=False
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception('تعذر تسجيل نبض المهام')
+        finally:
+            db.session.remove()
+
+
+def _job_path(job_id, suffix):
+    folder = current_app.config['JOB_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f'{job_id}{suffix}')
+
+
+def _save_result(job, result):
+    extension = os.path.splitext(result.download_name or '')[1]
+    path = _job_path(job.id, extension)
+    with open(path, 'wb') as f:
+        f.write(result.content.getvalue())
+    job.result_path = path
+    job.result_name = result.download_name
+    job.result_mimetype = result.mimetype
+
+
+def _run_job(app, job_id):
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        if job is None:
+            with _active_lock:
+                _active.discard(job_id)
+            return
+        params = json.loads(job.params or '{}')
+
+        def progress(message):
+            _progress[job_id] = message
+
+        try:
+            job.status = JobStatus.RUNNING
+            job.started_at = job.heartbeat_at = datetime.utcnow()
+            db.session.commit()
+
+            result = JOB_KINDS[job.kind].run(params, progress)
+            db.session.commit()
+
+            if result.content is not None:
+                _save_result(job, result)
+            job.message = result.message
+            job.status = JobStatus.DONE
+        except Exception as e:
+            db.session.rollback()
+            app.logger.exception('فشلت المهمة %s (%s)', job_id, job.kind)
+            job.status = JobStatus.FAILED
+            job.message = str(e)
+        finally:
+            _progress.pop(job_id, None)
+            if params.get('input_path'):
+                _remove(params['input_path'])
+
+        job.finished_at = datetime.utcnow()
+        try:
+            db.session.commit()
+        finally:
+            with _active_lock:
+                _active.discard(job_id)
+            db.session.remove()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def submit_job(kind, params, user_id, upload=None):
+    """تسجيل مهمة جديدة وجدولتها للتنفيذ فوراً
+
+    upload ملف مرفوع اختياري (FileStorage) يحفظ في مجلد المهام ويمرر مساره في
+    params['input_path'] ثم يحذف بعد التنفيذ.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f'نوع مهمة غير معروف: {kind}')
+
+    purge_jobs()
+
+    job_id = uuid.uuid4().hex
+    params = dict(params)
+    if upload is not None:
+        params['input_path'] = _job_path(job_id, '.input' + os.path.splitext(upload.filename)[1])
+        upload.save(params['input_path'])
+
+    job = Job(id=job_id, kind=kind, params=json.dumps(params, ensure_ascii=False), created_by=user_id,
+              heartbeat_at=datetime.utcnow())
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    with _active_lock:
+        _active.add(job_id)
+    _get_scheduler(app).add_job(_run_job, args=[app, job_id], id=job_id)
+    return job
+
+
+def job_progress(job):
+    """رسالة التقدم للمهمة إذا كانت تنفذ في هذا العامل"""
+    return _progress.get(job.id)
+
+
+def purge_jobs():
+    """تنظيف المهام القديمة
+
+    المهام المنتهية الأقدم من JOB_RETENTION_HOURS تحذف مع ملفاتها، والمهام غير
+    المنتهية التي لا يحملها هذا العامل وتوقف نبضها JOB_TIMEOUT_MINUTES تعتبر
+    فاشلة (توقف العامل الذي كان ينفذها).
+    """
+    config = current_app.config
+    now = datetime.utcnow()
+    active = _active_jobs()
+
+    expired = Job.query.filter(
+        Job.status.in_([JobStatus.DONE, JobStatus.FAILED]),
+        Job.created_at < now - timedelta(hours=config['JOB_RETENTION_HOURS'])
+    ).all()
+    for job in expired:
+        if job.result_path:
+            _remove(job.result_path)
+        db.session.delete(job)
+
+    Job.query.filter(
+        Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+        Job.id.notin_(active),
+        db.func.coalesce(Job.heartbeat_at, Job.created_at) < now - timedelta(minutes=config['JOB_TIMEOUT_MINUTES'])
+    ).update({'status': JobStatus.FAILED, 'message': 'انقطع تنفيذ المهمة', 'finished_at': now},
+             synchronize_session=False)
+    db.session.commit()
+
+
+# ===== أنواع المهام =====
+
+def _report_job(kind):
+    def run(params, progress):
+        buffer, download_name = build_report(kind, params)
+        return JobResult(content=buffer, download_name=download_name, mimetype='application/pdf')
+    return run
+
+
+job_kind('leaves_pdf', 'تقرير الإجازات')(_report_job('leaves_pdf'))
+job_kind('attendance_pdf', 'تقرير الحضور والغياب')(_report_job('attendance_pdf'))
+job_kind('schedules_pdf', 'جدول معلمي الحلقات')(_report_job('schedules_pdf'))
+
+
+@job_kind('employees_import', 'استيراد الموظفين من Excel')
+def _import_employees_job(params, progress):
+    def report_progress(processed, added, updated):
+        progress(f'تمت معالجة {processed} صف (مضاف {added}، محدث {updated})')
+
+    added_count, updated_count = import_employees(params['input_path'], progress=report_progress)
+    db.session.commit()
+    return JobResult(message=f'تم إضافة {added_count} موظف. تم تحديث {updated_count} موظف موجود مسبقاً')
+
+
+@job_kind('users_delete', 'حذف الموظفين')
+def _delete_users_job(params, progress):
+    def report_progress(deleted, total):
+        progress(f'تم حذف {deleted} من {total} مستخدم')
+
+    deleted_count = delete_users(DELETION_SCOPES[params['scope']](), progress=report_progress)
+    db.session.commit()
+    return JobResult(message=f'تم حذف {deleted_count} مستخدم مع جميع سجلاتهم')
+
+
+@job_kind('activity_archive', 'أرشفة سجل النشاطات')
+def _archive_activity_job(params, progress):
+    archived_count = archive_activity_log(progress=lambda archived: progress(f'تمت أرشفة {archived} سجل'))
+    return JobResult(message=f'تمت أرشفة {archived_count} سجل نشاط')
+
+
+@job_kind('attachments_sweep', 'حذف المرفقات المنتهية')
+def _sweep_attachments_job(params, progress):
+    def report_progress(swept, reclaimed):
+        progress(f'تم حذف {swept} مرفق ({format_bytes(reclaimed)})')
+
+    swept_count, reclaimed = sweep_attachments(progress=report_progress)
+    return JobResult(message=f'تم حذف {swept_count} مرفق وتوفير {format_bytes(reclaimed)}')
@@ -0,0 +1,166 @@
+"""
+سجل الإجازات المستهلكة (leave_ledger)
+
+جدول فيه مجموع أيام الإجازات المقبولة لكل (موظف، نوع إجازة، سنة) حتى يكون التحقق
+من الحد الأقصى عند تقديم طلب جديد قراءة بالمفتاح بدلاً من جمع طلبات السنة.
+
+أيام الإجازة توزع على السنوات حسب التاريخ، فالإجازة من 28 ديسمبر إلى 3 يناير
+تحسب 4 أيام في السنة الأولى و3 في الثانية. يتم تحديث السجل داخل نفس المعاملة
+عند تغيير حالة الطلب (set_leave_status)، ويمكن إعادة بنائه أو مطابقته مع طلبات
+الإجازات بـ python reconcile_leave_ledger.py.
+"""
+from collections import Counter
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import sqlite, postgresql, mysql
+from models import db, LeaveRequest, LeaveLedger, Status
+from date_windows import year_window, overlap_days
+from data_versions import mark_data_changed
+
+# عدد الصفوف في كل جملة INSERT
+LEDGER_CHUNK_SIZE = 200
+
+KEY_FIELDS = ('employee_id', 'leave_type_id', 'year')
+
+
+def days_by_year(start, end):
+    """أيام الفترة (شاملة البداية والنهاية) موزعة على السنوات: السنة -> الأيام"""
+    return {year: overlap_days(year_window(year), start, end) for year in range(start.year, end.year + 1)}
+
+
+def _leave_deltas(deltas, employee_id, leave_type_id, start, end, sign=1):
+    for year, days in days_by_year(start, end).items():
+        deltas[(employee_id, leave_type_id, year)] += sign * days
+
+
+def _upsert_statement(dialect, rows):
+    """INSERT ... ON CONFLICT يضيف الفرق إلى الأيام الموجودة"""
+    table = LeaveLedger.__table__
+
+    if dialect == 'sqlite':
+        stmt = sqlite.insert(table).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=list(KEY_FIELDS),
+            set_={'days': table.c.days + stmt.excluded.days}
+        )
+    if dialect == 'postgresql':
+        stmt = postgresql.insert(table).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=list(KEY_FIELDS),
+            set_={'days': table.c.days + stmt.excluded.days}
+        )
+    if dialect in ('mysql', 'mariadb'):
+        stmt = mysql.insert(table).values(rows)
+        return stmt.on_duplicate_key_update({'days': table.c.days + stmt.inserted.days})
+
+
+def apply_ledger_deltas(deltas):
+    """إضافة الفروقات إلى السجل دون commit
+
+    deltas قاموس (الموظف، النوع، السنة) -> الفرق في الأيام (موجب أو سالب).
+    """
+    rows = [dict(zip(KEY_FIELDS, key), days=value) for key, value in deltas.items() if value]
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql', 'mysql', 'mariadb'):
+        for i in range(0, len(rows), LEDGER_CHUNK_SIZE):
+            db.session.execute(_upsert_statement(dialect, rows[i:i + LEDGER_CHUNK_SIZE]))
+    else:
+        for row in rows:
+            entry = db.session.get(LeaveLedger, tuple(row[f] for f in KEY_FIELDS))
+            if entry:
+                entry.days += row['days']
+            else:
+                db.session.add(LeaveLedger(**row))
+        db.session.flush()
+
+
+def set_leave_status(leave_request, status):
+    """تغيير حالة طلب الإجازة مع تحديث السجل دون commit
+
+    أيام الطلب تضاف عند قبوله وتخصم إذا تغيرت حالته بعد القبول.
+    """
+    was_approved = leave_request.status == Status.APPROVED
+    leave_request.status = status
+    mark_data_changed('leave_requests')
+    is_approved = status == Status.APPROVED
+
+    if was_approved != is_approved:
+        deltas = Counter()
+        _leave_deltas(deltas, leave_request.employee_id, int(leave_request.leave_type_id),
+                      leave_request.start_date, leave_request.end_date, 1 if is_approved else -1)
+        apply_ledger_deltas(deltas)
+
+
+def consumed_days(employee_id, leave_type_id, years):
+    """الأيام المستهلكة من نوع الإجازة في كل سنة باستعلام واحد: السنة -> الأيام"""
+    rows = db.session.query(LeaveLedger.year, LeaveLedger.days).filter(
+        LeaveLedger.employee_id == employee_id,
+        LeaveLedger.leave_type_id == leave_type_id,
+        LeaveLedger.year.in_(list(years))
+    ).all()
+    consumed = dict.fromkeys(years, 0)
+    consumed.update(rows)
+    return consumed
+
+
+def quota_exceeded(employee_id, leave_type, start, end):
+    """هل يتجاوز الطلب الجديد الحد الأقصى لنوع الإجازة في أي سنة يغطيها"""
+    requested = days_by_year(start, end)
+    consumed = consumed_days(employee_id, leave_type.id, requested)
+    return any(consumed[year] + days > leave_type.max_days for year, days in requested.items())
+
+
+def discount_employee_leaves(employee_ids):
+    """حذف سجل إجازات الموظفين - تستدعى عند حذف طلباتهم"""
+    employee_ids = list(employee_ids)
+    if employee_ids:
+        db.session.execute(delete(LeaveLedger).where(LeaveLedger.employee_id.in_(employee_ids)))
+
+
+def compute_leave_ledger(bind=None):
+    """حساب السجل من طلبات الإجازات المقبولة: (الموظف، النوع، السنة) -> الأيام"""
+    bind = bind if bind is not None else db.session
+    totals = Counter()
+    approved = bind.execute(
+        select(LeaveRequest.employee_id, LeaveRequest.leave_type_id, LeaveRequest.start_date, LeaveRequest.end_date)
+        .where(LeaveRequest.status == Status.APPROVED)
+        .execution_options(yield_per=1000)
+    )
+    for employee_id, leave_type_id, start, end in approved:
+        _leave_deltas(totals, employee_id, leave_type_id, start, end)
+    return totals
+
+
+def rebuild_leave_ledger(bind=None):
+    """إعادة بناء السجل كاملاً من طلبات الإجازات دون commit
+
+    bind اتصال أو جلسة للتنفيذ (الافتراضي db.session) ويستخدم في الترحيلات.
+    ترجع عدد صفوف السجل المنشأة.
+    """
+    bind = bind if bind is not None else db.session
+    rows = [dict(zip(KEY_FIELDS, key), days=days) for key, days in compute_leave_ledger(bind).items() if days]
+
+    bind.execute(delete(LeaveLedger))
+    for i in range(0, len(rows), LEDGER_CHUNK_SIZE):
+        bind.execute(insert(LeaveLedger), rows[i:i + LEDGER_CHUNK_SIZE])
+    return len(rows)
+
+
+def reconcile_leave_ledger():
+    """مقارنة السجل بطلبات الإجازات
+
+    ترجع قائمة الفروقات [(الموظف، النوع، السنة، الأيام في السجل، الأيام الفعلية)].
+    """
+    expected = compute_leave_ledger()
+    recorded = {
+        tuple(row[:3]): row[3]
+        for row in db.session.execute(select(LeaveLedger.employee_id, LeaveLedger.leave_type_id,
+                                             LeaveLedger.year, LeaveLedger.days))
+    }
+    differences = []
+    for key in sorted(set(expected) | set(recorded)):
+        if expected.get(key, 0) != recorded.get(key, 0):
+            differences.append(key + (recorded.get(key, 0), expected.get(key, 0)))
+    return differences
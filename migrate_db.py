@@ -1,65 +1,81 @@
 """
-سكريبت ترحيل قاعدة البيانات - إضافة الحقول الجديدة
+سكريبت ترحيل قاعدة البيانات
+
+الاستخدام:
+    python migrate_db.py           تطبيق جميع الترحيلات المعلقة
+    python migrate_db.py status    عرض الإصدار الحالي والترحيلات المعلقة
+    python migrate_db.py check     فحص خطط الاستعلامات الساخنة (EXPLAIN)
 """
-import sqlite3
-import os
+import sys
+from app import app
+from models import db
+import migrations
+from migrations.plans import check_hot_queries, PLAN_DIALECTS
 
-def migrate_database():
-    """تحديث قاعدة البيانات بإضافة الأعمدة الجديدة"""
-    
-    db_path = 'instance/halaqat.db'
-    
-    if not os.path.exists(db_path):
-        print("⚠️ قاعدة البيانات غير موجودة. سيتم إنشاؤها عند تشغيل التطبيق.")
+
+def upgrade():
+    """إنشاء الجداول الناقصة ثم تطبيق الترحيلات المعلقة"""
+    db.create_all()
+    applied = migrations.upgrade(db.engine, log=lambda line: print(f"  ➕ {line}"))
+    if applied:
+        print(f"✅ تم تطبيق {len(applied)} ترحيل")
+    else:
+        print("✅ قاعدة البيانات محدثة مسبقاً")
+    print(f"   الإصدار الحالي: {migrations.current_version(db.engine)}")
+    return True
+
+
+def status():
+    """عرض الإصدار الحالي والترحيلات المعلقة"""
+    print(f"الإصدار الحالي: {migrations.current_version(db.engine)}")
+    pending = migrations.pending_revisions(db.engine)
+    if not pending:
+        print("✓ لا توجد ترحيلات معلقة")
+    for module in pending:
+        print(f"  ⏳ {module.revision:04d} - {module.description}")
+    return True
+
+
+def check():
+    """فحص أن الاستعلامات الساخنة لا تمسح جداول كاملة"""
+    if migrations.pending_revisions(db.engine):
+        print("❌ توجد ترحيلات معلقة، شغل: python migrate_db.py")
+        return False
+    failures = check_hot_queries(db.engine)
+    if failures is None:
+        print(f"⚠️ فحص الخطط غير مدعوم لـ {db.engine.dialect.name} - تم تخطيه "
+              f"(المدعوم: {', '.join(PLAN_DIALECTS)})")
+        return True
+    if not failures:
+        print("✅ جميع الاستعلامات الساخنة تستخدم الفهارس")
         return True
+    for name, scans in failures.items():
+        print(f"❌ {name}:")
+        for line in scans:
+            print(f"     {line}")
+    return False
+
+
+COMMANDS = {
+    'upgrade': upgrade,
+    'status': status,
+    'check': check,
+}
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'upgrade'
+    if command not in COMMANDS:
+        print(__doc__)
+        sys.exit(2)
     
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        print("="*60)
-        print("جاري تحديث قاعدة البيانات...")
-        print("="*60)
-        
-        # التحقق من وجود عمود leave_balance
-        cursor.execute("PRAGMA table_info(users)")
-        columns = [column[1] for column in cursor.fetchall()]
-        
-        if 'leave_balance' not in columns:
-            print("\n✓ إضافة عمود leave_balance إلى جدول users...")
-            cursor.execute("ALTER TABLE users ADD COLUMN leave_balance INTEGER DEFAULT 0")
-            conn.commit()
-            print("✓ تم إضافة عمود leave_balance بنجاح")
-        else:
-            print("\n✓ عمود leave_balance موجود مسبقاً")
-        
-        # التحقق من وجود جدول certificates
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='certificates'")
-        if not cursor.fetchone():
-            print("\n✓ سيتم إنشاء جدول certificates عند تشغيل التطبيق")
-        else:
-            print("\n✓ جدول certificates موجود مسبقاً")
-        
-        conn.close()
-        
-        print("\n" + "="*60)
-        print("✅ تم تحديث قاعدة البيانات بنجاح!")
-        print("="*60)
-        print("\nيمكنك الآن تشغيل التطبيق:")
-        print("  python app.py")
-        print("\nأو على Windows:")
-        print("  run.bat")
-        print("="*60)
-        
-        return True
-        
+        with app.app_context():
+            success = COMMANDS[command]()
     except Exception as e:
-        print(f"\n❌ خطأ أثناء التحديث: {str(e)}")
+        print(f"\n❌ خطأ أثناء الترحيل: {str(e)}")
         import traceback
         traceback.print_exc()
-        return False
-
-if __name__ == '__main__':
-    import sys
-    success = migrate_database()
+        success = False
+    
     sys.exit(0 if success else 1)
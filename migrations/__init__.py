@@ -0,0 +1,80 @@
+"""
+نظام ترحيل قاعدة البيانات بالإصدارات
+
+كل ترحيل وحدة في هذه الحزمة تعرّف:
+    revision     رقم الإصدار (تصاعدي)
+    description  وصف قصير
+    upgrade(conn) تنفيذ التغييرات على الاتصال داخل معاملة
+
+يتم تسجيل الإصدارات المطبقة في جدول schema_version، ويطبق upgrade() ما لم
+يطبق منها بالترتيب، كل إصدار في معاملة مستقلة. خطوات الترحيل يجب أن تكون آمنة
+عند إعادة التشغيل على قاعدة أنشئت بـ db.create_all() وفيها التغيير مسبقاً.
+"""
+from datetime import datetime
+from sqlalchemy import text
+
+from migrations import (
+    r0001_hot_filter_indexes, r0002_attendance_daily_summary, r0003_jobs, r0004_data_versions,
+    r0005_leave_ledger, r0006_attachment_store, r0007_job_heartbeat,
+)
+
+# جميع الترحيلات بالترتيب
+REVISIONS = [
+    r0001_hot_filter_indexes,
+    r0002_attendance_daily_summary,
+    r0003_jobs,
+    r0004_data_versions,
+    r0005_leave_ledger,
+    r0006_attachment_store,
+    r0007_job_heartbeat,
+]
+
+VERSION_TABLE = 'schema_version'
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR(200), "
+        "applied_at TIMESTAMP)"
+    ))
+
+
+def applied_revisions(engine):
+    """أرقام الإصدارات المطبقة على قاعدة البيانات"""
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        return {row[0] for row in conn.execute(text(f"SELECT version FROM {VERSION_TABLE}"))}
+
+
+def current_version(engine):
+    """آخر إصدار مطبق، أو 0 لقاعدة بيانات لم تطبق عليها أي ترحيلات"""
+    return max(applied_revisions(engine), default=0)
+
+
+def pending_revisions(engine):
+    """الترحيلات التي لم تطبق بعد بالترتيب"""
+    applied = applied_revisions(engine)
+    return [module for module in REVISIONS if module.revision not in applied]
+
+
+def upgrade(engine, log=None):
+    """تطبيق جميع الترحيلات المعلقة وإرجاع أرقامها
+
+    log دالة اختيارية تستدعى بنص وصف كل ترحيل قبل تطبيقه.
+    """
+    done = []
+    for module in pending_revisions(engine):
+        if log:
+            log(f'{module.revision:04d} - {module.description}')
+        with engine.begin() as conn:
+            module.upgrade(conn)
+            conn.execute(
+                text(f"INSERT INTO {VERSION_TABLE} (version, description, applied_at) "
+                     "VALUES (:version, :description, :applied_at)"),
+                {'version': module.revision, 'description': module.description,
+                 'applied_at': datetime.utcnow()}
+            )
+        done.append(module.revision)
+    return done
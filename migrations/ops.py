@@ -0,0 +1,31 @@
+"""
+أدوات مساعدة لخطوات الترحيل - آمنة عند إعادة التشغيل
+"""
+from sqlalchemy import inspect, text
+
+
+def has_table(conn, table):
+    return inspect(conn).has_table(table)
+
+
+def column_names(conn, table):
+    return {column['name'] for column in inspect(conn).get_columns(table)}
+
+
+def add_column(conn, table, column, ddl):
+    """إضافة عمود إذا لم يكن موجوداً، ترجع True إذا تمت الإضافة"""
+    if not has_table(conn, table) or column in column_names(conn, table):
+        return False
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return True
+
+
+def create_index(conn, name, table, columns):
+    """إنشاء فهرس إذا لم يكن موجوداً، ترجع True إذا تم الإنشاء"""
+    if not has_table(conn, table):
+        return False
+    existing = {index['name'] for index in inspect(conn).get_indexes(table)}
+    if name in existing:
+        return False
+    conn.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+    return True
@@ -0,0 +1,120 @@
+"""
+فحص خطط تنفيذ الاستعلامات الساخنة
+
+كل استعلام مسجل في HOT_QUERIES يتم تمريره إلى EXPLAIN، ويفشل الفحص إذا كانت
+الخطة تمسح جدولاً كاملاً بدلاً من استخدام فهرس. القيم المستخدمة في الاستعلامات
+أمثلة فقط - المهم هو شكل الشرط وليس النتيجة.
+"""
+from datetime import date
+from sqlalchemy import select, func, or_
+from models import User, Role, LeaveRequest, LeaveLedger, Attendance, AttendanceDailySummary, ActivityLog, Certificate
+from date_windows import month_window, in_window
+
+_DAY = date(2024, 1, 1)
+
+# اسم الاستعلام -> دالة ترجع جملة select بنفس شكل الاستعلام في التطبيق
+HOT_QUERIES = {
+    # حضور يوم واحد لمجموعة موظفين (attendance_service.load_day_attendance)
+    'attendance_day_for_employees': lambda: select(Attendance).where(
+        Attendance.date == _DAY, Attendance.employee_id.in_([1, 2, 3])
+    ),
+    # سجل حضور الموظف لشهر (employee.my_attendance)
+    'attendance_employee_month': lambda: select(Attendance).where(
+        Attendance.employee_id == 1, in_window(Attendance.date, month_window(2024, 1))
+    ),
+    # عدد الحاضرين اليوم في لوحة التحكم
+    'attendance_present_today': lambda: select(func.count()).select_from(Attendance).where(
+        Attendance.date == _DAY, Attendance.status == 'حاضر'
+    ),
+    # لوحة تحكم المشرف من ملخص الحضور اليومي
+    'attendance_summary_day': lambda: select(
+        AttendanceDailySummary.status, func.sum(AttendanceDailySummary.count)
+    ).where(
+        AttendanceDailySummary.date == _DAY, AttendanceDailySummary.supervisor_id == 1
+    ).group_by(AttendanceDailySummary.status),
+    # عدد الطلبات المعلقة
+    'leave_requests_pending': lambda: select(func.count()).select_from(LeaveRequest).where(
+        LeaveRequest.status == 'قيد الانتظار'
+    ),
+    # قائمة الطلبات حسب الحالة
+    'leave_requests_by_status': lambda: select(LeaveRequest).where(
+        LeaveRequest.status == 'قيد الانتظار'
+    ).order_by(LeaveRequest.created_at.desc()).limit(50),
+    # الأيام المستهلكة من نوع إجازة في السنوات التي يغطيها الطلب
+    'leave_ledger_quota': lambda: select(LeaveLedger.year, LeaveLedger.days).where(
+        LeaveLedger.employee_id == 1, LeaveLedger.leave_type_id == 1, LeaveLedger.year.in_([2024, 2025])
+    ),
+    # المرفقات المنتهية لحذفها (attachment_retention.sweep_attachments)
+    'leave_attachments_expired': lambda: select(
+        LeaveRequest.id, LeaveRequest.attachment_path, LeaveRequest.attachment_digest
+    ).where(
+        LeaveRequest.created_at < _DAY,
+        or_(LeaveRequest.attachment_path.isnot(None), LeaveRequest.attachment_digest.isnot(None))
+    ).order_by(LeaveRequest.created_at, LeaveRequest.id).limit(500),
+    # صلاحية عرض مرفق من المخزن (routes_attachments)
+    'leave_attachment_access': lambda: select(LeaveRequest.id).join(User, LeaveRequest.employee_id == User.id).where(
+        LeaveRequest.attachment_digest == 'a' * 64,
+        or_(User.id == 1, User.supervisor_id == 1)
+    ).limit(1),
+    # الموظفون النشطون في صفحة التحضير مع الفلاتر
+    'employees_active_filtered': lambda: select(User).where(
+        User.role == Role.EMPLOYEE, User.is_active == True,
+        User.department == 'الحلقات', User.period == 'الأولى'
+    ),
+    # الموظفون التابعون للمشرف
+    'supervisor_subordinates': lambda: select(User).where(
+        User.supervisor_id == 1, User.role == Role.EMPLOYEE
+    ),
+    # سجل النشاطات لفترة
+    'activity_logs_range': lambda: select(ActivityLog).where(
+        ActivityLog.created_at >= _DAY
+    ).order_by(ActivityLog.created_at.desc()).limit(50),
+    # شهادات المستخدم
+    'certificates_by_creator': lambda: select(Certificate).where(
+        Certificate.created_by == 1
+    ).order_by(Certificate.created_at.desc()),
+}
+
+
+def _sqlite_full_scans(conn, sql):
+    # كل صف: (id, parent, notused, detail) مثل "SCAN users" أو "SEARCH users USING INDEX ..."
+    rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql).fetchall()
+    return [row[3] for row in rows
+            if row[3].startswith('SCAN ') and ' USING ' not in row[3]]
+
+
+def _postgresql_full_scans(conn, sql):
+    # مع إيقاف Seq Scan لا يظهر في الخطة إلا إذا لم يوجد فهرس مناسب
+    conn.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    rows = conn.exec_driver_sql('EXPLAIN ' + sql).fetchall()
+    return [row[0].strip() for row in rows if 'Seq Scan' in row[0]]
+
+
+_CHECKERS = {
+    'sqlite': _sqlite_full_scans,
+    'postgresql': _postgresql_full_scans,
+}
+
+# المحركات التي يمكن فحص خطط استعلاماتها
+PLAN_DIALECTS = tuple(_CHECKERS)
+
+
+def check_hot_queries(engine, queries=None):
+    """فحص خطط الاستعلامات الساخنة
+
+    ترجع قاموس اسم الاستعلام -> أسطر الخطة التي تمسح جدولاً كاملاً،
+    ويكون فارغاً إذا كانت جميع الاستعلامات تستخدم الفهارس. ترجع None إذا
+    كان محرك قاعدة البيانات ليس من PLAN_DIALECTS.
+    """
+    checker = _CHECKERS.get(engine.dialect.name)
+    if checker is None:
+        return None
+
+    failures = {}
+    for name, build in (queries or HOT_QUERIES).items():
+        sql = str(build().compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+        with engine.begin() as conn:
+            scans = checker(conn, sql)
+        if scans:
+            failures[name] = scans
+    return failures
@@ -0,0 +1,63 @@
+"""
+الإصدار 1: فهارس الفلاتر الساخنة
+
+يضيف أولاً الأعمدة التي كانت تضيفها السكريبتات القديمة (update_db*.py و
+migrate_db.py) حتى تصل القواعد القديمة إلى نفس البنية، ثم ينشئ الفهارس المركبة
+للاستعلامات الأكثر استخداماً.
+
+لا يوجد فهرس منفصل لـ attendance(employee_id, date) لأن القيد الفريد
+_employee_date_uc ينشئ فهرساً على نفس الأعمدة بنفس الترتيب.
+"""
+from sqlalchemy import bindparam, text
+from migrations.ops import add_column, create_index
+
+revision = 1
+description = 'فهارس الفلاتر الساخنة'
+
+# (الجدول، العمود، التعريف)
+LEGACY_COLUMNS = [
+    ('users', 'period', 'VARCHAR(50)'),
+    ('users', 'work_time', 'VARCHAR(50)'),
+    ('users', 'rest_days', 'VARCHAR(100)'),
+    ('users', 'leave_balance', 'INTEGER DEFAULT 0'),
+    ('users', 'password_pending', 'BOOLEAN DEFAULT FALSE'),
+]
+
+# الإجازات المرضية والوطنية لا تخصم من الرصيد
+NON_DEDUCTED_LEAVE_TYPES = ('إجازة مرضية', 'إجازة وطنية', 'الإجازات الوطنية', 'مرضية', 'وطنية')
+
+# (اسم الفهرس، الجدول، الأعمدة) - يجب أن تطابق الأسماء المعرفة في models.py
+INDEXES = [
+    # فهارس الترتيب لترقيم الصفحات بالمؤشر
+    ('ix_leave_requests_created_at_id', 'leave_requests', ('created_at', 'id')),
+    ('ix_attendance_date_id', 'attendance', ('date', 'id')),
+    ('ix_certificates_created_at_id', 'certificates', ('created_at', 'id')),
+    # إحصائيات الحضور اليومية
+    ('ix_attendance_date_status', 'attendance', ('date', 'status')),
+    # الطلبات المعلقة وآخر الطلبات
+    ('ix_leave_requests_status_created_at', 'leave_requests', ('status', 'created_at')),
+    # التحقق من الحد السنوي للإجازات
+    ('ix_leave_requests_quota', 'leave_requests', ('employee_id', 'leave_type_id', 'status', 'start_date')),
+    # قوائم الموظفين والتحضير
+    ('ix_users_role_active_department_period', 'users', ('role', 'is_active', 'department', 'period')),
+    # الموظفون التابعون للمشرف
+    ('ix_users_supervisor_role', 'users', ('supervisor_id', 'role')),
+    ('ix_activity_logs_created_at', 'activity_logs', ('created_at',)),
+    # شهادات المستخدم
+    ('ix_certificates_created_by_created_at', 'certificates', ('created_by', 'created_at')),
+]
+
+
+def upgrade(conn):
+    for table, column, ddl in LEGACY_COLUMNS:
+        add_column(conn, table, column, ddl)
+
+    if add_column(conn, 'leave_types', 'deduct_from_balance', 'BOOLEAN DEFAULT TRUE'):
+        conn.execute(
+            text("UPDATE leave_types SET deduct_from_balance = FALSE WHERE name IN :names")
+            .bindparams(bindparam('names', expanding=True)),
+            {'names': list(NON_DEDUCTED_LEAVE_TYPES)}
+        )
+
+    for name, table, columns in INDEXES:
+        create_index(conn, name, table, columns)
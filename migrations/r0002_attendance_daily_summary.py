@@ -0,0 +1,15 @@
+"""
+الإصدار 2: جدول ملخص الحضور اليومي
+
+ينشئ جدول attendance_daily_summary ويملؤه من سجلات الحضور الموجودة.
+"""
+from models import AttendanceDailySummary
+from attendance_summary import rebuild_attendance_summary
+
+revision = 2
+description = 'ملخص الحضور اليومي'
+
+
+def upgrade(conn):
+    AttendanceDailySummary.__table__.create(conn, checkfirst=True)
+    rebuild_attendance_summary(bind=conn)
@@ -0,0 +1,13 @@
+"""
+الإصدار 3: جدول مهام الخلفية
+
+ينشئ جدول jobs الذي تسجل فيه التقارير والاستيرادات المنفذة في الخلفية.
+"""
+from models import Job
+
+revision = 3
+description = 'جدول مهام الخلفية'
+
+
+def upgrade(conn):
+    Job.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,21 @@
+"""
+الإصدار 4: عدادات إصدار البيانات
+
+ينشئ جدول data_versions الذي تقرأ منه الذاكرة المؤقتة للتقارير أختام البيانات،
+مع صف بإصدار 0 لكل جدول متتبع. زيادة العداد بعدها جملة UPDATE فقط، فلا يتسابق
+عاملان على إدراج صف الجدول عند أول تغيير.
+"""
+from sqlalchemy import select
+from models import DataVersion
+from data_versions import TRACKED_TABLES
+
+revision = 4
+description = 'عدادات إصدار البيانات'
+
+
+def upgrade(conn):
+    DataVersion.__table__.create(conn, checkfirst=True)
+    existing = set(conn.execute(select(DataVersion.table_name)).scalars())
+    missing = [{'table_name': table, 'version': 0} for table in sorted(TRACKED_TABLES) if table not in existing]
+    if missing:
+        conn.execute(DataVersion.__table__.insert(), missing)
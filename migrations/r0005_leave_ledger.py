@@ -0,0 +1,15 @@
+"""
+الإصدار 5: سجل الإجازات المستهلكة
+
+ينشئ جدول leave_ledger ويملؤه من طلبات الإجازات المقبولة.
+"""
+from models import LeaveLedger
+from leave_ledger import rebuild_leave_ledger
+
+revision = 5
+description = 'سجل الإجازات المستهلكة'
+
+
+def upgrade(conn):
+    LeaveLedger.__table__.create(conn, checkfirst=True)
+    rebuild_leave_ledger(bind=conn)
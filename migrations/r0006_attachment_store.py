@@ -0,0 +1,17 @@
+"""
+الإصدار 6: مخزن المرفقات بالمحتوى
+
+ينشئ جدول attachments ويضيف عمود attachment_digest لطلبات الإجازات مع فهرسه.
+المرفقات القديمة تبقى في attachment_path وتعرض كما كانت.
+"""
+from models import Attachment
+from migrations.ops import add_column, create_index
+
+revision = 6
+description = 'مخزن المرفقات بالمحتوى'
+
+
+def upgrade(conn):
+    Attachment.__table__.create(conn, checkfirst=True)
+    add_column(conn, 'leave_requests', 'attachment_digest', 'VARCHAR(64) REFERENCES attachments (digest)')
+    create_index(conn, 'ix_leave_requests_attachment_digest', 'leave_requests', ('attachment_digest',))
@@ -0,0 +1,14 @@
+"""
+الإصدار 7: نبض مهام الخلفية
+
+يضيف عمود heartbeat_at لجدول jobs. العامل الذي يحمل المهمة يحدثه دورياً، ولا
+تعتبر المهمة منقطعة إلا إذا توقف نبضها مدة JOB_TIMEOUT_MINUTES.
+"""
+from migrations.ops import add_column
+
+revision = 7
+description = 'نبض مهام الخلفية'
+
+
+def upgrade(conn):
+    add_column(conn, 'jobs', 'heartbeat_at', 'TIMESTAMP')
@@ -1,7 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import validates
 from datetime import datetime
+import hashlib
+import hmac
 import pytz
 
 db = SQLAlchemy()
@@ -45,6 +48,8 @@ class User(UserMixin, db.Model):
     national_id = db.Column(db.String(10), unique=True, nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     password_hash = db.Column(db.String(200))
+    # كلمة المرور الأولية (رقم الهوية) لم تشفر بعد - يتم تشفيرها عند أول دخول
+    password_pending = db.Column(db.Boolean, default=False)
     role = db.Column(db.String(50), nullable=False)
     gender = db.Column(db.String(10), nullable=False)
     department = db.Column(db.String(100))
@@ -65,6 +70,12 @@ class User(UserMixin, db.Model):
     supervisor_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     supervisor = db.relationship('User', remote_side=[id], backref='subordinates')
     
+    # فهارس فلاتر القوائم (انظر migrations/r0001_hot_filter_indexes.py)
+    __table_args__ = (
+        db.Index('ix_users_role_active_department_period', 'role', 'is_active', 'department', 'period'),
+        db.Index('ix_users_supervisor_role', 'supervisor_id', 'role'),
+    )
+    
     # العلاقات
     schedules = db.relationship('Schedule', backref='employee', lazy='dynamic', foreign_keys='Schedule.employee_id')
     leave_requests = db.relationship('LeaveRequest', backref='employee', lazy='dynamic', foreign_keys='LeaveRequest.employee_id')
@@ -72,12 +83,40 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
+        self.password_pending = False
     
     def check_password(self, password):
+        if self.password_pending:
+            # المقارنة مع رقم الهوية ثم حفظ التشفير (يجب عمل commit بعد الدخول)
+            if password is None or not hmac.compare_digest(
+                password.encode('utf-8'), (self.national_id or '').encode('utf-8')
+            ):
+                return False
+            self.set_password(password)
+            return True
         if not self.password_hash:
             return False
         return check_password_hash(self.password_hash, password)
     
+    @property
+    def security_stamp(self):
+        """ختم يتغير عند تغيير الدور أو حالة التفعيل أو كلمة المرور أو رقم الهوية"""
+        raw = '|'.join(str(value) for value in (
+            self.role, bool(self.is_active), self.password_hash, self.national_id
+        ))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+    
+    def get_id(self):
+        # معرف الجلسة يحمل ختم الأمان حتى تبطل الجلسات القديمة عند تغييره
+        return f'{self.id}:{self.security_stamp}'
+    
+    @validates('national_id')
+    def _keep_pending_password(self, key, national_id):
+        # عند تغيير الهوية قبل أول دخول تبقى كلمة المرور هي رقم الهوية القديم
+        if self.password_pending and self.national_id and national_id != self.national_id:
+            self.set_password(self.national_id)
+        return national_id
+    
     def __repr__(self):
         return f'<User {self.name}>'
 
@@ -128,7 +167,8 @@ class LeaveRequest(db.Model):
     end_date = db.Column(db.Date, nullable=False)
     days_count = db.Column(db.Integer, nullable=False)
     reason = db.Column(db.Text)
-    attachment_path = db.Column(db.String(500))
+    attachment_path = db.Column(db.String(500))  # مرفقات قديمة محفوظة في static/uploads/attachments
+    attachment_digest = db.Column(db.String(64), db.ForeignKey('attachments.digest'))  # مرفق في مخزن المحتوى
     status = db.Column(db.String(20), default=Status.PENDING)
     reviewed_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     reviewed_at = db.Column(db.DateTime)
@@ -136,10 +176,55 @@ class LeaveRequest(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     reviewer = db.relationship('User', foreign_keys=[reviewed_by])
+    attachment = db.relationship('Attachment')
+    
+    __table_args__ = (
+        # فهرس الترتيب لترقيم الصفحات بالمؤشر
+        db.Index('ix_leave_requests_created_at_id', 'created_at', 'id'),
+        db.Index('ix_leave_requests_status_created_at', 'status', 'created_at'),
+        # التحقق من الحد السنوي للإجازات
+        db.Index('ix_leave_requests_quota', 'employee_id', 'leave_type_id', 'status', 'start_date'),
+        # صلاحية عرض المرفق
+        db.Index('ix_leave_requests_attachment_digest', 'attachment_digest'),
+    )
+    
+    @property
+    def has_attachment(self):
+        return bool(self.attachment_digest or self.attachment_path)
     
     def __repr__(self):
         return f'<LeaveRequest {self.employee_id} - {self.leave_type_id}>'
 
+# ملفات المرفقات في مخزن المحتوى - ملف واحد لكل محتوى مهما تكرر رفعه
+class Attachment(db.Model):
+    __tablename__ = 'attachments'
+    
+    digest = db.Column(db.String(64), primary_key=True)  # SHA-256 للمحتوى
+    size = db.Column(db.Integer, nullable=False)
+    mimetype = db.Column(db.String(100))
+    ref_count = db.Column(db.Integer, nullable=False, default=0)  # عدد الطلبات التي تشير إليه
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @property
+    def is_image(self):
+        return self.mimetype in ('image/jpeg', 'image/png')
+    
+    def __repr__(self):
+        return f'<Attachment {self.digest[:12]} x{self.ref_count}>'
+
+# سجل الإجازات المستهلكة - مجموع أيام الطلبات المقبولة لكل (موظف، نوع، سنة)
+# يتم تحديثه عند قبول الطلب أو رفضه (leave_ledger.py) ويقرأ منه التحقق من الحد الأقصى
+class LeaveLedger(db.Model):
+    __tablename__ = 'leave_ledger'
+    
+    employee_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    leave_type_id = db.Column(db.Integer, db.ForeignKey('leave_types.id'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    days = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<LeaveLedger {self.employee_id} - {self.leave_type_id} - {self.year}: {self.days}>'
+
 # نموذج الحضور والغياب
 class Attendance(db.Model):
     __tablename__ = 'attendance'
@@ -156,11 +241,40 @@ class Attendance(db.Model):
     recorder = db.relationship('User', foreign_keys=[recorded_by])
     absence_status = db.relationship('AbsenceStatus', backref='attendance_records')
     
-    __table_args__ = (db.UniqueConstraint('employee_id', 'date', name='_employee_date_uc'),)
+    __table_args__ = (
+        db.UniqueConstraint('employee_id', 'date', name='_employee_date_uc'),
+        db.Index('ix_attendance_date_id', 'date', 'id'),
+        db.Index('ix_attendance_date_status', 'date', 'status'),
+    )
     
     def __repr__(self):
         return f'<Attendance {self.employee_id} - {self.date}>'
 
+# ملخص الحضور اليومي - عدد السجلات لكل (تاريخ، مشرف، قسم، حالة)
+# يتم تحديثه مع كل حفظ للحضور (attendance_summary.py) وتقرؤه لوحات التحكم
+class AttendanceDailySummary(db.Model):
+    __tablename__ = 'attendance_daily_summary'
+
+    date = db.Column(db.Date, primary_key=True)
+    # 0 للموظف بدون مشرف و '' بدون قسم، لأن أعمدة المفتاح لا تقبل NULL
+    supervisor_id = db.Column(db.Integer, primary_key=True, default=0)
+    department = db.Column(db.String(100), primary_key=True, default='')
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<AttendanceDailySummary {self.date} - {self.status}: {self.count}>'
+
+# عداد إصدار البيانات لكل جدول - يزيد عند commit معاملة علمت الجدول متغيراً (data_versions.py)
+class DataVersion(db.Model):
+    __tablename__ = 'data_versions'
+    
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<DataVersion {self.table_name}: {self.version}>'
+
 # نموذج إعدادات النظام
 class SystemSettings(db.Model):
     __tablename__ = 'system_settings'
@@ -210,6 +324,8 @@ class ActivityLog(db.Model):
     
     user = db.relationship('User', backref='activity_logs')
     
+    __table_args__ = (db.Index('ix_activity_logs_created_at', 'created_at'),)
+    
     def __repr__(self):
         return f'<ActivityLog {self.action} - {self.target_type}>'
 
@@ -253,5 +369,48 @@ class Certificate(db.Model):
     creator = db.relationship('User', foreign_keys=[created_by])
     updater = db.relationship('User', foreign_keys=[updated_by])
     
+    __table_args__ = (
+        # فهرس الترتيب لترقيم الصفحات بالمؤشر
+        db.Index('ix_certificates_created_at_id', 'created_at', 'id'),
+        db.Index('ix_certificates_created_by_created_at', 'created_by', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<Certificate {self.student_name} - {self.completion_type}>'
+
+# حالات مهام الخلفية
+class JobStatus:
+    QUEUED = 'في الانتظار'
+    RUNNING = 'قيد التنفيذ'
+    DONE = 'مكتملة'
+    FAILED = 'فشلت'
+
+# نموذج مهام الخلفية (التقارير والاستيراد الثقيلة) - انظر jobs.py
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    kind = db.Column(db.String(50), nullable=False)  # نوع المهمة: leaves_pdf، employees_import، إلخ
+    status = db.Column(db.String(20), nullable=False, default=JobStatus.QUEUED)
+    params = db.Column(db.Text)  # مدخلات المهمة بصيغة JSON
+    message = db.Column(db.Text)  # نتيجة المهمة أو رسالة الخطأ
+    result_path = db.Column(db.String(500))  # مسار الملف الناتج داخل مجلد المهام
+    result_name = db.Column(db.String(200))  # اسم الملف عند التحميل
+    result_mimetype = db.Column(db.String(100))
+    
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)  # آخر نبض من العامل الذي يحمل المهمة
+    
+    creator = db.relationship('User', foreign_keys=[created_by])
+    
+    __table_args__ = (db.Index('ix_jobs_created_at', 'created_at'),)
+    
+    @property
+    def is_finished(self):
+        return self.status in (JobStatus.DONE, JobStatus.FAILED)
+    
+    def __repr__(self):
+        return f'<Job {self.kind} - {self.status}>'
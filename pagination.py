@@ -0,0 +1,91 @@
+"""
+ترقيم الصفحات بالمؤشر (keyset / seek) للقوائم الطويلة
+
+بدلاً من OFFSET الذي يزداد بطؤه مع عمق الصفحة، يتم تذكر مفتاح آخر صف معروض
+(مثل created_at و id) وجلب الصفوف التي تليه مباشرة عبر الفهرس المركب.
+"""
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import literal, tuple_
+
+
+class KeysetPage:
+    """صفحة من النتائج مع مؤشر الصفحة التالية
+
+    offset عدد الصفوف المعروضة قبل هذه الصفحة، لترقيم الصفوف المضافة بـ "تحميل المزيد".
+    """
+
+    def __init__(self, items, next_cursor, offset=0):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.offset = offset
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def _to_json(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _from_json(value, column):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values, offset=0):
+    """تحويل قيم المفتاح (وعدد الصفوف المعروضة قبلها) إلى نص يمرر في الرابط"""
+    raw = json.dumps([_to_json(v) for v in values] + [offset]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode(cursor, columns):
+    """(قيم المفتاح، عدد الصفوف قبلها) من النص، أو (None, 0) إذا كان المؤشر غير صالح"""
+    if not cursor:
+        return None, 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        *values, offset = json.loads(raw)
+        if len(values) != len(columns) or not isinstance(offset, int) or offset < 0:
+            return None, 0
+        return [_from_json(v, c) for v, c in zip(values, columns)], offset
+    except (ValueError, TypeError):
+        return None, 0
+
+
+def decode_cursor(cursor, columns):
+    """استرجاع قيم المفتاح من النص، أو None إذا كان المؤشر غير صالح"""
+    return _decode(cursor, columns)[0]
+
+
+def keyset_paginate(query, columns, after=None, per_page=50):
+    """جلب صفحة من الاستعلام مرتبة تنازلياً حسب columns
+
+    columns قائمة أعمدة الترتيب وآخرها يجب أن يكون فريداً (عادة id) حتى يكون
+    الترتيب ثابتاً. after هو مؤشر الصفحة السابقة (next_cursor) أو None للصفحة الأولى.
+    الصفوف التي قيمة مفتاحها NULL (بيانات قديمة دون created_at مثلاً) لا تعرض، لأن
+    المقارنة مع NULL لا تعيد صفاً ولا يمكن بناء مؤشر منها.
+    """
+    query = query.filter(*[c.isnot(None) for c in columns])
+    key, offset = _decode(after, columns)
+    if key is not None:
+        # ربط القيم بنوع العمود حتى تتطابق صيغة التواريخ المخزنة
+        bound = [literal(v, type_=c.type) for v, c in zip(key, columns)]
+        query = query.filter(tuple_(*columns) < tuple_(*bound))
+
+    rows = query.order_by(*[c.desc() for c in columns]).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor([getattr(rows[-1], c.key) for c in columns], offset + per_page)
+
+    return KeysetPage(rows, next_cursor, offset)
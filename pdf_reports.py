@@ -0,0 +1,116 @@
+"""
+محرك تقارير PDF الجدولية
+
+يسجل الخط العربي المرفق مع النظام مرة واحدة عند بدء التشغيل، ويبني التقارير من
+وصف للأعمدة: لكل عمود عنوان ودالة تستخرج القيمة من الصف وعرض. الجداول الطويلة
+تقسم على الصفحات بـ LongTable مع تكرار صف العناوين في أول كل صفحة.
+"""
+import logging
+import os
+from io import BytesIO
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import LongTable, Paragraph, SimpleDocTemplate, Spacer, TableStyle
+from arabic_shaping import shape, shape_column, shape_columns
+
+logger = logging.getLogger(__name__)
+
+ARABIC_FONT = 'Arabic'
+FALLBACK_FONT = 'Helvetica'
+
+# الخط المرفق مع النظام (DejaVu Sans يدعم الحروف العربية)
+BUNDLED_FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'fonts', 'DejaVuSans.ttf')
+
+HEADER_COLOR = colors.HexColor('#0d7377')
+
+_font_name = None
+
+
+def register_fonts(font_path=None):
+    """تسجيل الخط العربي مرة واحدة وإرجاع اسمه
+
+    إذا تعذر تحميل الخط يتم استخدام Helvetica (لا يعرض العربية) مع تسجيل تحذير.
+    """
+    global _font_name
+    if _font_name is not None:
+        return _font_name
+
+    font_path = font_path or BUNDLED_FONT_PATH
+    try:
+        pdfmetrics.registerFont(TTFont(ARABIC_FONT, font_path))
+        _font_name = ARABIC_FONT
+    except Exception as e:
+        logger.warning('تعذر تحميل الخط العربي %s: %s', font_path, e)
+        _font_name = FALLBACK_FONT
+    return _font_name
+
+
+class ReportColumn:
+    """عمود في التقرير
+
+    value دالة تأخذ الصف وترجع القيمة، و shaped تحدد هل تمر القيمة عبر تشكيل
+    النص العربي (الأرقام والتواريخ لا تحتاج ذلك).
+    """
+
+    def __init__(self, title, value, width, shaped=True):
+        self.title = title
+        self.value = value
+        self.width = width
+        self.shaped = shaped
+
+
+def _table_style(font_name):
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), HEADER_COLOR),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, -1), font_name),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ])
+
+
+def table_data(columns, rows):
+    """بيانات الجدول: صف العناوين ثم صف لكل عنصر مع تشكيل الأعمدة النصية"""
+    raw = [[column.value(row) for column in columns] for row in rows]
+    shaped = [index for index, column in enumerate(columns) if column.shaped]
+    return [shape_column([column.title for column in columns])] + shape_columns(raw, shaped)
+
+
+def build_table_report(title, columns, rows, landscape_page=False, footer=None):
+    """بناء تقرير PDF فيه عنوان وجدول (وتذييل اختياري) وإرجاعه في BytesIO"""
+    font_name = register_fonts()
+    pagesize = landscape(A4) if landscape_page else A4
+    margin = 1.5 * cm if landscape_page else 2 * cm
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=pagesize, rightMargin=margin, leftMargin=margin,
+                            topMargin=2*cm, bottomMargin=2*cm, title=title)
+
+    title_style = ParagraphStyle('TitleStyle', fontSize=18, leading=24, alignment=TA_CENTER,
+                                 spaceAfter=20, fontName=font_name)
+    elements = [Paragraph(shape(title), title_style), Spacer(1, 20)]
+
+    table = LongTable(table_data(columns, rows), colWidths=[column.width for column in columns],
+                      repeatRows=1)
+    table.setStyle(_table_style(font_name))
+    elements.append(table)
+
+    if footer:
+        footer_style = ParagraphStyle('FooterStyle', fontSize=10, alignment=TA_CENTER,
+                                      spaceAfter=10, fontName=font_name)
+        elements.append(Spacer(1, 20))
+        elements.append(Paragraph(shape(footer), footer_style))
+
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
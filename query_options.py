@@ -0,0 +1,40 @@
+"""
+خيارات التحميل المسبق للعلاقات المستخدمة في قوالب صفحات القوائم
+
+كل دالة ترجع خيارات تمرر إلى query.options(...) حتى يتم جلب العلاقات التي
+يقرؤها القالب (مثل req.employee.name) مع الاستعلام نفسه بدلاً من استعلام لكل صف.
+"""
+from sqlalchemy.orm import joinedload
+from models import User, LeaveRequest, Attendance, ActivityLog
+
+
+def leave_request_options():
+    """طلبات الإجازات: الموظف ونوع الإجازة ومن قام بالمراجعة والمرفق"""
+    return (
+        joinedload(LeaveRequest.employee),
+        joinedload(LeaveRequest.leave_type),
+        joinedload(LeaveRequest.reviewer),
+        joinedload(LeaveRequest.attachment),
+    )
+
+
+def attendance_options():
+    """سجلات الحضور: الموظف ومن قام بالتسجيل"""
+    return (
+        joinedload(Attendance.employee),
+        joinedload(Attendance.recorder),
+    )
+
+
+def employee_options():
+    """قوائم الموظفين: المشرف"""
+    return (
+        joinedload(User.supervisor),
+    )
+
+
+def activity_log_options():
+    """سجل النشاطات: المستخدم"""
+    return (
+        joinedload(ActivityLog.user),
+    )
@@ -0,0 +1,40 @@
+"""
+سكريبت إعادة بناء ملخص الحضور اليومي من سجلات الحضور
+
+الاستخدام:
+    python rebuild_attendance_summary.py                        إعادة بناء الملخص كاملاً
+    python rebuild_attendance_summary.py 2024-01-01 2024-01-31  إعادة بناء فترة محددة
+"""
+import sys
+from datetime import datetime
+from app import app
+from models import db
+from attendance_summary import rebuild_attendance_summary
+
+
+def main(args):
+    try:
+        dates = [datetime.strptime(arg, '%Y-%m-%d').date() for arg in args[:2]]
+    except ValueError:
+        print(__doc__)
+        return False
+    start = dates[0] if dates else None
+    end = dates[1] if len(dates) > 1 else None
+    
+    with app.app_context():
+        try:
+            print("جاري إعادة بناء ملخص الحضور...")
+            rows = rebuild_attendance_summary(start, end)
+            db.session.commit()
+            print(f"✅ تم إنشاء {rows} صف في الملخص")
+            return True
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ خطأ أثناء إعادة البناء: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main(sys.argv[1:]) else 1)
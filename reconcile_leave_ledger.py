@@ -0,0 +1,48 @@
+"""
+سكريبت مطابقة سجل الإجازات المستهلكة مع طلبات الإجازات
+
+الاستخدام:
+    python reconcile_leave_ledger.py        عرض الفروقات بين السجل والطلبات المقبولة
+    python reconcile_leave_ledger.py --fix  إعادة بناء السجل من الطلبات
+"""
+import sys
+from app import app
+from models import db
+from leave_ledger import reconcile_leave_ledger, rebuild_leave_ledger
+
+
+def main(args):
+    if args and args != ['--fix']:
+        print(__doc__)
+        return False
+    
+    with app.app_context():
+        print("جاري مطابقة سجل الإجازات...")
+        differences = reconcile_leave_ledger()
+        if not differences:
+            print("✅ السجل مطابق لطلبات الإجازات")
+            return True
+        
+        print(f"⚠️ يوجد {len(differences)} فرق:")
+        for employee_id, leave_type_id, year, recorded, expected in differences:
+            print(f"  الموظف {employee_id} - النوع {leave_type_id} - {year}: في السجل {recorded} والفعلي {expected}")
+        
+        if not args:
+            print("\nلإصلاح السجل: python reconcile_leave_ledger.py --fix")
+            return False
+        
+        try:
+            rows = rebuild_leave_ledger()
+            db.session.commit()
+            print(f"✅ تم إعادة بناء السجل ({rows} صف)")
+            return True
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ خطأ أثناء إعادة البناء: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main(sys.argv[1:]) else 1)
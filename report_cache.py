@@ -0,0 +1,93 @@
+"""
+ذاكرة مؤقتة على القرص لتقارير PDF
+
+نفس التقرير بنفس الفلاتر يطلب مرات كثيرة (خاصة حول نهاية الشهر) ولا تتغير
+بياناته بين الطلبات. اسم الملف المحفوظ هو بصمة sha256 لنوع التقرير والفلاتر
+الموحدة وعدادات إصدار الجداول التي يقرأ منها (data_versions.py)، فأي تغيير تعلمه
+مسارات الكتابة يغير البصمة ولا يستخدم الملف القديم بعدها.
+
+الملفات في REPORT_CACHE_FOLDER ويحدث وقت تعديل الملف عند كل استخدام، وعند تجاوز
+الحجم الكلي REPORT_CACHE_MAX_BYTES تحذف الملفات الأقدم استخداماً أولاً.
+"""
+import hashlib
+import json
+import os
+from io import BytesIO
+from flask import current_app
+from data_versions import data_versions
+
+
+def report_cache_key(kind, filters, versions):
+    """بصمة التقرير: نوعه والفلاتر وإصدارات الجداول"""
+    payload = json.dumps([kind, filters, versions], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    # تسجيل الاستخدام لترتيب الحذف
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return data
+
+
+def _write(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def evict_reports(folder, max_bytes):
+    """حذف الملفات الأقدم استخداماً حتى يصبح الحجم الكلي ضمن الحد
+
+    ترجع عدد الملفات المحذوفة.
+    """
+    entries = []
+    for entry in os.scandir(folder):
+        if entry.is_file() and entry.name.endswith('.pdf'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def cached_report(kind, filters, tables, build):
+    """التقرير من الذاكرة المؤقتة، أو ببنائه بـ build() وحفظه
+
+    tables الجداول التي يقرأ منها التقرير. ترجع BytesIO.
+    """
+    config = current_app.config
+    folder = config['REPORT_CACHE_FOLDER']
+
+    # العدادات تقرأ قبل البناء: أي تغيير أثناء البناء يغير البصمة للطلب التالي
+    key = report_cache_key(kind, filters, data_versions(tables))
+    path = os.path.join(folder, f'{key}.pdf')
+
+    data = _read(path)
+    if data is not None:
+        return BytesIO(data)
+
+    buffer = build()
+    os.makedirs(folder, exist_ok=True)
+    _write(path, buffer.getvalue())
+    evict_reports(folder, config['REPORT_CACHE_MAX_BYTES'])
+    buffer.seek(0)
+    return buffer
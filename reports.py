@@ -0,0 +1,161 @@
+"""
+تقارير PDF الإدارية
+
+كل تقرير دالة تأخذ الفلاتر كقاموس نصوص وترجع BytesIO. مسارات التحميل المباشر
+ومهام الخلفية (jobs.py) تطلب التقارير عبر build_report بالفلاتر من request.args
+أو من مدخلات المهمة المحفوظة، فتمر بالذاكرة المؤقتة للتقارير (report_cache.py).
+"""
+from datetime import datetime
+from reportlab.lib.units import cm
+from models import User, Role, LeaveRequest, LeaveType, Attendance
+from pdf_reports import ReportColumn, build_table_report
+from query_options import leave_request_options, attendance_options
+from report_cache import cached_report
+
+# الفلاتر التي يقبلها كل تقرير
+REPORT_FILTERS = {
+    'leaves_pdf': ('employee_id', 'leave_type_id', 'status'),
+    'attendance_pdf': ('employee_id', 'start_date', 'end_date'),
+    'schedules_pdf': ('gender', 'department', 'period'),
+}
+
+
+def report_filters(kind, args):
+    """فلاتر التقرير غير الفارغة فقط من request.args أو قاموس، بصيغة موحدة
+
+    الأرقام تحول إلى شكلها القياسي حتى تعطي الفلاتر المتساوية نفس مفتاح الذاكرة
+    المؤقتة.
+    """
+    filters = {}
+    for key in REPORT_FILTERS[kind]:
+        value = (args.get(key) or '').strip()
+        if key.endswith('_id'):
+            value = str(_int({key: value}, key) or '')
+        if value:
+            filters[key] = value
+    return filters
+
+
+def _int(filters, key):
+    try:
+        return int(filters.get(key) or 0) or None
+    except ValueError:
+        return None
+
+
+def _date(filters, key):
+    value = filters.get(key)
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+def leaves_report(filters):
+    """تقرير الإجازات"""
+    employee_id = _int(filters, 'employee_id')
+    leave_type_id = _int(filters, 'leave_type_id')
+    status = filters.get('status')
+
+    # تحديد الـ join بشكل صريح لتجنب AmbiguousForeignKeysError
+    query = LeaveRequest.query.options(*leave_request_options()).join(User, LeaveRequest.employee_id == User.id).join(LeaveType)
+
+    if employee_id:
+        query = query.filter(LeaveRequest.employee_id == employee_id)
+    if leave_type_id:
+        query = query.filter(LeaveRequest.leave_type_id == leave_type_id)
+    if status:
+        query = query.filter(LeaveRequest.status == status)
+
+    leaves = query.order_by(LeaveRequest.created_at.desc()).all()
+
+    columns = [
+        ReportColumn('الموظف', lambda leave: leave.employee.name, 4*cm),
+        ReportColumn('نوع الإجازة', lambda leave: leave.leave_type.name, 3*cm),
+        ReportColumn('من تاريخ', lambda leave: leave.start_date.strftime('%Y-%m-%d'), 2.5*cm, shaped=False),
+        ReportColumn('إلى تاريخ', lambda leave: leave.end_date.strftime('%Y-%m-%d'), 2.5*cm, shaped=False),
+        ReportColumn('الأيام', lambda leave: str(leave.days_count), 2*cm, shaped=False),
+        ReportColumn('الحالة', lambda leave: leave.status, 2.5*cm),
+    ]
+    return build_table_report('تقرير الإجازات', columns, leaves)
+
+
+def attendance_report(filters):
+    """تقرير الحضور والغياب"""
+    employee_id = _int(filters, 'employee_id')
+    start_date = _date(filters, 'start_date')
+    end_date = _date(filters, 'end_date')
+
+    query = Attendance.query.options(*attendance_options()).join(User, Attendance.employee_id == User.id)
+
+    if start_date:
+        query = query.filter(Attendance.date >= start_date)
+    if end_date:
+        query = query.filter(Attendance.date <= end_date)
+    if employee_id:
+        query = query.filter(Attendance.employee_id == employee_id)
+
+    records = query.order_by(Attendance.date.desc()).all()
+
+    columns = [
+        ReportColumn('الموظف', lambda record: record.employee.name, 5*cm),
+        ReportColumn('التاريخ', lambda record: record.date.strftime('%Y-%m-%d'), 3*cm, shaped=False),
+        ReportColumn('الحالة', lambda record: record.status, 3*cm),
+        ReportColumn('الملاحظات', lambda record: record.notes, 5*cm),
+    ]
+    return build_table_report('تقرير الحضور والغياب', columns, records)
+
+
+def schedules_report(filters):
+    """جدول معلمي الحلقات"""
+    query = User.query.filter_by(role=Role.EMPLOYEE, is_active=True)
+
+    if filters.get('gender'):
+        query = query.filter_by(gender=filters['gender'])
+    if filters.get('department'):
+        query = query.filter_by(department=filters['department'])
+    if filters.get('period'):
+        query = query.filter_by(period=filters['period'])
+
+    # ترتيب حسب الفترة والوقت
+    employees = query.order_by(User.period, User.work_time, User.name).all()
+
+    columns = [
+        ReportColumn('م', lambda row: str(row[0]), 1.5*cm, shaped=False),
+        ReportColumn('الاسم', lambda row: row[1].name, 5*cm),
+        ReportColumn('الفترة', lambda row: row[1].period, 3*cm),
+        ReportColumn('الوقت', lambda row: row[1].work_time, 3*cm),
+        ReportColumn('أيام الراحة', lambda row: row[1].rest_days, 4*cm),
+        ReportColumn('القسم', lambda row: row[1].department, 3*cm),
+        ReportColumn('الجنس', lambda row: row[1].gender, 2.5*cm),
+    ]
+    return build_table_report(
+        'جدول معلمي الحلقات', columns, enumerate(employees, 1), landscape_page=True,
+        footer=f'تاريخ الطباعة: {datetime.now().strftime("%Y-%m-%d %H:%M")}'
+    )
+
+
+class Report:
+    """تقرير مسجل: دالة البناء، الجداول التي يقرأ منها، وبداية اسم الملف
+
+    daily للتقارير التي تطبع تاريخ اليوم فلا يستخدم الملف المحفوظ في يوم آخر.
+    """
+
+    def __init__(self, build, tables, file_prefix, daily=False):
+        self.build = build
+        self.tables = tables
+        self.file_prefix = file_prefix
+        self.daily = daily
+
+
+REPORTS = {
+    'leaves_pdf': Report(leaves_report, ('leave_requests', 'leave_types', 'users'), 'leaves_report'),
+    'attendance_pdf': Report(attendance_report, ('attendance', 'users'), 'attendance_report'),
+    'schedules_pdf': Report(schedules_report, ('users',), 'schedule_table', daily=True),
+}
+
+
+def build_report(kind, args):
+    """التقرير المطلوب (BytesIO، اسم الملف) من الذاكرة المؤقتة أو ببنائه"""
+    report = REPORTS[kind]
+    filters = report_filters(kind, args)
+    key = dict(filters, date=datetime.now().strftime('%Y-%m-%d')) if report.daily else filters
+    buffer = cached_report(kind, key, report.tables, lambda: report.build(filters))
+    return buffer, f'{report.file_prefix}_{datetime.now().strftime("%Y%m%d")}.pdf'
@@ -1,42 +1,29 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file, make_response
-from flask_login import login_required, current_user
-from models import db, User, Role, LeaveRequest, LeaveType, Schedule, Attendance, SystemSettings, Notification, ActivityLog, AbsenceStatus, Certificate
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file, make_response, current_app, abort
+from flask_login import login_required, current_user, login_user
+from models import db, User, Role, LeaveRequest, LeaveType, Attendance, SystemSettings, ActivityLog, AbsenceStatus, Certificate
 from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
-import openpyxl
 from openpyxl import Workbook
 import os
 from io import BytesIO
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.enums import TA_RIGHT, TA_CENTER
 from sqlalchemy import or_, and_
+from attendance_service import load_day_attendance, save_attendance_batch
+from attendance_summary import status_counts, reattribute_attendance
+from leave_ledger import set_leave_status
+from jobs import submit_job
+from audit import log_activity
+from activity_archive import archived_months, search_archive
+from user_deletion import delete_users
+from assignments import assign_employees_to, subordinate_counts
+from pagination import keyset_paginate
+from settings_cache import bump_settings_version
+from data_versions import mark_data_changed
+from reports import build_report
+from exports import export_response
+from query_options import leave_request_options, attendance_options, employee_options, activity_log_options
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
-# دالة مساعدة لتسجيل النشاطات
-def log_activity(action, target_type, target_id=None, details=None):
-    """تسجيل نشاط في سجل النشاطات"""
-    try:
-        ip_address = request.remote_addr if request else None
-        log = ActivityLog(
-            user_id=current_user.id,
-            action=action,
-            target_type=target_type,
-            target_id=target_id,
-            details=details,
-            ip_address=ip_address
-        )
-        db.session.add(log)
-        db.session.commit()
-    except Exception as e:
-        print(f"Error logging activity: {str(e)}")
-
 # التحقق من صلاحيات الإدارة
 def admin_required():
     return current_user.is_authenticated and current_user.role in [Role.MAIN_ADMIN, Role.SUB_ADMIN]
@@ -58,13 +45,10 @@ def dashboard():
     
     # الحضور اليوم
     today = datetime.now().date()
-    present_today = Attendance.query.filter(
-        Attendance.date == today,
-        Attendance.status == 'حاضر'
-    ).count()
+    present_today = status_counts(today, statuses=['حاضر']).get('حاضر', 0)
     
     # آخر طلبات الإجازات
-    recent_leaves = LeaveRequest.query.order_by(LeaveRequest.created_at.desc()).limit(10).all()
+    recent_leaves = LeaveRequest.query.options(*leave_request_options()).order_by(LeaveRequest.created_at.desc()).limit(10).all()
     
     return render_template('admin/dashboard.html',
                          total_employees=total_employees,
@@ -84,8 +68,9 @@ def supervisors():
     supervisors_list = User.query.filter(
         User.role.in_([Role.MAIN_SUPERVISOR, Role.SUB_SUPERVISOR])
     ).all()
+    counts = subordinate_counts([s.id for s in supervisors_list], role=None)
     
-    return render_template('admin/supervisors.html', supervisors=supervisors_list)
+    return render_template('admin/supervisors.html', supervisors=supervisors_list, subordinate_counts=counts)
 
 # إضافة مشرف جديد
 @admin_bp.route('/supervisors/add', methods=['GET', 'POST'])
@@ -123,10 +108,12 @@ def add_supervisor():
         supervisor.set_password(password)
         
         db.session.add(supervisor)
-        db.session.commit()
+        db.session.flush()
         
+        mark_data_changed('users')
         # تسجيل النشاط
         log_activity('إضافة', 'مشرف', supervisor.id, f'تم إضافة المشرف: {supervisor.name}')
+        db.session.commit()
         
         flash('تم إضافة المشرف بنجاح', 'success')
         return redirect(url_for('admin.supervisors'))
@@ -146,7 +133,7 @@ def employees():
     department_filter = request.args.get('department', '')
     name_filter = request.args.get('name', '')
     
-    query = User.query.filter_by(role=Role.EMPLOYEE)
+    query = User.query.options(*employee_options()).filter_by(role=Role.EMPLOYEE)
     
     if gender_filter:
         query = query.filter_by(gender=gender_filter)
@@ -196,10 +183,12 @@ def add_employee():
         employee.set_password(national_id)
         
         db.session.add(employee)
-        db.session.commit()
+        db.session.flush()
         
+        mark_data_changed('users')
         # تسجيل النشاط
         log_activity('إضافة', 'موظف', employee.id, f'تم إضافة الموظف: {employee.name}')
+        db.session.commit()
         
         flash('تم إضافة الموظف بنجاح', 'success')
         return redirect(url_for('admin.employees'))
@@ -220,7 +209,11 @@ def edit_employee(employee_id):
         employee.name = request.form.get('name')
         employee.national_id = request.form.get('national_id')
         employee.gender = request.form.get('gender')
-        employee.department = request.form.get('department')
+        department = request.form.get('department')
+        if department != employee.department:
+            # نقل حضور الموظف في ملخص الحضور إلى القسم الجديد
+            with reattribute_attendance([employee.id]):
+                employee.department = department
         
         shift_start = request.form.get('shift_start')
         shift_end = request.form.get('shift_end')
@@ -231,10 +224,10 @@ def edit_employee(employee_id):
         if password:
             employee.set_password(password)
         
-        db.session.commit()
-        
+        mark_data_changed('users')
         # تسجيل النشاط
         log_activity('تعديل', 'موظف', employee.id, f'تم تعديل معلومات الموظف: {employee.name}')
+        db.session.commit()
         
         flash('تم تعديل الموظف بنجاح', 'success')
         return redirect(url_for('admin.employees'))
@@ -262,18 +255,12 @@ def delete_employee(employee_id):
     try:
         employee_name = employee.name
         
-        # حذف السجلات المرتبطة
-        Attendance.query.filter_by(employee_id=employee.id).delete()
-        LeaveRequest.query.filter_by(employee_id=employee.id).delete()
-        Schedule.query.filter_by(employee_id=employee.id).delete()
-        Notification.query.filter_by(user_id=employee.id).delete()
-        
-        # حذف الموظف
-        db.session.delete(employee)
-        db.session.commit()
+        # حذف الموظف مع السجلات المرتبطة
+        delete_users(User.id == employee.id)
         
         # تسجيل النشاط
         log_activity('حذف', 'موظف', employee_id, f'تم حذف الموظف: {employee_name}')
+        db.session.commit()
         
         flash(f'تم حذف الموظف {employee_name} بنجاح', 'success')
         return jsonify({'success': True})
@@ -297,21 +284,12 @@ def delete_supervisor(supervisor_id):
     try:
         supervisor_name = supervisor.name
         
-        # إلغاء إسناد الموظفين التابعين له
-        subordinates = User.query.filter_by(supervisor_id=supervisor.id).all()
-        for emp in subordinates:
-            emp.supervisor_id = None
-        
-        # حذف السجلات المرتبطة
-        Notification.query.filter_by(user_id=supervisor.id).delete()
-        Schedule.query.filter_by(created_by=supervisor.id).delete()
-        
-        # حذف المشرف
-        db.session.delete(supervisor)
-        db.session.commit()
+        # حذف المشرف مع السجلات المرتبطة وإلغاء إسناد الموظفين التابعين له
+        delete_users(User.id == supervisor.id)
         
         # تسجيل النشاط
         log_activity('حذف', 'مشرف', supervisor_id, f'تم حذف المشرف: {supervisor_name}')
+        db.session.commit()
         
         flash(f'تم حذف المشرف {supervisor_name} بنجاح', 'success')
         return jsonify({'success': True})
@@ -334,17 +312,21 @@ def edit_supervisor(supervisor_id):
         supervisor.name = request.form.get('name')
         supervisor.national_id = request.form.get('national_id')
         supervisor.gender = request.form.get('gender')
-        supervisor.department = request.form.get('department')
+        department = request.form.get('department')
+        if department != supervisor.department:
+            # نقل حضور المشرف في ملخص الحضور إلى القسم الجديد
+            with reattribute_attendance([supervisor.id]):
+                supervisor.department = department
         supervisor.role = request.form.get('role')
         
         password = request.form.get('password')
         if password:
             supervisor.set_password(password)
         
-        db.session.commit()
-        
+        mark_data_changed('users')
         # تسجيل النشاط
         log_activity('تعديل', 'مشرف', supervisor.id, f'تم تعديل معلومات المشرف: {supervisor.name}')
+        db.session.commit()
         
         flash('تم تعديل المشرف بنجاح', 'success')
         return redirect(url_for('admin.supervisors'))
@@ -370,63 +352,12 @@ def upload_employees():
             return redirect(url_for('admin.upload_employees'))
         
         if file and file.filename.endswith(('.xlsx', '.xls')):
-            try:
-                wb = openpyxl.load_workbook(file)
-                sheet = wb.active
-                
-                added_count = 0
-                skipped_count = 0
-                
-                for row in sheet.iter_rows(min_row=2, values_only=True):
-                    # التحقق من وجود بيانات
-                    if not row or not row[0]:
-                        continue
-                    
-                    # قراءة البيانات بالترتيب الصحيح (حسب الصورة)
-                    name = str(row[0]).strip() if row[0] else ''  # الاسم
-                    national_id = str(row[1]).strip() if row[1] else ''  # الهوية
-                    period = str(row[2]).strip() if row[2] else ''  # الفترة
-                    work_time = str(row[3]).strip() if row[3] else ''  # الوقت
-                    rest_days = str(row[4]).strip() if row[4] else ''  # أيام الراحة
-                    department = str(row[5]).strip() if len(row) > 5 and row[5] else 'الحلقات'  # القسم
-                    gender = str(row[6]).strip() if len(row) > 6 and row[6] else 'ذكر'  # الجنس
-                    
-                    # التحقق من وجود الموظف
-                    existing = User.query.filter_by(national_id=national_id).first()
-                    if existing:
-                        # تحديث معلومات الجدول للموظف الموجود
-                        existing.period = period
-                        existing.work_time = work_time
-                        existing.rest_days = rest_days
-                        existing.department = department
-                        existing.gender = gender
-                        skipped_count += 1
-                        continue
-                    
-                    employee = User(
-                        national_id=national_id,
-                        name=name,
-                        role=Role.EMPLOYEE,
-                        gender=gender,
-                        department=department,
-                        period=period,
-                        work_time=work_time,
-                        rest_days=rest_days
-                    )
-                    employee.set_password(national_id)
-                    
-                    db.session.add(employee)
-                    added_count += 1
-                
-                db.session.commit()
-                flash(f'تم إضافة {added_count} موظف. تم تخطي {skipped_count} موظف موجود مسبقاً', 'success')
-                
-            except Exception as e:
-                flash(f'حدث خطأ أثناء قراءة الملف: {str(e)}', 'danger')
-        else:
-            flash('نوع الملف غير مدعوم. الرجاء رفع ملف Excel', 'danger')
+            # الاستيراد ينفذ في الخلفية وتتابع الصفحة حالته
+            job = submit_job('employees_import', {}, current_user.id, upload=file)
+            return redirect(url_for('jobs.view', job_id=job.id))
         
-        return redirect(url_for('admin.employees'))
+        flash('نوع الملف غير مدعوم. الرجاء رفع ملف Excel', 'danger')
+        return redirect(url_for('admin.upload_employees'))
     
     return render_template('admin/upload_employees.html')
 
@@ -466,25 +397,21 @@ def assign_employees():
         flash('ليس لديك صلاحية للوصول إلى هذه الصفحة', 'danger')
         return redirect(url_for('index'))
     
-    supervisors = User.query.filter(
-        User.role.in_([Role.MAIN_SUPERVISOR, Role.SUB_SUPERVISOR])
-    ).all()
-    
-    employees = User.query.filter_by(role=Role.EMPLOYEE).all()
-    
     if request.method == 'POST':
         supervisor_id = request.form.get('supervisor_id', type=int)
-        employee_ids = request.form.getlist('employee_ids')
-        
-        for emp_id in employee_ids:
-            employee = User.query.get(int(emp_id))
-            if employee:
-                employee.supervisor_id = supervisor_id
+        employee_ids = request.form.getlist('employee_ids', type=int)
         
+        assigned = assign_employees_to(employee_ids, supervisor_id)
         db.session.commit()
-        flash('تم إسناد الموظفين بنجاح', 'success')
+        flash(f'تم إسناد {assigned} موظف بنجاح', 'success')
         return redirect(url_for('admin.assign_employees'))
     
+    supervisors = User.query.filter(
+        User.role.in_([Role.MAIN_SUPERVISOR, Role.SUB_SUPERVISOR])
+    ).all()
+    
+    employees = User.query.options(*employee_options()).filter_by(role=Role.EMPLOYEE).all()
+    
     return render_template('admin/assign_employees.html', 
                          supervisors=supervisors,
                          employees=employees)
@@ -520,6 +447,7 @@ def add_leave_type():
     )
     
     db.session.add(leave_type)
+    mark_data_changed('leave_types')
     db.session.commit()
     
     flash('تم إضافة نوع الإجازة بنجاح', 'success')
@@ -540,6 +468,7 @@ def edit_leave_type(leave_type_id):
     leave_type.deduct_from_balance = request.form.get('deduct_from_balance') == 'on'
     leave_type.is_active = request.form.get('is_active') == 'on'
     
+    mark_data_changed('leave_types')
     db.session.commit()
     
     flash('تم تعديل نوع الإجازة بنجاح', 'success')
@@ -560,6 +489,7 @@ def delete_leave_type(leave_type_id):
         return redirect(url_for('admin.leave_types'))
     
     db.session.delete(leave_type)
+    mark_data_changed('leave_types')
     db.session.commit()
     
     flash('تم حذف نوع الإجازة بنجاح', 'success')
@@ -587,11 +517,23 @@ def settings():
         system_settings.attachment_retention_days = request.form.get('attachment_retention_days', type=int)
         
         db.session.commit()
+        bump_settings_version()
         flash('تم تحديث الإعدادات بنجاح', 'success')
         return redirect(url_for('admin.settings'))
     
     return render_template('admin/settings.html', settings=system_settings)
 
+# حذف المرفقات المنتهية فوراً (يتم أيضاً دورياً بـ sweep_attachments.py)
+@admin_bp.route('/settings/sweep-attachments', methods=['POST'])
+@login_required
+def sweep_attachments_now():
+    if current_user.role != Role.MAIN_ADMIN:
+        flash('هذه الصفحة متاحة فقط لمدير النظام الأساسي', 'danger')
+        return redirect(url_for('index'))
+    
+    job = submit_job('attachments_sweep', {}, current_user.id)
+    return redirect(url_for('jobs.view', job_id=job.id))
+
 # التقارير
 @admin_bp.route('/reports')
 @login_required
@@ -614,7 +556,7 @@ def report_leaves():
     end_date = request.args.get('end_date')
     status = request.args.get('status')
     
-    query = LeaveRequest.query
+    query = LeaveRequest.query.options(*leave_request_options())
     
     if start_date:
         query = query.filter(LeaveRequest.start_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
@@ -623,9 +565,14 @@ def report_leaves():
     if status:
         query = query.filter(LeaveRequest.status == status)
     
-    leaves = query.order_by(LeaveRequest.created_at.desc()).all()
+    total = query.order_by(None).count()
+    page = keyset_paginate(query, [LeaveRequest.created_at, LeaveRequest.id],
+                           after=request.args.get('after'),
+                           per_page=current_app.config['LIST_PAGE_SIZE'])
+    filter_args = {k: v for k, v in request.args.items() if k != 'after'}
     
-    return render_template('admin/report_leaves.html', leaves=leaves)
+    return render_template('admin/report_leaves.html', leaves=page.items, page=page,
+                           total=total, filter_args=filter_args)
 
 # تقرير الحضور
 @admin_bp.route('/reports/attendance')
@@ -639,7 +586,7 @@ def report_attendance():
     end_date = request.args.get('end_date')
     employee_id = request.args.get('employee_id', type=int)
     
-    query = Attendance.query
+    query = Attendance.query.options(*attendance_options())
     
     if start_date:
         query = query.filter(Attendance.date >= datetime.strptime(start_date, '%Y-%m-%d').date())
@@ -648,10 +595,15 @@ def report_attendance():
     if employee_id:
         query = query.filter(Attendance.employee_id == employee_id)
     
-    records = query.order_by(Attendance.date.desc()).all()
+    total = query.order_by(None).count()
+    page = keyset_paginate(query, [Attendance.date, Attendance.id],
+                           after=request.args.get('after'),
+                           per_page=current_app.config['LIST_PAGE_SIZE'])
+    filter_args = {k: v for k, v in request.args.items() if k != 'after'}
     employees = User.query.filter_by(role=Role.EMPLOYEE).all()
     
-    return render_template('admin/report_attendance.html', records=records, employees=employees)
+    return render_template('admin/report_attendance.html', records=page.items, page=page,
+                           total=total, filter_args=filter_args, employees=employees)
 
 # تخصيص المظهر (الألوان والشعار)
 @admin_bp.route('/customize', methods=['GET', 'POST'])
@@ -686,6 +638,7 @@ def customize():
                 settings.logo_path = filename  # نحفظ اسم الملف فقط
         
         db.session.commit()
+        bump_settings_version()
         flash('تم تحديث التخصيصات بنجاح', 'success')
         return redirect(url_for('admin.customize'))
     
@@ -699,94 +652,8 @@ def report_leaves_pdf():
         flash('ليس لديك صلاحية للوصول إلى هذه الصفحة', 'danger')
         return redirect(url_for('index'))
     
-    # جلب البيانات
-    employee_id = request.args.get('employee_id', type=int)
-    leave_type_id = request.args.get('leave_type_id', type=int)
-    status = request.args.get('status')
-    
-    # تحديد الـ join بشكل صريح لتجنب AmbiguousForeignKeysError
-    query = LeaveRequest.query.join(User, LeaveRequest.employee_id == User.id).join(LeaveType)
-    
-    if employee_id:
-        query = query.filter(LeaveRequest.employee_id == employee_id)
-    if leave_type_id:
-        query = query.filter(LeaveRequest.leave_type_id == leave_type_id)
-    if status:
-        query = query.filter(LeaveRequest.status == status)
-    
-    leaves = query.order_by(LeaveRequest.created_at.desc()).all()
-    
-    # إنشاء PDF مع دعم العربية
-    from reportlab.pdfbase.pdfmetrics import registerFont
-    from reportlab.pdfbase.ttfonts import TTFont
-    from arabic_reshaper import reshape
-    from bidi.algorithm import get_display
-    
-    # تسجيل خط عربي (استخدام Arial Unicode MS)
-    try:
-        registerFont(TTFont('Arabic', 'C:/Windows/Fonts/arial.ttf'))
-        arabic_font = 'Arabic'
-    except:
-        # إذا فشل، نستخدم الخط الافتراضي
-        arabic_font = 'Helvetica'
-    
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
-    
-    elements = []
-    
-    # العنوان بالعربية
-    title_text = 'تقرير الإجازات'
-    reshaped_title = reshape(title_text)
-    bidi_title = get_display(reshaped_title)
-    
-    title_style = ParagraphStyle(
-        'TitleStyle',
-        fontSize=18,
-        alignment=TA_CENTER,
-        spaceAfter=20,
-        fontName=arabic_font
-    )
-    elements.append(Paragraph(bidi_title, title_style))
-    elements.append(Spacer(1, 20))
-    
-    # الجدول
-    def arabic_text(text):
-        """تحويل النص العربي للعرض الصحيح"""
-        reshaped = reshape(text)
-        return get_display(reshaped)
-    
-    headers = ['الموظف', 'نوع الإجازة', 'من تاريخ', 'إلى تاريخ', 'الأيام', 'الحالة']
-    data = [[arabic_text(h) for h in headers]]
-    
-    for leave in leaves:
-        data.append([
-            arabic_text(leave.employee.name),
-            arabic_text(leave.leave_type.name),
-            leave.start_date.strftime('%Y-%m-%d'),
-            leave.end_date.strftime('%Y-%m-%d'),
-            str(leave.days_count),
-            arabic_text(leave.status)
-        ])
-    
-    table = Table(data, colWidths=[4*cm, 3*cm, 2.5*cm, 2.5*cm, 2*cm, 2.5*cm])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0d7377')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), arabic_font),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
-    
-    buffer.seek(0)
-    return send_file(buffer, as_attachment=True, download_name=f'leaves_report_{datetime.now().strftime("%Y%m%d")}.pdf', mimetype='application/pdf')
+    buffer, download_name = build_report('leaves_pdf', request.args)
+    return send_file(buffer, as_attachment=True, download_name=download_name, mimetype='application/pdf')
 
 # طباعة تقرير الحضور PDF
 @admin_bp.route('/reports/attendance/pdf')
@@ -796,90 +663,21 @@ def report_attendance_pdf():
         flash('ليس لديك صلاحية للوصول إلى هذه الصفحة', 'danger')
         return redirect(url_for('index'))
     
-    # جلب البيانات
-    employee_id = request.args.get('employee_id', type=int)
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    query = Attendance.query.join(User, Attendance.employee_id == User.id)
-    
-    if start_date:
-        query = query.filter(Attendance.date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        query = query.filter(Attendance.date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-    if employee_id:
-        query = query.filter(Attendance.employee_id == employee_id)
-    
-    records = query.order_by(Attendance.date.desc()).all()
-    
-    # إنشاء PDF مع دعم العربية
-    from reportlab.pdfbase.pdfmetrics import registerFont
-    from reportlab.pdfbase.ttfonts import TTFont
-    from arabic_reshaper import reshape
-    from bidi.algorithm import get_display
+    buffer, download_name = build_report('attendance_pdf', request.args)
+    return send_file(buffer, as_attachment=True, download_name=download_name, mimetype='application/pdf')
+
+# تصدير التقارير Excel / CSV
+@admin_bp.route('/export/<name>.<file_format>')
+@login_required
+def export_report(name, file_format):
+    if not admin_required():
+        flash('ليس لديك صلاحية للوصول إلى هذه الصفحة', 'danger')
+        return redirect(url_for('index'))
     
-    # تسجيل خط عربي
-    try:
-        registerFont(TTFont('Arabic', 'C:/Windows/Fonts/arial.ttf'))
-        arabic_font = 'Arabic'
-    except:
-        arabic_font = 'Helvetica'
-    
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
-    
-    elements = []
-    
-    # العنوان بالعربية
-    title_text = 'تقرير الحضور والغياب'
-    reshaped_title = reshape(title_text)
-    bidi_title = get_display(reshaped_title)
-    
-    title_style = ParagraphStyle(
-        'TitleStyle',
-        fontSize=18,
-        alignment=TA_CENTER,
-        spaceAfter=20,
-        fontName=arabic_font
-    )
-    elements.append(Paragraph(bidi_title, title_style))
-    elements.append(Spacer(1, 20))
-    
-    # الجدول
-    def arabic_text(text):
-        """تحويل النص العربي للعرض الصحيح"""
-        reshaped = reshape(text)
-        return get_display(reshaped)
-    
-    headers = ['الموظف', 'التاريخ', 'الحالة', 'الملاحظات']
-    data = [[arabic_text(h) for h in headers]]
-    
-    for record in records:
-        data.append([
-            arabic_text(record.employee.name),
-            record.date.strftime('%Y-%m-%d'),
-            arabic_text(record.status),
-            arabic_text(record.notes) if record.notes else '-'
-        ])
-    
-    table = Table(data, colWidths=[5*cm, 3*cm, 3*cm, 5*cm])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0d7377')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), arabic_font),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
-    
-    buffer.seek(0)
-    return send_file(buffer, as_attachment=True, download_name=f'attendance_report_{datetime.now().strftime("%Y%m%d")}.pdf', mimetype='application/pdf')
+    response = export_response(name, file_format, request.args)
+    if response is None:
+        abort(404)
+    return response
 
 # حذف بيانات الاختبار (مدير أساسي فقط)
 @admin_bp.route('/delete-test-data', methods=['POST'])
@@ -889,34 +687,9 @@ def delete_test_data_route():
         flash('ليس لديك صلاحية لهذه العملية', 'danger')
         return redirect(url_for('admin.dashboard'))
     
-    try:
-        # حذف سجلات الحضور للموظفين التجريبيين
-        test_employees = User.query.filter(
-            User.national_id.like('4000%') | User.national_id.like('5000%')
-        ).all()
-        
-        for emp in test_employees:
-            Attendance.query.filter_by(employee_id=emp.id).delete()
-            LeaveRequest.query.filter_by(employee_id=emp.id).delete()
-            Schedule.query.filter_by(employee_id=emp.id).delete()
-        
-        # حذف المستخدمين التجريبيين
-        User.query.filter(
-            User.national_id.like('4000%') | User.national_id.like('5000%')
-        ).delete(synchronize_session=False)
-        
-        User.query.filter(
-            User.national_id.like('2000%') | User.national_id.like('3000%')
-        ).delete(synchronize_session=False)
-        
-        db.session.commit()
-        flash('تم حذف بيانات الاختبار بنجاح', 'success')
-        
-    except Exception as e:
-        db.session.rollback()
-        flash(f'حدث خطأ: {str(e)}', 'danger')
-    
-    return redirect(url_for('admin.dashboard'))
+    # الحذف يتم كمهمة خلفية على دفعات
+    job = submit_job('users_delete', {'scope': 'test_data'}, current_user.id)
+    return redirect(url_for('jobs.view', job_id=job.id))
 
 # عرض طلبات الإجازات للإدارة
 @admin_bp.route('/leave-requests')
@@ -929,14 +702,16 @@ def leave_requests():
     # جلب جميع طلبات الإجازات
     status_filter = request.args.get('status', 'قيد الانتظار')
     
-    query = LeaveRequest.query.join(User, LeaveRequest.employee_id == User.id).join(LeaveType)
+    query = LeaveRequest.query.options(*leave_request_options()).join(User, LeaveRequest.employee_id == User.id).join(LeaveType)
     
     if status_filter and status_filter != 'all':
         query = query.filter(LeaveRequest.status == status_filter)
     
-    requests = query.order_by(LeaveRequest.created_at.desc()).all()
+    page = keyset_paginate(query, [LeaveRequest.created_at, LeaveRequest.id],
+                           after=request.args.get('after'),
+                           per_page=current_app.config['LIST_PAGE_SIZE'])
     
-    return render_template('admin/leave_requests.html', requests=requests, status_filter=status_filter)
+    return render_template('admin/leave_requests.html', requests=page.items, page=page, status_filter=status_filter)
 
 # مراجعة طلب إجازة (قبول/رفض)
 @admin_bp.route('/review-leave/<int:request_id>', methods=['POST'])
@@ -951,7 +726,7 @@ def review_leave(request_id):
     notes = request.form.get('notes', '')
     
     if action == 'approve':
-        leave_request.status = 'مقبول'
+        set_leave_status(leave_request, 'مقبول')
         leave_request.reviewed_by = current_user.id
         leave_request.reviewed_at = datetime.now()
         leave_request.review_notes = notes
@@ -967,7 +742,7 @@ def review_leave(request_id):
         
         flash('تم قبول طلب الإجازة بنجاح', 'success')
     elif action == 'reject':
-        leave_request.status = 'مرفوض'
+        set_leave_status(leave_request, 'مرفوض')
         leave_request.reviewed_by = current_user.id
         leave_request.reviewed_at = datetime.now()
         leave_request.review_notes = notes
@@ -1027,31 +802,9 @@ def delete_all_employees():
         flash('ليس لديك صلاحية لهذه العملية', 'danger')
         return redirect(url_for('admin.schedules_table'))
     
-    try:
-        # حذف جميع سجلات المعلمين
-        employees = User.query.filter_by(role=Role.EMPLOYEE).all()
-        
-        for emp in employees:
-            # حذف السجلات المرتبطة
-            Attendance.query.filter_by(employee_id=emp.id).delete()
-            LeaveRequest.query.filter_by(employee_id=emp.id).delete()
-            Schedule.query.filter_by(employee_id=emp.id).delete()
-            
-            # حذف الإشعارات المرتبطة
-            from models import Notification
-            Notification.query.filter_by(user_id=emp.id).delete()
-            
-            # حذف الموظف
-            db.session.delete(emp)
-        
-        db.session.commit()
-        flash(f'تم حذف جميع بيانات المعلمين بنجاح ({len(employees)} معلم)', 'success')
-        
-    except Exception as e:
-        db.session.rollback()
-        flash(f'حدث خطأ: {str(e)}', 'danger')
-    
-    return redirect(url_for('admin.schedules_table'))
+    # الحذف يتم كمهمة خلفية على دفعات
+    job = submit_job('users_delete', {'scope': 'all_employees'}, current_user.id)
+    return redirect(url_for('jobs.view', job_id=job.id))
 
 # صفحة إعدادات الحساب
 @admin_bp.route('/account-settings', methods=['GET', 'POST'])
@@ -1088,6 +841,8 @@ def account_settings():
             # تغيير كلمة السر
             current_user.set_password(new_password)
             db.session.commit()
+            # تحديث ختم الأمان في جلسة المستخدم الحالي
+            login_user(current_user._get_current_object(), remember=True)
             flash('تم تغيير كلمة السر بنجاح', 'success')
             return redirect(url_for('admin.account_settings'))
         
@@ -1115,7 +870,9 @@ def account_settings():
             # تغيير رقم الهوية
             old_id = current_user.national_id
             current_user.national_id = new_national_id
+            mark_data_changed('users')
             db.session.commit()
+            login_user(current_user._get_current_object(), remember=True)
             flash(f'تم تغيير رقم الهوية من {old_id} إلى {new_national_id}', 'success')
             return redirect(url_for('admin.account_settings'))
     
@@ -1158,10 +915,12 @@ def add_system_admin():
     admin.set_password(password)
     
     db.session.add(admin)
-    db.session.commit()
+    db.session.flush()
     
+    mark_data_changed('users')
     # تسجيل النشاط
     log_activity('إضافة', 'مدير نظام', admin.id, f'تم إضافة مدير نظام: {admin.name}')
+    db.session.commit()
     
     return jsonify({'success': True, 'message': 'تم إضافة مدير النظام بنجاح'})
 
@@ -1182,10 +941,10 @@ def edit_system_admin(admin_id):
     if password:
         admin.set_password(password)
     
-    db.session.commit()
-    
+    mark_data_changed('users')
     # تسجيل النشاط
     log_activity('تعديل', 'مدير نظام', admin.id, f'تم تعديل معلومات مدير النظام: {admin.name}')
+    db.session.commit()
     
     return jsonify({'success': True, 'message': 'تم تعديل مدير النظام بنجاح'})
 
@@ -1207,10 +966,11 @@ def delete_system_admin(admin_id):
     
     admin_name = admin.name
     db.session.delete(admin)
-    db.session.commit()
     
+    mark_data_changed('users')
     # تسجيل النشاط
     log_activity('حذف', 'مدير نظام', admin_id, f'تم حذف مدير النظام: {admin_name}')
+    db.session.commit()
     
     return jsonify({'success': True, 'message': f'تم حذف مدير النظام {admin_name} بنجاح'})
 
@@ -1228,26 +988,55 @@ def activity_logs():
     user_id_filter = request.args.get('user_id', type=int)
     date_from = request.args.get('date_from')
     date_to = request.args.get('date_to')
+    archive_month = request.args.get('archive_month')
     
-    query = ActivityLog.query.join(User, ActivityLog.user_id == User.id)
-    
-    if action_filter:
-        query = query.filter(ActivityLog.action == action_filter)
-    if target_type_filter:
-        query = query.filter(ActivityLog.target_type == target_type_filter)
-    if user_id_filter:
-        query = query.filter(ActivityLog.user_id == user_id_filter)
-    if date_from:
-        query = query.filter(ActivityLog.created_at >= datetime.strptime(date_from, '%Y-%m-%d'))
-    if date_to:
-        query = query.filter(ActivityLog.created_at <= datetime.strptime(date_to, '%Y-%m-%d'))
-    
-    logs = query.order_by(ActivityLog.created_at.desc()).paginate(page=request.args.get('page', 1, type=int), per_page=50)
+    try:
+        date_from = datetime.strptime(date_from, '%Y-%m-%d') if date_from else None
+        date_to = datetime.strptime(date_to, '%Y-%m-%d') if date_to else None
+    except ValueError:
+        date_from = date_to = None
+    
+    if archive_month:
+        # البحث في ملف الشهر المؤرشف
+        page = search_archive(archive_month, {
+            'action': action_filter, 'target_type': target_type_filter, 'user_id': user_id_filter,
+            'date_from': date_from, 'date_to': date_to
+        }, after=request.args.get('after'), per_page=current_app.config['LIST_PAGE_SIZE'])
+    else:
+        query = ActivityLog.query.options(*activity_log_options()).join(User, ActivityLog.user_id == User.id)
+        
+        if action_filter:
+            query = query.filter(ActivityLog.action == action_filter)
+        if target_type_filter:
+            query = query.filter(ActivityLog.target_type == target_type_filter)
+        if user_id_filter:
+            query = query.filter(ActivityLog.user_id == user_id_filter)
+        if date_from:
+            query = query.filter(ActivityLog.created_at >= date_from)
+        if date_to:
+            query = query.filter(ActivityLog.created_at <= date_to)
+        
+        page = keyset_paginate(query, [ActivityLog.created_at, ActivityLog.id],
+                               after=request.args.get('after'),
+                               per_page=current_app.config['LIST_PAGE_SIZE'])
     
     # قائمة المستخدمين للفلتر
     users = User.query.filter(User.role.in_([Role.MAIN_ADMIN, Role.SUB_ADMIN])).all()
     
-    return render_template('admin/activity_logs.html', logs=logs, users=users)
+    filters = {key: value for key, value in request.args.items() if key != 'after' and value}
+    return render_template('admin/activity_logs.html', logs=page.items, page=page, users=users,
+                           archived_months=archived_months(), filters=filters)
+
+# أرشفة سجل النشاطات القديمة (مدير أساسي فقط)
+@admin_bp.route('/activity-logs/archive', methods=['POST'])
+@login_required
+def archive_activity_logs():
+    if current_user.role != Role.MAIN_ADMIN:
+        flash('ليس لديك صلاحية لهذه العملية', 'danger')
+        return redirect(url_for('admin.activity_logs'))
+    
+    job = submit_job('activity_archive', {}, current_user.id)
+    return redirect(url_for('jobs.view', job_id=job.id))
 
 # إدارة حالات الغياب
 @admin_bp.route('/absence-statuses')
@@ -1283,10 +1072,11 @@ def add_absence_status():
     )
     
     db.session.add(status)
-    db.session.commit()
+    db.session.flush()
     
     # تسجيل النشاط
     log_activity('إضافة', 'حالة غياب', status.id, f'تم إضافة حالة غياب: {status.name}')
+    db.session.commit()
     
     return jsonify({'success': True})
 
@@ -1304,10 +1094,9 @@ def edit_absence_status(status_id):
     status.is_counted_as_absent = request.form.get('is_counted_as_absent') == 'on'
     status.is_active = request.form.get('is_active') == 'on'
     
-    db.session.commit()
-    
     # تسجيل النشاط
     log_activity('تعديل', 'حالة غياب', status.id, f'تم تعديل حالة الغياب: {status.name}')
+    db.session.commit()
     
     return jsonify({'success': True})
 
@@ -1326,10 +1115,10 @@ def delete_absence_status(status_id):
     
     status_name = status.name
     db.session.delete(status)
-    db.session.commit()
     
     # تسجيل النشاط
     log_activity('حذف', 'حالة غياب', status_id, f'تم حذف حالة الغياب: {status_name}')
+    db.session.commit()
     
     return jsonify({'success': True})
 
@@ -1360,14 +1149,17 @@ def attendance_management():
     if period_filter:
         query = query.filter_by(period=period_filter)
     
-    employees = query.order_by(User.name).all()
+    # تقسيم الموظفين على صفحات حتى تبقى تكلفة الصفحة ثابتة مهما زاد العدد
+    pagination = query.order_by(User.name, User.id).paginate(
+        page=request.args.get('page', 1, type=int),
+        per_page=current_app.config['ATTENDANCE_PAGE_SIZE'],
+        error_out=False
+    )
+    employees = pagination.items
     
-    # جلب سجلات الحضور لهذا اليوم
+    # جلب سجلات الحضور لهذا اليوم باستعلام واحد لموظفي الصفحة
     date_obj = datetime.strptime(date_filter, '%Y-%m-%d').date()
-    attendance_records = {}
-    for emp in employees:
-        record = Attendance.query.filter_by(employee_id=emp.id, date=date_obj).first()
-        attendance_records[emp.id] = record
+    attendance_records = load_day_attendance(date_obj, [emp.id for emp in employees])
     
     # جلب حالات الغياب
     absence_statuses = AbsenceStatus.query.filter_by(is_active=True).all()
@@ -1379,8 +1171,14 @@ def attendance_management():
     periods = db.session.query(User.period).filter_by(role=Role.EMPLOYEE).distinct().all()
     periods = [p[0] for p in periods if p[0]]
     
+    # معاملات الفلاتر لروابط الصفحات
+    filter_args = {k: v for k, v in request.args.items() if k != 'page'}
+    filter_args['date'] = date_filter
+    
     return render_template('admin/attendance_management.html',
                          employees=employees,
+                         pagination=pagination,
+                         filter_args=filter_args,
                          attendance_records=attendance_records,
                          absence_statuses=absence_statuses,
                          date_filter=date_filter,
@@ -1394,44 +1192,96 @@ def mark_attendance():
     if not admin_required():
         return jsonify({'success': False}), 403
     
-    data = request.get_json()
+    data = request.get_json() or {}
     employee_id = data.get('employee_id')
     date_str = data.get('date')
     status = data.get('status')
-    absence_status_id = data.get('absence_status_id')
-    notes = data.get('notes', '')
     
-    date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
+    employee = User.query.get(employee_id) if employee_id else None
+    if not employee:
+        return jsonify({'success': False, 'message': 'الموظف غير موجود'}), 404
     
-    # البحث عن سجل موجود
-    record = Attendance.query.filter_by(employee_id=employee_id, date=date_obj).first()
+    try:
+        date_obj = datetime.strptime(date_str or '', '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'تاريخ غير صحيح'}), 400
     
-    if record:
-        # تحديث السجل
-        record.status = status
-        record.absence_status_id = absence_status_id
-        record.notes = notes
-        record.recorded_by = current_user.id
-    else:
-        # إنشاء سجل جديد
-        record = Attendance(
-            employee_id=employee_id,
-            date=date_obj,
-            status=status,
-            absence_status_id=absence_status_id,
-            notes=notes,
-            recorded_by=current_user.id
-        )
-        db.session.add(record)
+    results = save_attendance_batch([{
+        'employee_id': employee.id,
+        'date': date_obj,
+        'status': status,
+        'absence_status_id': data.get('absence_status_id'),
+        'notes': data.get('notes', '')
+    }], recorded_by=current_user.id)
     
-    db.session.commit()
+    if results[0]['result'] == 'invalid':
+        return jsonify({'success': False, 'message': 'حالة الحضور مطلوبة'}), 400
     
     # تسجيل النشاط
-    employee = User.query.get(employee_id)
-    log_activity('تحديث حضور', 'موظف', employee_id, f'تم تحديث حضور {employee.name} بتاريخ {date_str}: {status}')
+    log_activity('تحديث حضور', 'موظف', employee.id, f'تم تحديث حضور {employee.name} بتاريخ {date_str}: {status}')
+    db.session.commit()
     
     return jsonify({'success': True})
 
+# تسجيل الحضور/الغياب لعدة موظفين في طلب واحد
+@admin_bp.route('/mark-attendance/batch', methods=['POST'])
+@login_required
+def mark_attendance_batch():
+    if not admin_required():
+        return jsonify({'success': False}), 403
+    
+    data = request.get_json() or {}
+    try:
+        date_obj = datetime.strptime(data.get('date') or '', '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'تاريخ غير صحيح'}), 400
+    
+    records = data.get('records') or []
+    if not isinstance(records, list):
+        return jsonify({'success': False, 'message': 'قائمة السجلات غير صحيحة'}), 400
+    # العنصر الذي ليس سجلاً يحفظ كسجل فارغ فيرجع invalid
+    records = [r if isinstance(r, dict) else {} for r in records]
+    
+    # التحقق من وجود الموظفين باستعلام واحد
+    requested_ids = {int(r['employee_id']) for r in records if str(r.get('employee_id', '')).isdigit()}
+    valid_ids = set()
+    if requested_ids:
+        valid_ids = {row[0] for row in db.session.query(User.id).filter(
+            User.id.in_(requested_ids), User.role == Role.EMPLOYEE
+        ).all()}
+    
+    entries = []
+    for r in records:
+        employee_id = int(r['employee_id']) if str(r.get('employee_id', '')).isdigit() else None
+        entry = {
+            'employee_id': employee_id if employee_id in valid_ids else None,
+            'date': date_obj,
+            'status': r.get('status'),
+        }
+        # الحقول غير المرسلة تبقى كما هي في السجل المحفوظ
+        for field in ('absence_status_id', 'notes'):
+            if field in r:
+                entry[field] = r[field]
+        entries.append(entry)
+    
+    results = save_attendance_batch(entries, recorded_by=current_user.id)
+    
+    saved = [r for r in results if r['result'] != 'invalid']
+    
+    # تسجيل النشاط
+    if saved:
+        log_activity('تحديث حضور', 'موظف', None, f'تم تحديث حضور {len(saved)} موظف بتاريخ {date_obj}')
+    db.session.commit()
+    
+    return jsonify({
+        'success': True,
+        'saved': len(saved),
+        'results': [
+            {'employee_id': r['employee_id'], 'result': r['result']}
+            for r in results
+        ]
+    })
+
 # تعديل جدول موظف
 @admin_bp.route('/employees/<int:employee_id>/edit-schedule', methods=['GET', 'POST'])
 @login_required
@@ -1447,10 +1297,10 @@ def edit_employee_schedule(employee_id):
         employee.work_time = request.form.get('work_time')
         employee.rest_days = request.form.get('rest_days')
         
-        db.session.commit()
-        
+        mark_data_changed('users')
         # تسجيل النشاط
         log_activity('تعديل جدول', 'موظف', employee.id, f'تم تعديل جدول الموظف: {employee.name}')
+        db.session.commit()
         
         flash('تم تعديل جدول الموظف بنجاح', 'success')
         return redirect(url_for('admin.schedules_table'))
@@ -1465,120 +1315,13 @@ def schedules_table_pdf():
         flash('ليس لديك صلاحية للوصول إلى هذه الصفحة', 'danger')
         return redirect(url_for('index'))
     
-    # الفلاتر
-    gender_filter = request.args.get('gender', '')
-    department_filter = request.args.get('department', '')
-    period_filter = request.args.get('period', '')
-    
-    query = User.query.filter_by(role=Role.EMPLOYEE, is_active=True)
-    
-    if gender_filter:
-        query = query.filter_by(gender=gender_filter)
-    if department_filter:
-        query = query.filter_by(department=department_filter)
-    if period_filter:
-        query = query.filter_by(period=period_filter)
-    
-    # ترتيب حسب الفترة والوقت
-    employees = query.order_by(User.period, User.work_time, User.name).all()
-    
-    # إنشاء PDF مع دعم العربية
-    from reportlab.pdfbase.pdfmetrics import registerFont
-    from reportlab.pdfbase.ttfonts import TTFont
-    from arabic_reshaper import reshape
-    from bidi.algorithm import get_display
-    
-    # تسجيل خط عربي
-    try:
-        registerFont(TTFont('Arabic', 'C:/Windows/Fonts/arial.ttf'))
-        arabic_font = 'Arabic'
-    except:
-        try:
-            registerFont(TTFont('Arabic', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'))
-            arabic_font = 'Arabic'
-        except:
-            arabic_font = 'Helvetica'
-    
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), rightMargin=1.5*cm, leftMargin=1.5*cm, topMargin=2*cm, bottomMargin=2*cm)
-    
-    elements = []
-    
-    # العنوان
-    title_text = 'جدول معلمي الحلقات'
-    reshaped_title = reshape(title_text)
-    bidi_title = get_display(reshaped_title)
-    
-    title_style = ParagraphStyle(
-        'TitleStyle',
-        fontSize=20,
-        alignment=TA_CENTER,
-        spaceAfter=30,
-        fontName=arabic_font
-    )
-    elements.append(Paragraph(bidi_title, title_style))
-    
-    # دالة لتحويل النص العربي
-    def arabic_text(text):
-        if not text:
-            return '-'
-        reshaped = reshape(str(text))
-        return get_display(reshaped)
-    
-    # بيانات الجدول
-    headers = ['م', 'الاسم', 'الفترة', 'الوقت', 'أيام الراحة', 'القسم', 'الجنس']
-    data = [[arabic_text(h) for h in headers]]
-    
-    for idx, emp in enumerate(employees, 1):
-        data.append([
-            str(idx),
-            arabic_text(emp.name),
-            arabic_text(emp.period),
-            arabic_text(emp.work_time),
-            arabic_text(emp.rest_days),
-            arabic_text(emp.department),
-            arabic_text(emp.gender)
-        ])
-    
-    # إنشاء الجدول
-    table = Table(data, colWidths=[1.5*cm, 5*cm, 3*cm, 3*cm, 4*cm, 3*cm, 2.5*cm])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0d7377')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), arabic_font),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('TOPPADDING', (0, 1), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
-    
-    elements.append(table)
-    
-    # التذييل
-    footer_text = f'تاريخ الطباعة: {datetime.now().strftime("%Y-%m-%d %H:%M")}'
-    footer_style = ParagraphStyle(
-        'FooterStyle',
-        fontSize=10,
-        alignment=TA_CENTER,
-        spaceAfter=10,
-        fontName=arabic_font
-    )
-    elements.append(Spacer(1, 20))
-    elements.append(Paragraph(arabic_text(footer_text), footer_style))
-    
-    doc.build(elements)
-    
-    buffer.seek(0)
+    buffer, download_name = build_report('schedules_pdf', request.args)
     
     # تسجيل النشاط
     log_activity('طباعة تقرير', 'جدول', None, f'تم طباعة تقرير جدول المعلمين')
+    db.session.commit()
     
-    return send_file(buffer, as_attachment=True, download_name=f'schedule_table_{datetime.now().strftime("%Y%m%d")}.pdf', mimetype='application/pdf')
+    return send_file(buffer, as_attachment=True, download_name=download_name, mimetype='application/pdf')
 
 # تعديل شهادة للمدير
 @admin_bp.route('/certificates/edit/<int:cert_id>', methods=['POST'])
@@ -1605,10 +1348,9 @@ def edit_certificate(cert_id):
         certificate.updated_by = current_user.id
         certificate.updated_at = datetime.utcnow()
         
-        db.session.commit()
-        
         # تسجيل النشاط
         log_activity('تعديل شهادة', 'certificate', cert_id, f'تم تعديل شهادة الطالب {certificate.student_name}')
+        db.session.commit()
         
         flash('تم تحديث الشهادة بنجاح', 'success')
         
@@ -1645,11 +1387,12 @@ def update_leave_balance(user_id):
         
         old_balance = user.leave_balance
         user.leave_balance = new_balance
-        db.session.commit()
         
         # تسجيل النشاط
         log_activity('تحديث رصيد إجازة', 'user', user_id, 
                     f'تم تحديث رصيد إجازة {user.name} من {old_balance} إلى {new_balance}')
+        mark_data_changed('users')
+        db.session.commit()
         
         return jsonify({
             'success': True,
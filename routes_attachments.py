@@ -0,0 +1,60 @@
+from flask import Blueprint, abort, current_app, send_file
+from flask_login import login_required, current_user
+from sqlalchemy import exists, or_
+from models import db, User, Role, LeaveRequest, Attachment
+from attachment_store import attachment_path, ensure_thumbnail
+
+attachments_bp = Blueprint('attachments', __name__, url_prefix='/attachments')
+
+
+def _can_view(digest):
+    """المدراء يرون كل المرفقات، والموظف مرفقات طلباته، والمشرف مرفقات طلبات موظفيه"""
+    if current_user.role in [Role.MAIN_ADMIN, Role.SUB_ADMIN]:
+        return True
+    return db.session.query(exists().where(
+        LeaveRequest.attachment_digest == digest,
+        LeaveRequest.employee_id == User.id,
+        or_(User.id == current_user.id, User.supervisor_id == current_user.id)
+    )).scalar()
+
+
+def _get_attachment(digest):
+    """المرفق إذا كان للمستخدم الحالي صلاحية عرضه، وإلا 404"""
+    attachment = db.session.get(Attachment, digest)
+    if attachment is None or not _can_view(digest):
+        abort(404)
+    return attachment
+
+
+def _send(path, mimetype, etag):
+    # send_file يرد على If-None-Match بـ 304 وعلى Range بجزء من الملف
+    response = send_file(path, mimetype=mimetype, etag=etag, conditional=True,
+                         max_age=current_app.config['ATTACHMENT_MAX_AGE'])
+    # المرفقات بيانات شخصية: تخزن في متصفح المستخدم فقط وليس في الوسطاء
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.immutable = True
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
+
+
+# عرض مرفق من المخزن - المحتوى لا يتغير تحت نفس البصمة فيخزنه المتصفح دائماً
+@attachments_bp.route('/<digest>')
+@login_required
+def view(digest):
+    attachment = _get_attachment(digest)
+    return _send(attachment_path(digest), attachment.mimetype, digest)
+
+
+# الصورة المصغرة لمرفق صورة (تنشأ عند أول طلب للصور المرفوعة قبل إنشاء المصغرات)
+@attachments_bp.route('/<digest>/thumbnail')
+@login_required
+def thumbnail(digest):
+    attachment = _get_attachment(digest)
+    if not attachment.is_image:
+        abort(404)
+    try:
+        path = ensure_thumbnail(digest)
+    except ValueError:
+        abort(404)
+    return _send(path, 'image/jpeg', f'{digest}-thumb')
@@ -1,7 +1,8 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_required, current_user
 from models import db, Certificate, User, Role
 from datetime import datetime
+from pagination import keyset_paginate
 
 cert_bp = Blueprint('certificates', __name__, url_prefix='/certificates')
 
@@ -131,9 +132,20 @@ def admin_manage():
         flash('ليس لديك صلاحية للوصول إلى هذه الصفحة', 'danger')
         return redirect(url_for('index'))
     
-    # جلب جميع الشهادات مرتبة حسب تاريخ الإنشاء
-    certificates = Certificate.query.order_by(Certificate.created_at.desc()).all()
-    return render_template('admin/manage_certificates.html', certificates=certificates)
+    # جلب الشهادات مرتبة حسب تاريخ الإنشاء على دفعات
+    page = keyset_paginate(Certificate.query, [Certificate.created_at, Certificate.id],
+                           after=request.args.get('after'),
+                           per_page=current_app.config['LIST_PAGE_SIZE'])
+    
+    # الإحصائيات حسب الحالة باستعلام واحد
+    status_counts = dict(
+        db.session.query(Certificate.status, db.func.count(Certificate.id)).group_by(Certificate.status).all()
+    )
+    
+    return render_template('admin/manage_certificates.html',
+                         certificates=page.items,
+                         page=page,
+                         status_counts=status_counts)
 
 # تحديث حالة الشهادة (للمدير)
 @cert_bp.route('/admin/update_status/<int:cert_id>', methods=['POST'])
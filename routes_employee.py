@@ -2,8 +2,11 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from models import db, User, Role, LeaveRequest, LeaveType, Schedule, Attendance
 from datetime import datetime, timedelta
-from werkzeug.utils import secure_filename
-import os
+from query_options import leave_request_options, attendance_options
+from leave_ledger import quota_exceeded
+from data_versions import mark_data_changed
+from date_windows import month_window, in_window, requested_month
+from attachment_store import store_upload, attachment_mimetype
 
 employee_bp = Blueprint('employee', __name__, url_prefix='/employee')
 
@@ -24,18 +27,13 @@ def dashboard():
     
     # الحضور لهذا الشهر
     today = datetime.now().date()
-    first_day = today.replace(day=1)
-    attendance_count = Attendance.query.filter(
+    counts = dict(db.session.query(Attendance.status, db.func.count(Attendance.id)).filter(
         Attendance.employee_id == current_user.id,
-        Attendance.date >= first_day,
-        Attendance.status == 'حاضر'
-    ).count()
-    
-    absence_count = Attendance.query.filter(
-        Attendance.employee_id == current_user.id,
-        Attendance.date >= first_day,
-        Attendance.status == 'غائب'
-    ).count()
+        in_window(Attendance.date, month_window(today.year, today.month)),
+        Attendance.status.in_(['حاضر', 'غائب'])
+    ).group_by(Attendance.status).all())
+    attendance_count = counts.get('حاضر', 0)
+    absence_count = counts.get('غائب', 0)
     
     return render_template('employee/dashboard.html',
                          total_leaves=total_leaves,
@@ -55,7 +53,7 @@ def inquiry():
             return redirect(url_for('employee.inquiry'))
         
         # جلب البيانات
-        leaves = LeaveRequest.query.filter_by(employee_id=user.id).order_by(LeaveRequest.created_at.desc()).all()
+        leaves = LeaveRequest.query.options(*leave_request_options()).filter_by(employee_id=user.id).order_by(LeaveRequest.created_at.desc()).all()
         schedules = Schedule.query.filter_by(employee_id=user.id).all()
         attendance = Attendance.query.filter_by(employee_id=user.id).order_by(Attendance.date.desc()).limit(30).all()
         
@@ -94,17 +92,8 @@ def leave_request():
         
         leave_type = LeaveType.query.get(leave_type_id)
         
-        # التحقق من الحد الأقصى
-        current_year_leaves = LeaveRequest.query.filter(
-            LeaveRequest.employee_id == user.id,
-            LeaveRequest.leave_type_id == leave_type_id,
-            LeaveRequest.status == 'مقبول',
-            db.extract('year', LeaveRequest.start_date) == datetime.now().year
-        ).all()
-        
-        total_days = sum([lr.days_count for lr in current_year_leaves])
-        
-        if total_days + days_count > leave_type.max_days:
+        # التحقق من الحد الأقصى في كل سنة يغطيها الطلب (من سجل الإجازات المستهلكة)
+        if quota_exceeded(user.id, leave_type, start_date, end_date):
             flash(f'تجاوزت الحد المسموح للإجازات ({leave_type.max_days} يوم). الرجاء التواصل مع الإدارة', 'danger')
             return redirect(url_for('employee.leave_request'))
         
@@ -122,14 +111,19 @@ def leave_request():
         if leave_type.requires_attachment and 'attachment' in request.files:
             file = request.files['attachment']
             if file and file.filename:
-                filename = secure_filename(f"{user.national_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}")
-                upload_folder = os.path.join('static', 'uploads', 'attachments')
-                os.makedirs(upload_folder, exist_ok=True)
-                file_path = os.path.join(upload_folder, filename)
-                file.save(file_path)
-                leave_req.attachment_path = file_path
+                mimetype = attachment_mimetype(file.filename)
+                if mimetype is None:
+                    flash('نوع المرفق غير مسموح. الرجاء رفع ملف PDF أو صورة', 'danger')
+                    return redirect(url_for('employee.leave_request'))
+                # يحفظ في مخزن المرفقات مرة واحدة لكل محتوى
+                try:
+                    leave_req.attachment_digest = store_upload(file, mimetype)
+                except ValueError as e:
+                    flash(f'تعذر حفظ المرفق: {e}', 'danger')
+                    return redirect(url_for('employee.leave_request'))
         
         db.session.add(leave_req)
+        mark_data_changed('leave_requests')
         db.session.commit()
         
         flash('تم تقديم طلب الإجازة بنجاح', 'success')
@@ -145,7 +139,7 @@ def my_leaves():
         flash('ليس لديك صلاحية للوصول إلى هذه الصفحة', 'danger')
         return redirect(url_for('index'))
     
-    leaves = LeaveRequest.query.filter_by(employee_id=current_user.id).order_by(LeaveRequest.created_at.desc()).all()
+    leaves = LeaveRequest.query.options(*leave_request_options()).filter_by(employee_id=current_user.id).order_by(LeaveRequest.created_at.desc()).all()
     return render_template('employee/my_leaves.html', leaves=leaves)
 
 # جدولي
@@ -167,14 +161,12 @@ def my_attendance():
         flash('ليس لديك صلاحية للوصول إلى هذه الصفحة', 'danger')
         return redirect(url_for('index'))
     
-    # Get date range from query parameters
-    month = request.args.get('month', datetime.now().month)
-    year = request.args.get('year', datetime.now().year)
+    # الشهر المطلوب من معاملات الرابط (الافتراضي الشهر الحالي)
+    year, month = requested_month(request.args, datetime.now().date())
     
-    attendance = Attendance.query.filter(
+    attendance = Attendance.query.options(*attendance_options()).filter(
         Attendance.employee_id == current_user.id,
-        db.extract('month', Attendance.date) == month,
-        db.extract('year', Attendance.date) == year
+        in_window(Attendance.date, month_window(year, month))
     ).order_by(Attendance.date.desc()).all()
     
     return render_template('employee/my_attendance.html', attendance=attendance)
@@ -0,0 +1,65 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file, abort
+from flask_login import login_required, current_user
+from models import db, Job, JobStatus, Role
+from jobs import JOB_KINDS, submit_job, job_progress
+from reports import REPORT_FILTERS, report_filters
+from audit import log_activity
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+
+def _get_own_job(job_id):
+    """المهمة إذا كانت للمستخدم الحالي، وإلا 404"""
+    job = db.session.get(Job, job_id)
+    if job is None or job.created_by != current_user.id:
+        abort(404)
+    return job
+
+
+# طلب تقرير PDF في الخلفية
+@jobs_bp.route('/reports/<kind>', methods=['POST'])
+@login_required
+def submit_report(kind):
+    if current_user.role not in [Role.MAIN_ADMIN, Role.SUB_ADMIN]:
+        flash('ليس لديك صلاحية لهذه العملية', 'danger')
+        return redirect(url_for('index'))
+
+    if kind not in REPORT_FILTERS:
+        abort(404)
+
+    if kind == 'schedules_pdf':
+        # تسجيل النشاط - يحفظ مع تسجيل المهمة
+        log_activity('طباعة تقرير', 'جدول', None, 'تم طباعة تقرير جدول المعلمين')
+
+    job = submit_job(kind, report_filters(kind, request.form), current_user.id)
+
+    return redirect(url_for('jobs.view', job_id=job.id))
+
+# صفحة متابعة المهمة
+@jobs_bp.route('/<job_id>')
+@login_required
+def view(job_id):
+    job = _get_own_job(job_id)
+    return render_template('jobs/view.html', job=job, kind=JOB_KINDS.get(job.kind))
+
+# حالة المهمة (تستعلم عنها الصفحة دورياً)
+@jobs_bp.route('/<job_id>/status')
+@login_required
+def status(job_id):
+    job = _get_own_job(job_id)
+    return jsonify({
+        'status': job.status,
+        'finished': job.is_finished,
+        'failed': job.status == JobStatus.FAILED,
+        'message': job.message if job.is_finished else job_progress(job),
+        'download_url': url_for('jobs.download', job_id=job.id) if job.result_path else None,
+    })
+
+# تحميل ملف المهمة
+@jobs_bp.route('/<job_id>/download')
+@login_required
+def download(job_id):
+    job = _get_own_job(job_id)
+    if job.status != JobStatus.DONE or not job.result_path:
+        abort(404)
+    return send_file(job.result_path, as_attachment=True, download_name=job.result_name, mimetype=job.result_mimetype)
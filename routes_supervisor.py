@@ -1,8 +1,16 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_required, current_user
 from models import db, User, Role, LeaveRequest, Schedule, Attendance, Notification
 from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
+from sqlalchemy import and_, select
+from attendance_service import load_day_attendance, save_attendance_batch
+from attendance_summary import status_counts
+from leave_ledger import set_leave_status
+from data_versions import mark_data_changed
+from assignments import assign_employees_to, subordinate_counts
+from schedule_generation import ScheduleTemplate, generate_schedules, roll_schedules_forward
+from pagination import keyset_paginate
+from query_options import leave_request_options, attendance_options
 
 supervisor_bp = Blueprint('supervisor', __name__, url_prefix='/supervisor')
 
@@ -26,17 +34,9 @@ def dashboard():
     
     # الحضور اليوم
     today = datetime.now().date()
-    present_today = Attendance.query.join(User, Attendance.employee_id == User.id).filter(
-        User.supervisor_id == current_user.id,
-        Attendance.date == today,
-        Attendance.status == 'حاضر'
-    ).count()
-    
-    absent_today = Attendance.query.join(User, Attendance.employee_id == User.id).filter(
-        User.supervisor_id == current_user.id,
-        Attendance.date == today,
-        Attendance.status == 'غائب'
-    ).count()
+    counts = status_counts(today, supervisor_id=current_user.id, statuses=['حاضر', 'غائب'])
+    present_today = counts.get('حاضر', 0)
+    absent_today = counts.get('غائب', 0)
     
     return render_template('supervisor/dashboard.html',
                          subordinates=subordinates,
@@ -53,47 +53,32 @@ def schedules():
         flash('ليس لديك صلاحية للوصول إلى هذه الصفحة', 'danger')
         return redirect(url_for('index'))
     
-    subordinates = User.query.filter_by(supervisor_id=current_user.id, role=Role.EMPLOYEE).all()
-    
     if request.method == 'POST':
-        # معالجة إضافة جداول متعددة
-        employees_data = request.form.getlist('employee_id')
+        # معالجة إضافة جداول متعددة - للموظفين التابعين لهذا المشرف فقط
+        employee_ids = db.session.scalars(select(User.id).where(
+            User.id.in_(request.form.getlist('employee_id', type=int)),
+            User.supervisor_id == current_user.id
+        )).all()
         
-        for emp_id in employees_data:
-            if not emp_id:
-                continue
-                
-            employee_id = int(emp_id)
-            days = request.form.getlist(f'days_{emp_id}')
-            shift_start = request.form.get(f'shift_start_{emp_id}')
-            shift_end = request.form.get(f'shift_end_{emp_id}')
-            shift_time = f"{shift_start} - {shift_end}"
-            start_date = datetime.strptime(request.form.get(f'start_date_{emp_id}'), '%Y-%m-%d').date()
-            end_date_str = request.form.get(f'end_date_{emp_id}')
+        templates = {}
+        for employee_id in employee_ids:
+            shift_start = request.form.get(f'shift_start_{employee_id}')
+            shift_end = request.form.get(f'shift_end_{employee_id}')
+            start_date = datetime.strptime(request.form.get(f'start_date_{employee_id}'), '%Y-%m-%d').date()
+            end_date_str = request.form.get(f'end_date_{employee_id}')
             end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
             
-            # حذف الجداول القديمة
-            Schedule.query.filter_by(employee_id=employee_id).delete()
-            
-            # إضافة الأيام
-            all_days = ['السبت', 'الأحد', 'الاثنين', 'الثلاثاء', 'الأربعاء', 'الخميس', 'الجمعة']
-            
-            for day in all_days:
-                schedule = Schedule(
-                    employee_id=employee_id,
-                    day_of_week=day,
-                    shift_time=shift_time,
-                    is_rest_day=(day not in days),
-                    start_date=start_date,
-                    end_date=end_date,
-                    created_by=current_user.id
-                )
-                db.session.add(schedule)
+            templates[employee_id] = ScheduleTemplate(
+                request.form.getlist(f'days_{employee_id}'), f"{shift_start} - {shift_end}", start_date, end_date
+            )
         
+        generate_schedules(templates, current_user.id)
         db.session.commit()
         flash('تم رفع الجداول بنجاح', 'success')
         return redirect(url_for('supervisor.schedules'))
     
+    subordinates = User.query.filter_by(supervisor_id=current_user.id, role=Role.EMPLOYEE).all()
+    
     return render_template('supervisor/schedules.html', subordinates=subordinates)
 
 # عرض جميع الجداول
@@ -116,7 +101,9 @@ def view_schedules():
                 'schedules': emp_schedules
             })
     
-    return render_template('supervisor/view_schedules.html', schedules_data=schedules_data)
+    departments = sorted({emp.department for emp in subordinates if emp.department})
+    
+    return render_template('supervisor/view_schedules.html', schedules_data=schedules_data, departments=departments)
 
 # نسخ الجدول لشهر قادم
 @supervisor_bp.route('/copy-schedule/<int:employee_id>', methods=['POST'])
@@ -132,35 +119,31 @@ def copy_schedule(employee_id):
         flash('ليس لديك صلاحية لإدارة هذا الموظف', 'danger')
         return redirect(url_for('supervisor.view_schedules'))
     
-    # جلب الجداول الحالية
-    current_schedules = Schedule.query.filter_by(employee_id=employee_id).all()
-    
-    if not current_schedules:
+    # نسخ آخر جدول للشهر القادم
+    if not roll_schedules_forward(User.id == employee_id, current_user.id):
         flash('لا يوجد جدول لنسخه', 'warning')
         return redirect(url_for('supervisor.view_schedules'))
     
-    # نسخ الجداول للشهر القادم
-    copied_count = 0
-    for schedule in current_schedules:
-        # حساب التاريخ للشهر القادم
-        new_start_date = schedule.start_date + relativedelta(months=1) if schedule.start_date else None
-        new_end_date = schedule.end_date + relativedelta(months=1) if schedule.end_date else None
-        
-        # إنشاء جدول جديد
-        new_schedule = Schedule(
-            employee_id=schedule.employee_id,
-            day_of_week=schedule.day_of_week,
-            shift_time=schedule.shift_time,
-            is_rest_day=schedule.is_rest_day,
-            start_date=new_start_date,
-            end_date=new_end_date,
-            created_by=current_user.id
-        )
-        db.session.add(new_schedule)
-        copied_count += 1
+    db.session.commit()
+    flash('تم نسخ الجدول للشهر القادم بنجاح', 'success')
+    return redirect(url_for('supervisor.view_schedules'))
+
+# نقل جداول جميع الموظفين (أو قسم معين) للشهر القادم
+@supervisor_bp.route('/roll-schedules', methods=['POST'])
+@login_required
+def roll_schedules():
+    if current_user.role != Role.MAIN_SUPERVISOR:
+        flash('ليس لديك صلاحية للوصول إلى هذه الصفحة', 'danger')
+        return redirect(url_for('index'))
     
+    condition = and_(User.supervisor_id == current_user.id, User.role == Role.EMPLOYEE)
+    department = request.form.get('department')
+    if department:
+        condition = and_(condition, User.department == department)
+    
+    rolled = roll_schedules_forward(condition, current_user.id)
     db.session.commit()
-    flash(f'تم نسخ {copied_count} جدول للشهر القادم بنجاح', 'success')
+    flash(f'تم نقل جداول {rolled} موظف للشهر القادم بنجاح', 'success')
     return redirect(url_for('supervisor.view_schedules'))
 
 # طلبات الإجازات
@@ -172,11 +155,14 @@ def leave_requests():
         return redirect(url_for('index'))
     
     # جلب طلبات الإجازات للموظفين التابعين
-    requests = LeaveRequest.query.join(User, LeaveRequest.employee_id == User.id).filter(
+    query = LeaveRequest.query.options(*leave_request_options()).join(User, LeaveRequest.employee_id == User.id).filter(
         User.supervisor_id == current_user.id
-    ).order_by(LeaveRequest.created_at.desc()).all()
+    )
+    page = keyset_paginate(query, [LeaveRequest.created_at, LeaveRequest.id],
+                           after=request.args.get('after'),
+                           per_page=current_app.config['LIST_PAGE_SIZE'])
     
-    return render_template('supervisor/leave_requests.html', requests=requests)
+    return render_template('supervisor/leave_requests.html', requests=page.items, page=page)
 
 # الموافقة أو الرفض على الإجازة
 @supervisor_bp.route('/leave-request/<int:request_id>/review', methods=['POST'])
@@ -195,10 +181,10 @@ def review_leave_request(request_id):
     notes = request.form.get('notes', '')
     
     if action == 'approve':
-        leave_request.status = 'مقبول'
+        set_leave_status(leave_request, 'مقبول')
         message = f'تم قبول طلب إجازتك من {leave_request.start_date} إلى {leave_request.end_date}'
     elif action == 'reject':
-        leave_request.status = 'مرفوض'
+        set_leave_status(leave_request, 'مرفوض')
         message = f'تم رفض طلب إجازتك من {leave_request.start_date} إلى {leave_request.end_date}'
     else:
         return jsonify({'success': False, 'message': 'إجراء غير صحيح'}), 400
@@ -235,40 +221,30 @@ def attendance():
     if request.method == 'POST':
         date = datetime.strptime(request.form.get('date'), '%Y-%m-%d').date()
         
+        # تجميع النموذج كاملاً في دفعة واحدة
+        entries = []
         for emp in subordinates:
             status = request.form.get(f'status_{emp.id}')
-            notes = request.form.get(f'notes_{emp.id}', '')
-            
             if not status:
                 continue
-            
-            # التحقق من وجود سجل حضور لهذا اليوم
-            existing = Attendance.query.filter_by(employee_id=emp.id, date=date).first()
-            
-            if existing:
-                existing.status = status
-                existing.notes = notes
-                existing.recorded_by = current_user.id
-            else:
-                attendance_record = Attendance(
-                    employee_id=emp.id,
-                    date=date,
-                    status=status,
-                    notes=notes,
-                    recorded_by=current_user.id
-                )
-                db.session.add(attendance_record)
+            entries.append({
+                'employee_id': emp.id,
+                'date': date,
+                'status': status,
+                'notes': request.form.get(f'notes_{emp.id}', '')
+            })
         
+        results = save_attendance_batch(entries, recorded_by=current_user.id)
         db.session.commit()
-        flash('تم تسجيل الحضور والغياب بنجاح', 'success')
+        
+        created = sum(1 for r in results if r['result'] == 'created')
+        updated = sum(1 for r in results if r['result'] == 'updated')
+        flash(f'تم تسجيل الحضور والغياب بنجاح (جديد: {created}، محدث: {updated})', 'success')
         return redirect(url_for('supervisor.attendance'))
     
     # جلب سجلات اليوم
     today = datetime.now().date()
-    today_attendance = {}
-    for emp in subordinates:
-        record = Attendance.query.filter_by(employee_id=emp.id, date=today).first()
-        today_attendance[emp.id] = record
+    today_attendance = load_day_attendance(today, [emp.id for emp in subordinates])
     
     return render_template('supervisor/attendance.html', 
                          subordinates=subordinates,
@@ -289,7 +265,7 @@ def attendance_records():
     end_date = request.args.get('end_date')
     
     # بناء الاستعلام
-    query = Attendance.query.join(User, Attendance.employee_id == User.id).filter(User.supervisor_id == current_user.id)
+    query = Attendance.query.options(*attendance_options()).join(User, Attendance.employee_id == User.id).filter(User.supervisor_id == current_user.id)
     
     if employee_id:
         query = query.filter(Attendance.employee_id == employee_id)
@@ -302,11 +278,16 @@ def attendance_records():
         end = datetime.strptime(end_date, '%Y-%m-%d').date()
         query = query.filter(Attendance.date <= end)
     
-    records = query.order_by(Attendance.date.desc()).all()
+    page = keyset_paginate(query, [Attendance.date, Attendance.id],
+                           after=request.args.get('after'),
+                           per_page=current_app.config['LIST_PAGE_SIZE'])
+    filter_args = {k: v for k, v in request.args.items() if k != 'after'}
     subordinates = User.query.filter_by(supervisor_id=current_user.id, role=Role.EMPLOYEE).all()
     
     return render_template('supervisor/attendance_records.html', 
-                         records=records,
+                         records=page.items,
+                         page=page,
+                         filter_args=filter_args,
                          subordinates=subordinates)
 
 # إضافة مشرف فرعي (للمشرف الرئيسي فقط)
@@ -346,6 +327,7 @@ def add_sub_supervisor():
         sub_supervisor.set_password(password)
         
         db.session.add(sub_supervisor)
+        mark_data_changed('users')
         db.session.commit()
         
         flash('تم إضافة المشرف الفرعي بنجاح', 'success')
@@ -363,8 +345,9 @@ def sub_supervisors():
     
     # جلب المشرفين الفرعيين التابعين للمشرف الرئيسي
     subs = User.query.filter_by(supervisor_id=current_user.id, role=Role.SUB_SUPERVISOR).all()
+    counts = subordinate_counts([sup.id for sup in subs])
     
-    return render_template('supervisor/sub_supervisors.html', supervisors=subs)
+    return render_template('supervisor/sub_supervisors.html', supervisors=subs, subordinate_counts=counts)
 
 # إسناد المعلمين للمشرفين الفرعيين
 @supervisor_bp.route('/assign-to-subs', methods=['GET', 'POST'])
@@ -374,36 +357,38 @@ def assign_to_subs():
         flash('ليس لديك صلاحية للوصول إلى هذه الصفحة', 'danger')
         return redirect(url_for('index'))
     
-    # جلب المشرفين الفرعيين
-    sub_supervisors = User.query.filter_by(supervisor_id=current_user.id, role=Role.SUB_SUPERVISOR).all()
-    
-    # جلب الموظفين التابعين للمشرف الرئيسي فقط
-    employees = User.query.filter_by(supervisor_id=current_user.id, role=Role.EMPLOYEE).all()
-    
     if request.method == 'POST':
-        sub_supervisor_id = request.form.get('supervisor_id')
-        employee_ids = request.form.getlist('employee_ids')
+        sub_supervisor_id = request.form.get('supervisor_id', type=int)
+        employee_ids = request.form.getlist('employee_ids', type=int)
         
         if not sub_supervisor_id:
             flash('الرجاء اختيار المشرف الفرعي', 'danger')
             return redirect(url_for('supervisor.assign_to_subs'))
         
-        # التحقق أن المشرف الفرعي تابع للمشرف الرئيسي
-        sub_supervisor = User.query.get(sub_supervisor_id)
-        if not sub_supervisor or sub_supervisor.supervisor_id != current_user.id:
-            flash('المشرف الفرعي غير صحيح', 'danger')
+        # الإسناد يشمل موظفي المشرف الرئيسي فقط، وإلى مشرف فرعي تابع له
+        assigned = assign_employees_to(
+            employee_ids, sub_supervisor_id,
+            employee_scope=User.supervisor_id == current_user.id,
+            supervisor_scope=lambda target: and_(target.role == Role.SUB_SUPERVISOR,
+                                                 target.supervisor_id == current_user.id)
+        )
+        if employee_ids and not assigned:
+            flash('لم يتم إسناد أي موظف، تأكد من المشرف الفرعي والموظفين المحددين', 'danger')
             return redirect(url_for('supervisor.assign_to_subs'))
         
-        # إسناد الموظفين
-        for emp_id in employee_ids:
-            employee = User.query.get(int(emp_id))
-            if employee and employee.supervisor_id == current_user.id:
-                employee.supervisor_id = int(sub_supervisor_id)
-        
         db.session.commit()
-        flash(f'تم إسناد {len(employee_ids)} موظف للمشرف الفرعي', 'success')
+        flash(f'تم إسناد {assigned} موظف للمشرف الفرعي', 'success')
         return redirect(url_for('supervisor.assign_to_subs'))
     
+    # جلب المشرفين الفرعيين
+    sub_supervisors = User.query.filter_by(supervisor_id=current_user.id, role=Role.SUB_SUPERVISOR).all()
+    
+    # جلب الموظفين التابعين للمشرف الرئيسي فقط
+    employees = User.query.filter_by(supervisor_id=current_user.id, role=Role.EMPLOYEE).all()
+    
+    counts = subordinate_counts([sup.id for sup in sub_supervisors])
+    
     return render_template('supervisor/assign_to_subs.html', 
                           sub_supervisors=sub_supervisors,
-                          employees=employees)
+                          employees=employees,
+                          subordinate_counts=counts)
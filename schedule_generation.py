@@ -0,0 +1,105 @@
+"""
+توليد الجداول الأسبوعية لمجموعة موظفين بجمل جماعية
+
+الجدول الأسبوعي للموظف 7 صفوف (صف لكل يوم) بنفس الفترة ونطاق التاريخ. بدلاً من
+إضافة الصفوف بـ db.session.add واحداً واحداً، يتم حذف جداول كل الموظفين بجملة
+DELETE واحدة ثم كتابة كل الصفوف بجملة INSERT جماعية (executemany).
+
+نقل الجداول للشهر القادم يقرأ آخر جدول لكل موظف باستعلام واحد ويكتب نسخته بعد
+شهر بجملة INSERT واحدة، فيمكن نقل جداول قسم كامل في طلب واحد.
+"""
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import and_, delete, func, insert, select
+from models import db, User, Schedule
+
+WEEK_DAYS = ['السبت', 'الأحد', 'الاثنين', 'الثلاثاء', 'الأربعاء', 'الخميس', 'الجمعة']
+
+# عدد الصفوف في كل جملة INSERT
+SCHEDULE_CHUNK_SIZE = 700
+
+
+class ScheduleTemplate:
+    """قالب جدول أسبوعي: أيام العمل والفترة ونطاق التاريخ (باقي الأيام راحة)"""
+
+    def __init__(self, work_days, shift_time, start_date, end_date=None):
+        self.work_days = set(work_days)
+        self.shift_time = shift_time
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def rows(self, employee_id, created_by):
+        """صفوف الأسبوع للموظف كقواميس جاهزة للإدراج"""
+        return [{
+            'employee_id': employee_id,
+            'day_of_week': day,
+            'shift_time': self.shift_time,
+            'is_rest_day': day not in self.work_days,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'created_by': created_by,
+        } for day in WEEK_DAYS]
+
+
+def _insert_rows(rows):
+    for i in range(0, len(rows), SCHEDULE_CHUNK_SIZE):
+        db.session.execute(insert(Schedule), rows[i:i + SCHEDULE_CHUNK_SIZE])
+    return len(rows)
+
+
+def generate_schedules(templates, created_by):
+    """استبدال جداول الموظفين بجداول من القوالب دون commit
+
+    templates قاموس رقم الموظف -> ScheduleTemplate.
+    ترجع عدد صفوف الجداول المنشأة.
+    """
+    if not templates:
+        return 0
+
+    db.session.execute(delete(Schedule).where(Schedule.employee_id.in_(list(templates))),
+                       execution_options={'synchronize_session': False})
+    rows = []
+    for employee_id, template in templates.items():
+        rows.extend(template.rows(employee_id, created_by))
+    return _insert_rows(rows)
+
+
+def _shift_date(value, shift):
+    """التاريخ بعد shift، وآخر يوم في الشهر يبقى آخر يوم في الشهر الهدف
+
+    relativedelta وحدها تقص 31 يناير إلى 28 فبراير ثم يبقى 28 في كل نقل بعده.
+    """
+    shifted = value + shift
+    if (value + relativedelta(days=1)).month != value.month:
+        shifted += relativedelta(day=31)
+    return shifted
+
+
+def roll_schedules_forward(employee_condition, created_by, months=1):
+    """نسخ آخر جدول لكل موظف مطابق للشرط بعد عدد من الأشهر دون commit
+
+    آخر جدول هو صفوف الموظف ذات أحدث تاريخ بداية، فلا تتضاعف الصفوف عند تكرار
+    النقل كل شهر. التاريخ في آخر الشهر ينقل لآخر الشهر الهدف. ترجع عدد الموظفين الذين نقلت جداولهم.
+    """
+    latest = select(
+        Schedule.employee_id, func.max(Schedule.start_date).label('start_date')
+    ).join(User, Schedule.employee_id == User.id).where(employee_condition).group_by(Schedule.employee_id).subquery()
+
+    current = db.session.execute(
+        select(Schedule.employee_id, Schedule.day_of_week, Schedule.shift_time, Schedule.is_rest_day,
+               Schedule.start_date, Schedule.end_date)
+        .join(latest, and_(Schedule.employee_id == latest.c.employee_id,
+                           Schedule.start_date == latest.c.start_date))
+    ).all()
+
+    shift = relativedelta(months=months)
+    rows = [{
+        'employee_id': row.employee_id,
+        'day_of_week': row.day_of_week,
+        'shift_time': row.shift_time,
+        'is_rest_day': row.is_rest_day,
+        'start_date': _shift_date(row.start_date, shift),
+        'end_date': _shift_date(row.end_date, shift) if row.end_date else None,
+        'created_by': created_by,
+    } for row in current]
+    _insert_rows(rows)
+    return len({row['employee_id'] for row in rows})
@@ -0,0 +1,87 @@
+"""
+ذاكرة مؤقتة لإعدادات النظام داخل العملية
+
+إعدادات النظام تقرأ في كل عرض لقالب (inject_settings) وتتغير نادراً، لذلك يحتفظ
+كل عامل بنسخة منها ولا يعيد قراءتها من قاعدة البيانات إلا إذا تغير ختم الإصدار.
+
+الختم ملف صغير (SETTINGS_VERSION_FILE) يتم استبداله بعد كل حفظ للإعدادات، فيكفي
+كل عامل أن يقارن os.stat للملف مع الختم المحفوظ لديه حتى يعرف أن عاملاً آخر غيّر
+الإعدادات، دون استعلام على الجدول في كل طلب.
+"""
+import os
+import threading
+import time
+from types import SimpleNamespace
+from flask import current_app
+from models import SystemSettings
+
+
+def _version_file():
+    return current_app.config['SETTINGS_VERSION_FILE']
+
+
+def _read_stamp():
+    """ختم الإصدار الحالي: (inode، وقت التعديل) أو None إذا لم يحفظ شيء بعد"""
+    try:
+        stat = os.stat(_version_file())
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns)
+
+
+def _snapshot(settings):
+    """نسخة مستقلة عن الجلسة من صف الإعدادات"""
+    if settings is None:
+        return None
+    columns = SystemSettings.__table__.columns.keys()
+    return SimpleNamespace(**{name: getattr(settings, name) for name in columns})
+
+
+class SettingsCache:
+    """نسخة الإعدادات المحفوظة في العامل الحالي مع ختم الإصدار الذي قرئت عنده"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._settings = None
+        self._stamp = None
+        self._loaded = False
+
+    def _is_stale(self, stamp):
+        return not self._loaded or stamp != self._stamp
+
+    def get(self):
+        stamp = _read_stamp()
+        if self._is_stale(stamp):
+            with self._lock:
+                if self._is_stale(stamp):
+                    self._settings = _snapshot(SystemSettings.query.first())
+                    self._stamp = stamp
+                    # لا يتم حفظ عدم الوجود حتى يظهر الصف بعد تهيئة قاعدة البيانات
+                    self._loaded = self._settings is not None
+        return self._settings
+
+    def invalidate(self):
+        self._loaded = False
+
+
+_cache = SettingsCache()
+
+
+def get_settings():
+    """إعدادات النظام من الذاكرة المؤقتة (للقراءة فقط)"""
+    return _cache.get()
+
+
+def bump_settings_version():
+    """إعلام جميع العمال بتغير الإعدادات - تستدعى بعد commit
+
+    يتم كتابة ملف جديد ثم استبداله (os.replace) حتى يتغير الـ inode حتى لو لم
+    يتغير وقت التعديل على أنظمة الملفات ذات الدقة المنخفضة.
+    """
+    path = _version_file()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(str(time.time_ns()))
+    os.replace(tmp_path, path)
+    _cache.invalidate()
@@ -219,3 +219,49 @@ document.addEventListener('DOMContentLoaded', function() {
         endDate.addEventListener('change', updateLeaveDays);
     }
 });
+
+// تحميل المزيد - جلب الصفحة التالية وإضافة صفوفها إلى الجدول الحالي
+document.addEventListener('click', function(e) {
+    const link = e.target.closest('.load-more');
+    if (!link) {
+        return;
+    }
+    e.preventDefault();
+    link.classList.add('disabled');
+    
+    fetch(link.getAttribute('href'))
+        .then(response => response.text())
+        .then(html => {
+            const doc = new DOMParser().parseFromString(html, 'text/html');
+            const target = document.querySelector(link.dataset.target);
+            const source = doc.querySelector(link.dataset.target);
+            const added = [];
+            
+            if (target && source) {
+                Array.from(source.children).forEach(row => {
+                    added.push(row);
+                    target.appendChild(document.adoptNode(row));
+                });
+            }
+            
+            // نوافذ Modal الخاصة بالصفوف الجديدة
+            doc.querySelectorAll('.modal[id]').forEach(modal => {
+                if (!document.getElementById(modal.id)) {
+                    document.body.appendChild(document.adoptNode(modal));
+                }
+            });
+            
+            const next = doc.querySelector('.load-more');
+            if (next) {
+                link.setAttribute('href', next.getAttribute('href'));
+                link.classList.remove('disabled');
+            } else {
+                link.remove();
+            }
+            
+            document.dispatchEvent(new CustomEvent('rows-loaded', { detail: { rows: added } }));
+        })
+        .catch(() => {
+            window.location.href = link.getAttribute('href');
+        });
+});
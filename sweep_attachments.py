@@ -0,0 +1,35 @@
+"""
+سكريبت حذف مرفقات الإجازات المنتهية (مناسب للتشغيل الدوري بـ cron)
+
+الاستخدام:
+    python sweep_attachments.py         حذف المرفقات الأقدم من مدة الاحتفاظ في إعدادات النظام
+    python sweep_attachments.py DAYS    حذف المرفقات الأقدم من عدد الأيام المحدد
+"""
+import sys
+from app import app
+from attachment_retention import sweep_attachments, retention_days, format_bytes
+
+
+def main(args):
+    if args and not args[0].isdigit():
+        print(__doc__)
+        return False
+
+    with app.app_context():
+        days = int(args[0]) if args else retention_days()
+        print(f"جاري حذف المرفقات الأقدم من {days} يوم...")
+
+        try:
+            swept, reclaimed = sweep_attachments(days, progress=lambda count, size: print(
+                f"  ... تم حذف {count} مرفق ({format_bytes(size)})"))
+            print(f"✅ تم حذف {swept} مرفق وتوفير {format_bytes(reclaimed)}")
+            return True
+        except Exception as e:
+            print(f"\n❌ خطأ أثناء الحذف: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main(sys.argv[1:]) else 1)
@@ -0,0 +1,50 @@
+"""
+اختبار أرشفة سجل النشاطات في ملفات شهرية مضغوطة
+"""
+from datetime import datetime
+from models import db, User, ActivityLog
+from activity_archive import archive_activity_log, load_index, search_archive
+
+CUTOFF = datetime(2002, 1, 1)
+
+
+def _add_old_logs(app):
+    with app.app_context():
+        admin_id = User.query.filter_by(national_id='1000000000').first().id
+        for day in range(1, 4):
+            for month, action in ((3, 'إضافة'), (4, 'حذف')):
+                db.session.add(ActivityLog(user_id=admin_id, action=action, target_type='موظف',
+                                           details=f'نشاط قديم {month}-{day}', created_at=datetime(2001, month, day)))
+        db.session.add(ActivityLog(user_id=admin_id, action='إضافة', target_type='موظف', details='نشاط حديث'))
+        db.session.commit()
+
+
+def test_old_logs_move_to_monthly_segments(app):
+    _add_old_logs(app)
+
+    with app.app_context():
+        assert archive_activity_log(CUTOFF) == 6
+        assert archive_activity_log(CUTOFF) == 0
+        assert ActivityLog.query.filter(ActivityLog.created_at < CUTOFF).count() == 0
+        assert ActivityLog.query.filter_by(details='نشاط حديث').count() == 1
+
+        months = load_index()['months']
+        assert months['2001-03']['count'] == 3
+        assert months['2001-04']['actions'] == ['حذف']
+
+        page = search_archive('2001-03', {}, per_page=2)
+        assert [log.details for log in page.items] == ['نشاط قديم 3-3', 'نشاط قديم 3-2']
+        assert [log.details for log in search_archive('2001-03', {}, after=page.next_cursor, per_page=2).items] == \
+            ['نشاط قديم 3-1']
+        assert search_archive('2001-03', {'action': 'حذف'}).items == []
+
+
+def test_activity_page_searches_archived_month(app):
+    admin = app.test_client()
+    admin.post('/login', data={'national_id': '1000000000', 'password': 'admin123'})
+
+    response = admin.get('/admin/activity-logs?archive_month=2001-04&date_from=2001-04-02')
+    assert response.status_code == 200
+    html = response.get_data(as_text=True)
+    assert 'نشاط قديم 4-3' in html and 'نشاط قديم 4-2' in html
+    assert 'نشاط قديم 4-1' not in html
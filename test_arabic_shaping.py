@@ -0,0 +1,25 @@
+"""
+اختبار تشكيل النص العربي لتقارير PDF
+"""
+from arabic_reshaper import reshape
+from bidi.algorithm import get_display
+from arabic_shaping import shape, shape_column, shape_columns, _shape
+
+
+def test_shape_matches_reshaper_and_bidi():
+    assert shape('إجازة مرضية') == get_display(reshape('إجازة مرضية'))
+    assert shape(None) == '-'
+    assert shape('') == '-'
+    assert shape(5) == '5'
+
+
+def test_repeated_values_are_shaped_once():
+    _shape.cache_clear()
+    column = ['حاضر', 'غائب', 'حاضر', None, 'حاضر']
+    assert shape_column(column) == [shape(value) for value in column]
+    assert _shape.cache_info().misses == 2
+
+
+def test_shape_columns_leaves_other_columns():
+    rows = shape_columns([['أحمد', '2024-01-01', 'حاضر']], (0, 2))
+    assert rows == [[shape('أحمد'), '2024-01-01', shape('حاضر')]]
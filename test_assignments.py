@@ -0,0 +1,91 @@
+"""
+اختبار إسناد الموظفين للمشرفين بجملة واحدة
+"""
+from datetime import date
+import pytest
+from conftest import count_queries
+from models import db, User, Role, AttendanceDailySummary
+from assignments import subordinate_counts
+from attendance_service import save_attendance_batch
+from attendance_summary import status_counts
+
+
+def _user(national_id, role, supervisor_id=None):
+    user = User(national_id=national_id, name=f'مستخدم {national_id}', role=role, gender='ذكر',
+                supervisor_id=supervisor_id, password_pending=True)
+    db.session.add(user)
+    db.session.flush()
+    return user.id
+
+
+@pytest.fixture(scope='module')
+def team(app):
+    """مشرفان رئيسيان لكل منهما مشرف فرعي وموظفان"""
+    with app.app_context():
+        ids = {}
+        for prefix, name in (('371', 'a'), ('372', 'b')):
+            ids[name] = _user(f'{prefix}0000001', Role.MAIN_SUPERVISOR)
+            ids[name + '_sub'] = _user(f'{prefix}0000002', Role.SUB_SUPERVISOR, ids[name])
+            ids[name + '_employees'] = [_user(f'{prefix}000001{i}', Role.EMPLOYEE, ids[name]) for i in range(2)]
+        db.session.commit()
+        return ids
+
+
+def test_assign_to_subs_is_one_update_scoped_in_sql(app, team):
+    client = app.test_client()
+    client.post('/login', data={'national_id': '3710000001', 'password': '3710000001'})
+
+    # موظف المشرف الآخر لا يتم إسناده حتى لو أرسل في النموذج
+    employee_ids = team['a_employees'] + team['b_employees'][:1]
+    with count_queries(app) as statements:
+        client.post('/supervisor/assign-to-subs', data={'supervisor_id': team['a_sub'], 'employee_ids': employee_ids})
+    assert len([s for s in statements if s.startswith('UPDATE users')]) == 1
+    assert not [s for s in statements if s.startswith('SELECT users.id') and 'WHERE users.id = ?' in s]
+
+    with app.app_context():
+        assert subordinate_counts([team['a_sub'], team['b']]) == {team['a_sub']: 2, team['b']: 2}
+
+    # لا يمكن الإسناد إلى مشرف فرعي لمشرف آخر
+    client.post('/supervisor/assign-to-subs', data={'supervisor_id': team['b_sub'], 'employee_ids': team['a_employees']})
+    with app.app_context():
+        assert subordinate_counts([team['a_sub'], team['b_sub']]) == {team['a_sub']: 2, team['b_sub']: 0}
+
+
+def test_admin_assigns_only_to_supervisors(app, team):
+    admin = app.test_client()
+    admin.post('/login', data={'national_id': '1000000000', 'password': 'admin123'})
+
+    admin.post('/admin/assign-employees', data={'supervisor_id': team['b_employees'][1],
+                                                 'employee_ids': team['b_employees'][:1]})
+    admin.post('/admin/assign-employees', data={'supervisor_id': team['b_sub'], 'employee_ids': team['b_employees']})
+
+    with app.app_context():
+        assert subordinate_counts([team['b'], team['b_sub'], team['b_employees'][1]]) == {
+            team['b']: 0, team['b_sub']: 2, team['b_employees'][1]: 0
+        }
+
+
+def test_reassignment_moves_attendance_summary(app, team):
+    day = date(2023, 5, 1)
+    employee_id = team['b_employees'][0]
+    with app.app_context():
+        save_attendance_batch([{'employee_id': employee_id, 'date': day, 'status': 'حاضر'}], team['b'])
+        db.session.commit()
+
+    admin = app.test_client()
+    admin.post('/login', data={'national_id': '1000000000', 'password': 'admin123'})
+    admin.post('/admin/assign-employees', data={'supervisor_id': team['b'], 'employee_ids': [employee_id]})
+    with app.app_context():
+        assert status_counts(day, supervisor_id=team['b']) == {'حاضر': 1}
+
+    admin.post('/admin/assign-employees', data={'supervisor_id': team['b_sub'], 'employee_ids': [employee_id]})
+    with app.app_context():
+        assert status_counts(day, supervisor_id=team['b']) == {}
+        assert status_counts(day, supervisor_id=team['b_sub']) == {'حاضر': 1}
+
+    admin.post(f'/admin/employees/edit/{employee_id}', data={
+        'name': 'معلم منقول', 'national_id': '3720000010', 'gender': 'ذكر', 'department': 'الإدارة'
+    })
+    with app.app_context():
+        rows = AttendanceDailySummary.query.filter_by(date=day).all()
+        assert [(r.supervisor_id, r.department, r.count) for r in rows] == [(team['b_sub'], 'الإدارة', 1)]
@@ -0,0 +1,51 @@
+"""
+اختبار حذف مرفقات الإجازات بعد مدة الاحتفاظ
+"""
+import os
+from datetime import date, datetime, timedelta
+from models import db, User, Role, LeaveType, LeaveRequest
+from attachment_retention import sweep_attachments
+
+
+def _attachment(app, name, size):
+    folder = app.config['ATTACHMENT_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    return path
+
+
+def test_expired_attachments_are_swept_in_batches(app, tmp_path):
+    outside = tmp_path / 'outside.pdf'
+    outside.write_bytes(b'keep')
+
+    with app.app_context():
+        employee = User(national_id='3400000001', name='معلم المرفقات', role=Role.EMPLOYEE, gender='ذكر')
+        db.session.add(employee)
+        db.session.flush()
+        leave_type = LeaveType.query.first()
+        old = datetime.utcnow() - timedelta(days=100)
+        files = {
+            'old_1': (_attachment(app, 'old_1.jpg', 10), old),
+            'old_2': (_attachment(app, 'old_2.jpg', 20), old),
+            'outside': (str(outside), old),
+            'recent': (_attachment(app, 'recent.jpg', 30), datetime.utcnow()),
+        }
+        for reason, (path, created_at) in files.items():
+            db.session.add(LeaveRequest(employee_id=employee.id, leave_type_id=leave_type.id, start_date=date.today(),
+                                        end_date=date.today(), days_count=1, reason=reason,
+                                        attachment_path=path, created_at=created_at))
+        db.session.commit()
+
+        batches = []
+        assert sweep_attachments(60, progress=lambda *args: batches.append(args), batch_size=2) == (3, 30)
+        assert batches == [(2, 30), (3, 30)]
+
+        paths = dict(db.session.query(LeaveRequest.reason, LeaveRequest.attachment_path)
+                     .filter_by(employee_id=employee.id).all())
+        assert paths == {'old_1': None, 'old_2': None, 'outside': None, 'recent': files['recent'][0]}
+        assert not os.path.exists(files['old_1'][0])
+        assert os.path.exists(files['recent'][0])
+        # الملفات خارج مجلد المرفقات لا تحذف
+        assert outside.exists()
@@ -0,0 +1,152 @@
+"""
+اختبار مخزن المرفقات بالمحتوى وعرض المرفقات
+"""
+import hashlib
+import io
+import os
+import time
+from datetime import date, datetime, timedelta
+import pytest
+from models import db, User, Role, LeaveType, LeaveRequest, Attachment
+import attachment_store
+from attachment_store import attachment_path, thumbnail_path, purge_attachments
+from attachment_retention import sweep_attachments
+
+REPORT = b'%PDF-1.4 medical report ' * 100
+
+
+@pytest.fixture(scope='module')
+def people(app):
+    with app.app_context():
+        supervisor = User(national_id='3300000001', name='مشرف المخزن', role=Role.MAIN_SUPERVISOR, gender='ذكر')
+        supervisor.set_password('pass123')
+        other = User(national_id='3300000002', name='مشرف آخر', role=Role.MAIN_SUPERVISOR, gender='ذكر')
+        other.set_password('pass123')
+        db.session.add_all([supervisor, other])
+        db.session.flush()
+        employees = [User(national_id=f'33000001{i:02d}', name=f'معلم المخزن {i}', role=Role.EMPLOYEE,
+                          gender='ذكر', supervisor_id=supervisor.id) for i in range(2)]
+        db.session.add_all(employees)
+        leave_type = LeaveType(name='إجازة بمرفق للاختبار', max_days=30, requires_attachment=True)
+        db.session.add(leave_type)
+        db.session.commit()
+        return {'employees': [e.national_id for e in employees], 'leave_type': leave_type.id}
+
+
+def _submit(client, national_id, leave_type_id, content, filename='report.pdf'):
+    return client.post('/employee/leave-request', data={
+        'national_id': national_id, 'leave_type_id': leave_type_id, 'reason': 'مرض',
+        'start_date': date.today().isoformat(), 'end_date': date.today().isoformat(),
+        'attachment': (io.BytesIO(content), filename),
+    }, content_type='multipart/form-data')
+
+
+def _login(app, national_id):
+    client = app.test_client()
+    client.post('/login', data={'national_id': national_id, 'password': 'pass123'})
+    return client
+
+
+def test_identical_uploads_are_stored_once(app, people):
+    client = app.test_client()
+    for national_id in people['employees']:
+        assert _submit(client, national_id, people['leave_type'], REPORT).status_code == 200
+    # نوع غير مسموح لا يحفظ
+    _submit(client, people['employees'][0], people['leave_type'], b'<html>', 'page.html')
+
+    with app.app_context():
+        digests = {r.attachment_digest for r in LeaveRequest.query.filter_by(leave_type_id=people['leave_type'])}
+        assert len(digests) == 1
+        attachment = db.session.get(Attachment, digests.pop())
+        assert (attachment.ref_count, attachment.size, attachment.mimetype) == (2, len(REPORT), 'application/pdf')
+        with open(attachment_path(attachment.digest), 'rb') as f:
+            assert f.read() == REPORT
+        folder = app.config['ATTACHMENT_STORE_FOLDER']
+        assert not [name for name in os.listdir(folder) if name.endswith('.tmp')]
+
+
+def test_attachment_is_served_with_cache_validation_and_ranges(app, people):
+    with app.app_context():
+        digest = LeaveRequest.query.filter_by(leave_type_id=people['leave_type']).first().attachment_digest
+    url = f'/attachments/{digest}'
+
+    assert _login(app, '3300000002').get(url).status_code == 404
+
+    client = _login(app, '3300000001')
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.data == REPORT
+    assert response.headers['ETag'] == f'"{digest}"'
+    cache_control = response.headers['Cache-Control']
+    assert 'immutable' in cache_control and 'private' in cache_control and 'public' not in cache_control
+
+    assert client.get(url, headers={'If-None-Match': f'"{digest}"'}).status_code == 304
+    partial = client.get(url, headers={'Range': 'bytes=0-7'})
+    assert partial.status_code == 206
+    assert partial.data == REPORT[:8]
+
+
+def test_content_is_removed_when_no_request_references_it(app, people):
+    with app.app_context():
+        requests = LeaveRequest.query.filter_by(leave_type_id=people['leave_type']).all()
+        digest = requests[0].attachment_digest
+        # الطلب الأول فقط انتهت مدته
+        requests[0].created_at = datetime.utcnow() - timedelta(days=100)
+        db.session.commit()
+
+        sweep_attachments(60)
+        assert db.session.get(Attachment, digest).ref_count == 1
+        assert os.path.exists(attachment_path(digest))
+
+        requests[1].created_at = datetime.utcnow() - timedelta(days=100)
+        db.session.commit()
+        assert sweep_attachments(60) == (1, len(REPORT))
+        assert db.session.get(Attachment, digest) is None
+        assert not os.path.exists(attachment_path(digest))
+
+
+def test_upload_recreates_content_removed_by_concurrent_purge(app, people, monkeypatch):
+    content = b'%PDF-1.4 purged while uploading ' * 50
+    digest = hashlib.sha256(content).hexdigest()
+    client = app.test_client()
+    assert _submit(client, people['employees'][0], people['leave_type'], content).status_code == 200
+
+    add_reference = attachment_store._add_reference
+
+    def purged_meanwhile(*args):
+        # الحذف الدوري حذف الملف بين فحص الرفع للمحتوى وزيادة عداده
+        os.remove(attachment_path(digest))
+        add_reference(*args)
+
+    monkeypatch.setattr(attachment_store, '_add_reference', purged_meanwhile)
+    assert _submit(client, people['employees'][1], people['leave_type'], content).status_code == 200
+
+    with app.app_context():
+        assert db.session.get(Attachment, digest).ref_count == 2
+        with open(attachment_path(digest), 'rb') as f:
+            assert f.read() == content
+
+
+def test_purge_removes_old_files_without_rows(app):
+    with app.app_context():
+        old = time.time() - app.config['ATTACHMENT_ORPHAN_GRACE_SECONDS'] - 60
+        paths = {}
+        for name in ('old', 'recent'):
+            digest = hashlib.sha256(name.encode()).hexdigest()
+            paths[name] = (attachment_path(digest), thumbnail_path(digest))
+            os.makedirs(os.path.dirname(paths[name][0]), exist_ok=True)
+            for path in paths[name]:
+                with open(path, 'wb') as f:
+                    f.write(b'x' * 10)
+                if name == 'old':
+                    os.utime(path, (old, old))
+        leftover = os.path.join(app.config['ATTACHMENT_STORE_FOLDER'], 'upload.tmp')
+        with open(leftover, 'wb') as f:
+            f.write(b'x')
+        os.utime(leftover, (old, old))
+
+        # ملف بقي بعد تراجع معاملة الرفع يحذف بعد المهلة، والأحدث قد يكون لرفع لم يصل commit
+        assert purge_attachments() == (1, 10)
+        assert not any(os.path.exists(path) for path in paths['old'])
+        assert all(os.path.exists(path) for path in paths['recent'])
+        assert not os.path.exists(leftover)
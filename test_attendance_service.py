@@ -0,0 +1,102 @@
+"""
+اختبار حفظ دفعات الحضور - الحقول غير المرسلة تبقى كما هي
+"""
+from datetime import date
+import pytest
+from models import db, User, Role, Attendance, AbsenceStatus, ActivityLog
+from attendance_service import save_attendance_batch
+from attendance_summary import status_counts
+
+DAY = date(2023, 4, 2)
+
+
+@pytest.fixture(scope='module')
+def team(app):
+    with app.app_context():
+        supervisor = User(national_id='3100000001', name='مشرف الدفعات', role=Role.MAIN_SUPERVISOR,
+                          gender='ذكر', password_pending=True)
+        db.session.add(supervisor)
+        db.session.flush()
+        employees = [
+            User(national_id=f'31000001{i:02d}', name=f'معلم الدفعات {i}', role=Role.EMPLOYEE, gender='ذكر',
+                 department='الحلقات', supervisor_id=supervisor.id, password_pending=True)
+            for i in range(4)
+        ]
+        db.session.add_all(employees)
+        db.session.commit()
+        return supervisor.id, [emp.id for emp in employees]
+
+
+def _record(employee_id, day):
+    record = Attendance.query.filter_by(employee_id=employee_id, date=day).one()
+    return record.status, record.absence_status_id, record.notes
+
+
+def test_mixed_batch_keeps_fields_left_out(app, team):
+    supervisor_id, ids = team
+    with app.app_context():
+        excused = AbsenceStatus.query.first()
+        save_attendance_batch([
+            {'employee_id': ids[0], 'date': DAY, 'status': 'غائب', 'absence_status_id': excused.id, 'notes': 'مريض'},
+            {'employee_id': ids[1], 'date': DAY, 'status': 'حاضر', 'notes': 'متأخر'},
+        ], supervisor_id)
+        db.session.commit()
+
+        # دفعة مختلطة: الأول دون ملاحظات أو حالة غياب، والثاني بملاحظات جديدة، والثالث جديد
+        results = save_attendance_batch([
+            {'employee_id': ids[0], 'date': DAY, 'status': 'غائب'},
+            {'employee_id': ids[1], 'date': DAY, 'status': 'غائب', 'notes': 'خرج مبكراً'},
+            {'employee_id': ids[2], 'date': DAY, 'status': 'حاضر'},
+        ], supervisor_id)
+        db.session.commit()
+
+        assert [r['result'] for r in results] == ['updated', 'updated', 'created']
+        assert _record(ids[0], DAY) == ('غائب', excused.id, 'مريض')
+        assert _record(ids[1], DAY) == ('غائب', None, 'خرج مبكراً')
+        assert _record(ids[2], DAY) == ('حاضر', None, None)
+        assert status_counts(DAY, supervisor_id=supervisor_id) == {'غائب': 2, 'حاضر': 1}
+
+
+def test_batch_route_keeps_fields_left_out(app, team):
+    supervisor_id, ids = team
+    day = date(2023, 4, 3)
+    admin = app.test_client()
+    admin.post('/login', data={'national_id': '1000000000', 'password': 'admin123'})
+
+    response = admin.post('/admin/mark-attendance/batch', json={'date': day.isoformat(), 'records': [
+        {'employee_id': ids[0], 'status': 'حاضر', 'notes': 'ملاحظة أولى'},
+        {'employee_id': ids[3], 'status': 'غائب', 'notes': 'بدون إذن'},
+    ]})
+    assert response.get_json()['saved'] == 2
+
+    response = admin.post('/admin/mark-attendance/batch', json={'date': day.isoformat(), 'records': [
+        {'employee_id': ids[0], 'status': 'غائب'},
+        {'employee_id': ids[3], 'status': 'غائب', 'notes': ''},
+        {'employee_id': ids[1], 'status': 'حاضر'},
+    ]})
+    assert [r['result'] for r in response.get_json()['results']] == ['updated', 'updated', 'created']
+
+    with app.app_context():
+        assert _record(ids[0], day) == ('غائب', None, 'ملاحظة أولى')
+        assert _record(ids[3], day)[2] == ''
+        assert status_counts(day, supervisor_id=supervisor_id) == {'غائب': 2, 'حاضر': 1}
+
+
+def test_invalid_attendance_requests_are_rejected(app, team):
+    supervisor_id, ids = team
+    admin = app.test_client()
+    admin.post('/login', data={'national_id': '1000000000', 'password': 'admin123'})
+
+    response = admin.post('/admin/mark-attendance', json={'employee_id': ids[0], 'date': '2023-04-04', 'status': ''})
+    assert response.status_code == 400
+    assert admin.post('/admin/mark-attendance', json={
+        'employee_id': ids[0], 'date': 'not-a-date', 'status': 'حاضر'}).status_code == 400
+    assert admin.post('/admin/mark-attendance/batch', json={'date': '2023-04-04', 'records': 'x'}).status_code == 400
+
+    response = admin.post('/admin/mark-attendance/batch', json={'date': '2023-04-04', 'records': [
+        1, {'employee_id': ids[0], 'status': 'حاضر'}]})
+    assert [r['result'] for r in response.get_json()['results']] == ['invalid', 'created']
+
+    with app.app_context():
+        assert Attendance.query.filter_by(date=date(2023, 4, 4)).count() == 1
+        assert ActivityLog.query.filter(ActivityLog.details.like('%بتاريخ 2023-04-04: %')).count() == 0
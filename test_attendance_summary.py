@@ -0,0 +1,98 @@
+"""
+اختبار ملخص الحضور اليومي - التحديث بالفروقات يطابق إعادة البناء
+"""
+from datetime import date
+from sqlalchemy import update
+from models import db, User, Role, AttendanceDailySummary
+from attendance_service import save_attendance_batch
+from attendance_summary import (rebuild_attendance_summary, discount_employee_attendance, status_counts,
+                                reattribute_attendance)
+from user_deletion import delete_users
+
+DAY = date(2023, 3, 1)
+
+
+def _summary():
+    return {
+        (row.date, row.supervisor_id, row.department, row.status): row.count
+        for row in AttendanceDailySummary.query.filter_by(date=DAY).all()
+    }
+
+
+def test_summary_follows_attendance_writes(app):
+    with app.app_context():
+        supervisor = User(national_id='2700000001', name='مشرف الملخص', role=Role.MAIN_SUPERVISOR,
+                          gender='ذكر', password_pending=True)
+        db.session.add(supervisor)
+        db.session.flush()
+        employees = [
+            User(national_id=f'460000000{i}', name=f'معلم الملخص {i}', role=Role.EMPLOYEE, gender='ذكر',
+                 department='الحلقات', supervisor_id=supervisor.id, password_pending=True)
+            for i in range(3)
+        ]
+        db.session.add_all(employees)
+        db.session.flush()
+        ids = [emp.id for emp in employees]
+
+        save_attendance_batch([{'employee_id': i, 'date': DAY, 'status': 'حاضر'} for i in ids], supervisor.id)
+        db.session.commit()
+        assert status_counts(DAY, supervisor_id=supervisor.id) == {'حاضر': 3}
+
+        # تغيير حالة سجل موجود ينقل العدد بين الحالتين
+        save_attendance_batch([{'employee_id': ids[0], 'date': DAY, 'status': 'غائب'}], supervisor.id)
+        db.session.commit()
+        assert status_counts(DAY, supervisor_id=supervisor.id) == {'حاضر': 2, 'غائب': 1}
+
+        incremental = _summary()
+        rebuild_attendance_summary(DAY, DAY)
+        db.session.commit()
+        assert _summary() == incremental
+
+        discount_employee_attendance(ids[:2])
+        db.session.commit()
+        assert status_counts(DAY, supervisor_id=supervisor.id) == {'حاضر': 1}
+
+
+def test_summary_follows_reassigned_employees(app):
+    day = date(2023, 3, 2)
+    with app.app_context():
+        old, new = [User(national_id=f'270000001{i}', name=f'مشرف النقل {i}', role=Role.MAIN_SUPERVISOR,
+                         gender='ذكر', password_pending=True) for i in range(2)]
+        db.session.add_all([old, new])
+        db.session.flush()
+        employees = [
+            User(national_id=f'460000001{i}', name=f'معلم النقل {i}', role=Role.EMPLOYEE, gender='ذكر',
+                 department='الحلقات', supervisor_id=old.id, password_pending=True)
+            for i in range(2)
+        ]
+        db.session.add_all(employees)
+        db.session.flush()
+        ids = [emp.id for emp in employees]
+        save_attendance_batch([{'employee_id': ids[0], 'date': day, 'status': 'حاضر'},
+                               {'employee_id': ids[1], 'date': day, 'status': 'غائب'}], old.id)
+        db.session.commit()
+        old_id, new_id = old.id, new.id
+
+        with reattribute_attendance(ids[:1]):
+            db.session.execute(update(User).where(User.id == ids[0]).values(supervisor_id=new_id))
+        db.session.commit()
+        assert status_counts(day, supervisor_id=old_id) == {'غائب': 1}
+        assert status_counts(day, supervisor_id=new_id) == {'حاضر': 1}
+
+        # حذف المشرف ينقل حضور موظفيه إلى "بدون مشرف"
+        delete_users(User.id == old_id)
+        db.session.commit()
+        assert status_counts(day, supervisor_id=old_id) == {}
+        assert status_counts(day, supervisor_id=0) == {'غائب': 1}
+
+        incremental = _summary_for(day)
+        rebuild_attendance_summary(day, day)
+        db.session.commit()
+        assert _summary_for(day) == incremental
+
+
+def _summary_for(day):
+    return {
+        (row.supervisor_id, row.department, row.status): row.count
+        for row in AttendanceDailySummary.query.filter_by(date=day).all()
+    }
@@ -0,0 +1,65 @@
+"""
+اختبار تسجيل النشاطات مع معاملة العملية وفي المخزن المؤجل
+"""
+import pytest
+from flask_login import login_user
+from sqlalchemy import event
+from models import db, User, Role, ActivityLog
+from audit import log_activity, flush_activity_log
+
+
+@pytest.fixture(scope='module')
+def employee_id(app):
+    with app.app_context():
+        employee = User(national_id='3500000001', name='معلم التدقيق', role=Role.EMPLOYEE, gender='ذكر')
+        db.session.add(employee)
+        db.session.commit()
+        return employee.id
+
+
+def _logs(details):
+    return ActivityLog.query.filter_by(details=details).count()
+
+
+def test_activity_is_saved_with_the_action_commit(app, employee_id):
+    admin = app.test_client()
+    admin.post('/login', data={'national_id': '1000000000', 'password': 'admin123'})
+
+    with app.app_context():
+        engine = db.engine
+    commits = []
+    listener = lambda conn: commits.append(conn)
+    event.listen(engine, 'commit', listener)
+    try:
+        response = admin.post(f'/admin/leave_balance/update/{employee_id}', json={'balance': 12})
+    finally:
+        event.remove(engine, 'commit', listener)
+
+    assert response.get_json()['success']
+    assert len(commits) == 1
+    with app.app_context():
+        assert _logs('تم تحديث رصيد إجازة معلم التدقيق من 0 إلى 12') == 1
+
+
+def test_activity_is_discarded_with_rollback(app):
+    with app.test_request_context():
+        login_user(User.query.filter_by(national_id='1000000000').first())
+        log_activity('اختبار', 'موظف', None, 'نشاط تراجع')
+        db.session.rollback()
+        assert _logs('نشاط تراجع') == 0
+
+
+def test_buffered_activity_is_flushed_in_batches(app):
+    app.config['AUDIT_MODE'] = 'buffered'
+    try:
+        with app.test_request_context():
+            login_user(User.query.filter_by(national_id='1000000000').first())
+            for _ in range(3):
+                log_activity('اختبار', 'موظف', None, 'نشاط مؤجل')
+            assert not db.session.new
+    finally:
+        app.config['AUDIT_MODE'] = 'transaction'
+
+    flush_activity_log()
+    with app.app_context():
+        assert _logs('نشاط مؤجل') == 3
@@ -45,7 +45,7 @@ def test_certificate_system():
             else:
                 print("✗ جدول الشهادات غير موجود!")
                 print("\nالرجاء تشغيل:")
-                print("  python update_db_certificates.py")
+                print("  python migrate_db.py")
                 
         except Exception as e:
             print(f"\n✗ خطأ أثناء الاختبار: {str(e)}")
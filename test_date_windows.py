@@ -0,0 +1,36 @@
+"""
+اختبار فترات التاريخ نصف المفتوحة
+"""
+from datetime import date
+from sqlalchemy import select
+from werkzeug.datastructures import MultiDict
+from models import db, Attendance
+from date_windows import month_window, year_window, in_window, overlap_days, requested_month
+
+
+def test_windows_are_half_open():
+    assert month_window(2024, 2) == (date(2024, 2, 1), date(2024, 3, 1))
+    assert month_window(2024, 12) == (date(2024, 12, 1), date(2025, 1, 1))
+    assert year_window(2024) == (date(2024, 1, 1), date(2025, 1, 1))
+
+    window = month_window(2024, 1)
+    assert overlap_days(window, date(2023, 12, 30), date(2024, 1, 2)) == 2
+    assert overlap_days(window, date(2024, 1, 31), date(2024, 2, 5)) == 1
+    assert overlap_days(window, date(2024, 2, 1), date(2024, 2, 5)) == 0
+
+
+def test_requested_month_falls_back_to_today():
+    today = date(2024, 5, 10)
+    assert requested_month(MultiDict({'year': '2023', 'month': '11'}), today) == (2023, 11)
+    assert requested_month(MultiDict({'month': '13'}), today) == (2024, 5)
+    assert requested_month(MultiDict({'month': 'x'}), today) == (2024, 5)
+
+
+def test_month_filter_is_an_index_range(app):
+    stmt = select(Attendance.id).where(Attendance.employee_id == 1,
+                                       in_window(Attendance.date, month_window(2024, 1)))
+    with app.app_context():
+        sql = str(stmt.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+        with db.engine.connect() as conn:
+            plan = [row[3] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql)]
+    assert any('date>? AND date<?' in line for line in plan)
@@ -0,0 +1,58 @@
+"""
+اختبار استيراد الموظفين على دفعات من ملف Excel
+"""
+from io import BytesIO
+from openpyxl import Workbook
+from conftest import count_queries
+from models import db, User, Role
+from employee_import import import_employees, IMPORT_CHUNK_SIZE
+
+ROWS = IMPORT_CHUNK_SIZE + 20
+
+
+def _workbook(rows):
+    wb = Workbook()
+    sheet = wb.active
+    sheet.append(['الاسم', 'الهوية', 'الفترة', 'الوقت', 'الراحة', 'القسم', 'الجنس'])
+    for row in rows:
+        sheet.append(row)
+    buffer = BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def test_import_spans_chunks_and_updates_existing(app):
+    with app.app_context():
+        db.session.add(User(national_id='3000100000', name='معلم موجود', role=Role.EMPLOYEE,
+                            gender='ذكر', department='الحلقات', period='الأولى', password_pending=True))
+        db.session.commit()
+
+    rows = [[f'معلم مستورد {i}', f'30001{i:05d}', 'الثانية', '7-12', 'الجمعة', 'الحلقات', 'ذكر']
+            for i in range(ROWS)]
+    # هوية مكررة في الدفعة الثانية تحدث الصف المضاف في الدفعة الأولى
+    rows.append(['معلم مكرر', '3000100001', 'الثالثة', '1-5', 'السبت', 'الإدارة', 'ذكر'])
+    rows.append([None] * 7)
+
+    progress = []
+    with count_queries(app) as statements:
+        with app.app_context():
+            added, updated = import_employees(_workbook(rows), progress=lambda *args: progress.append(args))
+            db.session.commit()
+
+    # الصف الأول (3000100000) موجود مسبقاً، والمكرر يحدث صفاً مضافاً
+    assert (added, updated) == (ROWS - 1, 2)
+    assert progress == [(IMPORT_CHUNK_SIZE, IMPORT_CHUNK_SIZE - 1, 1), (ROWS + 1, ROWS - 1, 2)]
+    # لكل دفعة: استعلام IN للموجودين، تحديث وإدخال جماعي، ثم جلب معرفات المضافين،
+    # واستعلاما نقل حضور المكرر في ملخص الحضور لأن قسمه تغير،
+    # واستعلام زيادة عداد إصدار المستخدمين عند commit
+    assert len(statements) == 2 * 4 + 2 + 1
+    assert statements[-1].startswith('UPDATE data_versions')
+
+    with app.app_context():
+        imported = User.query.filter(User.national_id.like('30001%'))
+        assert imported.count() == ROWS
+        assert User.query.filter_by(national_id='3000100000').one().period == 'الثانية'
+        duplicate = User.query.filter_by(national_id='3000100001').one()
+        assert (duplicate.name, duplicate.period, duplicate.department) == ('معلم مستورد 1', 'الثالثة', 'الإدارة')
+        assert imported.filter_by(password_pending=True).count() == ROWS
@@ -0,0 +1,69 @@
+"""
+اختبار تصدير التقارير إلى Excel و CSV
+"""
+import csv
+from datetime import date
+from io import BytesIO, StringIO
+import openpyxl
+import pytest
+from models import db, User, Role, Attendance
+import exports
+
+
+@pytest.fixture(scope='module')
+def admin(app):
+    with app.app_context():
+        employee = User.query.filter_by(national_id='4200000001').first()
+        if not employee:
+            employee = User(national_id='4200000001', name='معلم التصدير', role=Role.EMPLOYEE, gender='ذكر')
+            db.session.add(employee)
+            db.session.flush()
+            for day in range(1, 6):
+                db.session.add(Attendance(employee_id=employee.id, date=date(2024, 1, day), status='حاضر'))
+            db.session.commit()
+
+    client = app.test_client()
+    assert client.post('/login', data={'national_id': '1000000000', 'password': 'admin123'}).status_code == 302
+    return client
+
+
+def test_csv_export_streams_in_batches(admin, monkeypatch):
+    monkeypatch.setattr(exports, 'EXPORT_BATCH_SIZE', 2)
+    response = admin.get('/admin/export/attendance.csv?start_date=2024-01-01&end_date=2024-01-31')
+    assert response.status_code == 200
+    assert response.is_streamed
+
+    chunks = list(response.response)
+    assert len(chunks) > 1
+    rows = list(csv.reader(StringIO(b''.join(chunks).decode('utf-8-sig'))))
+    assert rows[0][0] == 'الموظف'
+    assert [row[2] for row in rows[1:] if row[1] == '4200000001'] == [f'2024-01-0{day}' for day in range(5, 0, -1)]
+
+
+def test_xlsx_export(admin):
+    response = admin.get('/admin/export/schedules.xlsx')
+    assert response.status_code == 200
+    sheet = openpyxl.load_workbook(BytesIO(response.data)).active
+    rows = list(sheet.iter_rows(values_only=True))
+    assert rows[0][0] == 'الاسم'
+    assert ('معلم التصدير', '4200000001') in [row[:2] for row in rows[1:]]
+
+    assert admin.get('/admin/export/unknown.xlsx').status_code == 404
+
+
+def test_formula_values_are_escaped(app, admin):
+    with app.app_context():
+        employee = User(national_id='4200000002', name='=HYPERLINK("http://x","y")', role=Role.EMPLOYEE,
+                        gender='ذكر', department='@الحلقات', work_time='-7+1', period='+الأولى')
+        db.session.add(employee)
+        db.session.commit()
+
+    rows = list(csv.reader(StringIO(admin.get('/admin/export/schedules.csv').data.decode('utf-8-sig'))))
+    row = next(row for row in rows if row[1] == '4200000002')
+    assert row[0] == '\'=HYPERLINK("http://x","y")'
+    assert row[2:4] == ["'+الأولى", "'-7+1"]
+    assert row[5] == "'@الحلقات"
+
+    sheet = openpyxl.load_workbook(BytesIO(admin.get('/admin/export/schedules.xlsx').data)).active
+    row = next(row for row in sheet.iter_rows(values_only=True) if row[1] == '4200000002')
+    assert row[0] == '\'=HYPERLINK("http://x","y")'
@@ -0,0 +1,78 @@
+"""
+اختبار الذاكرة المؤقتة لهوية المستخدم المسجل
+"""
+import pytest
+from flask_login.utils import encode_cookie
+from conftest import count_queries
+from models import db, User, Role
+from identity_cache import load_identity
+
+DASHBOARD = '/employee/dashboard'
+
+
+def _login(app, national_id):
+    with app.app_context():
+        if not User.query.filter_by(national_id=national_id).first():
+            db.session.add(User(national_id=national_id, name='معلم الهوية', role=Role.EMPLOYEE,
+                                gender='ذكر', password_pending=True))
+            db.session.commit()
+    client = app.test_client()
+    assert client.post('/login', data={'national_id': national_id, 'password': national_id}).status_code == 302
+    assert client.get(DASHBOARD).status_code == 200
+    return client
+
+
+def _update_user(app, national_id, **changes):
+    with app.app_context():
+        user = User.query.filter_by(national_id=national_id).first()
+        for name, value in changes.items():
+            if name == 'password':
+                user.set_password(value)
+            else:
+                setattr(user, name, value)
+        db.session.commit()
+
+
+def test_cached_identity_skips_user_lookup(app):
+    client = _login(app, '4500000001')
+    with count_queries(app) as statements:
+        client.get(DASHBOARD)
+    assert not [s for s in statements if s.lstrip().startswith('SELECT users.') and 'WHERE users.id = ?' in s]
+
+
+@pytest.mark.parametrize('national_id, changes', [
+    ('4500000002', {'is_active': False}),
+    ('4500000003', {'password': 'new-password'}),
+    ('4500000004', {'role': Role.SUB_SUPERVISOR}),
+])
+def test_security_change_ends_session(app, national_id, changes):
+    client = _login(app, national_id)
+    _update_user(app, national_id, **changes)
+    response = client.get(DASHBOARD)
+    assert response.status_code == 302
+    assert '/login' in response.headers['Location']
+
+
+def test_session_without_stamp_is_rejected(app):
+    client = _login(app, '4500000005')
+    with app.app_context():
+        user_id = User.query.filter_by(national_id='4500000005').one().id
+    # جلسة وملف "تذكرني" صادران قبل ختم الأمان: رقم المستخدم فقط (والمستخدم في الذاكرة المؤقتة)
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    with app.test_request_context():
+        client.set_cookie('remember_token', encode_cookie(str(user_id)))
+    response = client.get(DASHBOARD)
+    assert response.status_code == 302
+    assert '/login' in response.headers['Location']
+
+
+def test_profile_change_refreshes_cached_identity(app):
+    client = _login(app, '4500000041')
+    _update_user(app, '4500000041', name='معلم بعد التعديل', leave_balance=7)
+
+    assert 'معلم بعد التعديل' in client.get(DASHBOARD).data.decode()
+    with app.app_context():
+        session_id = User.query.filter_by(national_id='4500000041').one().get_id()
+    with app.app_context():
+        assert load_identity(session_id).leave_balance == 7
@@ -0,0 +1,67 @@
+"""
+اختبار معالجة صور المرفقات والصور المصغرة في قائمة طلبات الإجازات
+"""
+import io
+from datetime import date
+from PIL import Image
+from models import db, User, Role, LeaveType, LeaveRequest, Attachment
+from attachment_store import attachment_path, thumbnail_path
+
+
+def _photo():
+    """صورة جوال بالعرض مع اتجاه تصوير عمودي وبيانات EXIF"""
+    image = Image.new('RGB', (4000, 3000), 'red')
+    exif = image.getexif()
+    exif[0x0112] = 6
+    exif[0x010F] = 'PhoneMaker'
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', exif=exif.tobytes(), quality=95)
+    return buffer.getvalue()
+
+
+def _submit(client, leave_type_id, content):
+    return client.post('/employee/leave-request', data={
+        'national_id': '3200000101', 'leave_type_id': leave_type_id, 'reason': 'مرض',
+        'start_date': date.today().isoformat(), 'end_date': date.today().isoformat(),
+        'attachment': (io.BytesIO(content), 'photo.jpg'),
+    }, content_type='multipart/form-data')
+
+
+def test_photos_are_reencoded_with_thumbnails(app):
+    with app.app_context():
+        supervisor = User(national_id='3200000001', name='مشرف الصور', role=Role.MAIN_SUPERVISOR, gender='ذكر')
+        supervisor.set_password('pass123')
+        db.session.add(supervisor)
+        db.session.flush()
+        db.session.add(User(national_id='3200000101', name='معلم الصور', role=Role.EMPLOYEE,
+                            gender='ذكر', supervisor_id=supervisor.id))
+        leave_type = LeaveType(name='إجازة بصورة للاختبار', max_days=30, requires_attachment=True)
+        db.session.add(leave_type)
+        db.session.commit()
+        leave_type_id = leave_type.id
+
+    client = app.test_client()
+    photo = _photo()
+    assert _submit(client, leave_type_id, photo).status_code == 200
+    # ملف بامتداد صورة وليس صورة لا يحفظ
+    _submit(client, leave_type_id, b'not an image')
+
+    with app.app_context():
+        requests = LeaveRequest.query.filter_by(leave_type_id=leave_type_id).all()
+        assert len(requests) == 1
+        digest = requests[0].attachment_digest
+        attachment = db.session.get(Attachment, digest)
+        assert attachment.size < len(photo)
+        with Image.open(attachment_path(digest)) as stored:
+            # مدورة حسب اتجاه التصوير ومصغرة ودون بيانات وصفية
+            assert stored.size == (1500, 2000)
+            assert not stored.getexif()
+        with Image.open(thumbnail_path(digest)) as thumb:
+            assert max(thumb.size) == app.config['ATTACHMENT_THUMBNAIL_SIZE']
+
+    supervisor = app.test_client()
+    supervisor.post('/login', data={'national_id': '3200000001', 'password': 'pass123'})
+    assert f'/attachments/{digest}/thumbnail'.encode() in supervisor.get('/supervisor/leave-requests').data
+    response = supervisor.get(f'/attachments/{digest}/thumbnail')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
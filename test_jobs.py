@@ -0,0 +1,98 @@
+"""
+اختبار مهام الخلفية للتقارير والاستيراد
+"""
+import time
+from datetime import datetime, timedelta
+from io import BytesIO
+import openpyxl
+import pytest
+import jobs
+from models import db, User, Job, JobStatus
+
+
+def _wait(client, location):
+    status_url = location + '/status'
+    for _ in range(100):
+        job = client.get(status_url).get_json()
+        if job['finished']:
+            return job
+        time.sleep(0.1)
+    pytest.fail('لم تكتمل المهمة')
+
+
+@pytest.fixture(scope='module')
+def admin(app):
+    client = app.test_client()
+    assert client.post('/login', data={'national_id': '1000000000', 'password': 'admin123'}).status_code == 302
+    return client
+
+
+def test_report_job_produces_downloadable_pdf(app, admin):
+    response = admin.post('/jobs/reports/schedules_pdf', data={'gender': 'ذكر'})
+    assert response.status_code == 302
+
+    job = _wait(admin, response.location)
+    assert not job['failed'], job['message']
+
+    download = admin.get(job['download_url'])
+    assert download.status_code == 200
+    assert download.mimetype == 'application/pdf'
+    assert download.data.startswith(b'%PDF')
+
+    # المهمة لا يراها إلا من طلبها
+    other = app.test_client()
+    other.post('/login', data={'national_id': '1000000000', 'password': 'wrong'})
+    assert other.get(job['download_url']).status_code in (302, 401)
+
+
+def test_import_job_reports_result(app, admin):
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.append(['الاسم', 'الهوية', 'الفترة', 'الوقت', 'الراحة', 'القسم', 'الجنس'])
+    for i in range(3):
+        sheet.append([f'معلم مستورد {i}', f'440000000{i}', 'الأولى', '4م-8م', 'الجمعة', 'الحلقات', 'ذكر'])
+    upload = BytesIO()
+    wb.save(upload)
+    upload.seek(0)
+
+    response = admin.post('/admin/employees/upload', data={'file': (upload, 'employees.xlsx')},
+                          content_type='multipart/form-data')
+    assert response.status_code == 302
+
+    job = _wait(admin, response.location)
+    assert not job['failed'], job['message']
+    assert job['download_url'] is None
+    assert 'تم إضافة 3' in job['message']
+
+    with app.app_context():
+        assert User.query.filter(User.national_id.like('440000000%')).count() == 3
+
+
+def test_purge_keeps_jobs_that_are_still_alive(app):
+    now = datetime.utcnow()
+    long_ago = now - timedelta(days=2)
+    with app.app_context():
+        admin_id = User.query.filter_by(national_id='1000000000').one().id
+        states = {
+            # يحملها هذا العامل ولو توقف نبضها
+            'local': (JobStatus.RUNNING, long_ago),
+            # ينفذها عامل آخر ما زال ينبض
+            'remote': (JobStatus.RUNNING, now),
+            # توقف العامل الذي كان ينفذها
+            'lost': (JobStatus.RUNNING, long_ago),
+            'done': (JobStatus.DONE, long_ago),
+        }
+        for name, (status, heartbeat_at) in states.items():
+            db.session.add(Job(id=f'purge{name}', kind='users_delete', status=status, created_by=admin_id,
+                               created_at=long_ago, heartbeat_at=heartbeat_at))
+        db.session.commit()
+
+        jobs._active.add('purgelocal')
+        try:
+            jobs.purge_jobs()
+        finally:
+            jobs._active.discard('purgelocal')
+
+        remaining = dict(db.session.query(Job.id, Job.status).filter(Job.id.like('purge%')).all())
+        assert remaining == {'purgelocal': JobStatus.RUNNING, 'purgeremote': JobStatus.RUNNING,
+                             'purgelost': JobStatus.FAILED}
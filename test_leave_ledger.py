@@ -0,0 +1,77 @@
+"""
+اختبار سجل الإجازات المستهلكة
+"""
+from datetime import date
+import pytest
+from models import db, User, Role, LeaveType, LeaveRequest, LeaveLedger
+from leave_ledger import days_by_year, consumed_days, quota_exceeded, reconcile_leave_ledger, rebuild_leave_ledger
+
+
+@pytest.fixture(scope='module')
+def employee_id(app):
+    with app.app_context():
+        employee = User(national_id='4100000001', name='معلم الإجازات', role=Role.EMPLOYEE, gender='ذكر')
+        db.session.add(employee)
+        db.session.commit()
+        return employee.id
+
+
+def _leave_type(name='إجازة سنوية'):
+    return LeaveType.query.filter_by(name=name).first()
+
+
+def test_days_are_split_across_years():
+    assert days_by_year(date(2024, 12, 28), date(2025, 1, 3)) == {2024: 4, 2025: 3}
+    assert days_by_year(date(2025, 3, 1), date(2025, 3, 1)) == {2025: 1}
+
+
+def test_review_updates_ledger(app, employee_id):
+    with app.app_context():
+        leave_type = _leave_type()
+        leave = LeaveRequest(employee_id=employee_id, leave_type_id=leave_type.id, start_date=date(2030, 12, 30),
+                             end_date=date(2031, 1, 2), days_count=4, reason='سفر')
+        db.session.add(leave)
+        db.session.commit()
+        leave_id, leave_type_id = leave.id, leave_type.id
+
+    admin = app.test_client()
+    admin.post('/login', data={'national_id': '1000000000', 'password': 'admin123'})
+
+    admin.post(f'/admin/review-leave/{leave_id}', data={'action': 'approve'})
+    with app.app_context():
+        assert consumed_days(employee_id, leave_type_id, [2030, 2031]) == {2030: 2, 2031: 2}
+
+    admin.post(f'/admin/review-leave/{leave_id}', data={'action': 'reject'})
+    with app.app_context():
+        assert consumed_days(employee_id, leave_type_id, [2030, 2031]) == {2030: 0, 2031: 0}
+
+
+def test_quota_uses_ledger_per_year(app, employee_id):
+    with app.app_context():
+        leave_type = _leave_type()
+        db.session.add(LeaveRequest(employee_id=employee_id, leave_type_id=leave_type.id, status='مقبول',
+                                    start_date=date(2032, 12, 1), end_date=date(2032, 12, 20), days_count=20,
+                                    reason='سفر'))
+        db.session.flush()
+        rebuild_leave_ledger()
+        db.session.commit()
+
+        # 21 يوماً في السنة: يوم واحد متبق في 2032 والسنة التالية فارغة
+        assert not quota_exceeded(employee_id, leave_type, date(2032, 12, 31), date(2033, 1, 15))
+        assert quota_exceeded(employee_id, leave_type, date(2032, 12, 30), date(2033, 1, 2))
+
+
+def test_reconcile_detects_and_fixes_drift(app, employee_id):
+    with app.app_context():
+        rebuild_leave_ledger()
+        db.session.commit()
+        assert reconcile_leave_ledger() == []
+
+        entry = LeaveLedger.query.filter_by(employee_id=employee_id, year=2032).first()
+        entry.days += 5
+        db.session.commit()
+        assert [row[:3] for row in reconcile_leave_ledger()] == [(employee_id, entry.leave_type_id, 2032)]
+
+        rebuild_leave_ledger()
+        db.session.commit()
+        assert reconcile_leave_ledger() == []
@@ -0,0 +1,55 @@
+"""
+اختبار ترحيلات قاعدة البيانات وخطط الاستعلامات الساخنة
+"""
+from sqlalchemy import create_engine, inspect, select, text
+import migrations
+from migrations.plans import check_hot_queries
+from models import db, User
+from data_versions import TRACKED_TABLES
+
+
+def test_hot_queries_use_indexes(app):
+    with app.app_context():
+        assert migrations.current_version(db.engine) == migrations.REVISIONS[-1].revision
+        assert check_hot_queries(db.engine) == {}
+
+
+def test_check_reports_full_table_scan(app):
+    with app.app_context():
+        failures = check_hot_queries(db.engine, {
+            'users_by_name': lambda: select(User).where(User.name == 'اختبار'),
+        })
+    assert list(failures) == ['users_by_name']
+
+
+def test_check_skips_unsupported_dialect():
+    engine = create_engine('sqlite://')
+    engine.dialect.name = 'mysql'
+    assert check_hot_queries(engine) is None
+
+
+def test_upgrade_legacy_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    db.metadata.create_all(engine)
+    # إرجاع القاعدة إلى بنية ما قبل الترحيلات
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_users_supervisor_role"))
+        conn.execute(text("DROP INDEX ix_attendance_date_status"))
+        conn.execute(text("ALTER TABLE users DROP COLUMN password_pending"))
+        conn.execute(text("ALTER TABLE leave_types DROP COLUMN deduct_from_balance"))
+        conn.execute(text("INSERT INTO leave_types (name, max_days) VALUES ('إجازة مرضية', 30), ('إجازة اعتيادية', 30)"))
+
+    assert migrations.upgrade(engine) == [module.revision for module in migrations.REVISIONS]
+    assert migrations.upgrade(engine) == []
+
+    inspector = inspect(engine)
+    assert 'password_pending' in {c['name'] for c in inspector.get_columns('users')}
+    assert 'ix_users_supervisor_role' in {i['name'] for i in inspector.get_indexes('users')}
+    assert 'ix_attendance_date_status' in {i['name'] for i in inspector.get_indexes('attendance')}
+    with engine.connect() as conn:
+        deduct = dict(conn.execute(text("SELECT name, deduct_from_balance FROM leave_types")).all())
+    assert deduct == {'إجازة مرضية': 0, 'إجازة اعتيادية': 1}
+    with engine.connect() as conn:
+        versions = dict(conn.execute(text("SELECT table_name, version FROM data_versions")).all())
+    assert versions == dict.fromkeys(TRACKED_TABLES, 0)
+    engine.dispose()
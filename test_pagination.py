@@ -0,0 +1,63 @@
+"""
+اختبار ترقيم الصفحات بالمؤشر
+"""
+import re
+from datetime import date, datetime, timedelta
+from models import db, User, Role, Attendance, ActivityLog
+from pagination import keyset_paginate, decode_cursor
+
+COLUMNS = [ActivityLog.created_at, ActivityLog.id]
+
+
+def test_pages_skip_null_keys_and_carry_the_offset(app):
+    with app.app_context():
+        now = datetime.utcnow()
+        for minutes in range(5):
+            db.session.add(ActivityLog(user_id=1, action='اختبار المؤشر', target_type='صفحة',
+                                       created_at=now - timedelta(minutes=minutes)))
+        db.session.flush()
+        query = ActivityLog.query.filter_by(action='اختبار المؤشر')
+        # سجلان قديمان دون created_at
+        query.filter(ActivityLog.created_at < now - timedelta(minutes=2)).update({'created_at': None})
+        db.session.commit()
+
+        pages = [keyset_paginate(query, COLUMNS, per_page=2)]
+        while pages[-1].has_next:
+            assert decode_cursor(pages[-1].next_cursor, COLUMNS) is not None
+            pages.append(keyset_paginate(query, COLUMNS, after=pages[-1].next_cursor, per_page=2))
+
+        # السجلات دون created_at لا تعرض ولا يعيد الصفحة الأولى بمؤشر لا يمكن قراءته
+        assert [len(page.items) for page in pages] == [2, 1]
+        assert [page.offset for page in pages] == [0, 2]
+        assert len({log.id for page in pages for log in page.items}) == 3
+
+
+def test_invalid_cursor_starts_from_the_first_page(app):
+    with app.app_context():
+        page = keyset_paginate(ActivityLog.query, COLUMNS, after='not-a-cursor', per_page=1)
+        assert page.offset == 0
+        assert decode_cursor('not-a-cursor', COLUMNS) is None
+
+
+def test_loaded_pages_continue_row_numbers(app, monkeypatch):
+    with app.app_context():
+        employee = User(national_id='3700000001', name='معلم الترقيم', role=Role.EMPLOYEE, gender='ذكر')
+        db.session.add(employee)
+        db.session.flush()
+        db.session.add_all([Attendance(employee_id=employee.id, date=date(2022, 5, day), status='حاضر')
+                            for day in range(1, 4)])
+        db.session.commit()
+        employee_id = employee.id
+
+    monkeypatch.setitem(app.config, 'LIST_PAGE_SIZE', 2)
+    admin = app.test_client()
+    admin.post('/login', data={'national_id': '1000000000', 'password': 'admin123'})
+
+    first = admin.get(f'/admin/reports/attendance?employee_id={employee_id}').data.decode()
+    next_url = re.search(r'href="([^"]+)" class="btn btn-outline-secondary load-more"', first).group(1)
+    second = admin.get(next_url.replace('&amp;', '&')).data.decode()
+
+    body = re.compile(r'<tbody id="report-attendance-body">.*?</tbody>', re.S)
+    numbers = lambda html: re.findall(r'<tr>\s*<td>(\d+)</td>', body.search(html).group(0))
+    assert numbers(first) == ['1', '2']
+    assert numbers(second) == ['3']
@@ -0,0 +1,57 @@
+"""
+اختبار كلمة المرور المؤجلة للموظفين المستوردين (رقم الهوية حتى أول دخول)
+"""
+from werkzeug.security import check_password_hash
+from models import db, User, Role
+
+
+def _pending_user(app, national_id):
+    with app.app_context():
+        db.session.add(User(national_id=national_id, name='معلم كلمة المرور', role=Role.EMPLOYEE,
+                            gender='ذكر', password_pending=True))
+        db.session.commit()
+
+
+def _login(app, national_id, password):
+    return app.test_client().post('/login', data={'national_id': national_id, 'password': password})
+
+
+def _stored(app, national_id):
+    with app.app_context():
+        user = User.query.filter_by(national_id=national_id).one()
+        return user.password_hash, user.password_pending
+
+
+def test_wrong_password_is_rejected_while_pending(app):
+    _pending_user(app, '3010000001')
+
+    assert _login(app, '3010000001', '3010000002').status_code == 200
+    assert _login(app, '3010000001', '').status_code == 200
+    assert _stored(app, '3010000001') == (None, True)
+
+
+def test_first_login_commits_the_hash(app):
+    _pending_user(app, '3010000011')
+
+    assert _login(app, '3010000011', '3010000011').status_code == 302
+    password_hash, pending = _stored(app, '3010000011')
+    assert not pending
+    assert check_password_hash(password_hash, '3010000011')
+
+    # الدخول التالي يتحقق من التشفير المحفوظ
+    assert _login(app, '3010000011', '3010000011').status_code == 302
+    assert _login(app, '3010000011', 'wrong').status_code == 200
+
+
+def test_national_id_change_keeps_old_id_as_password(app):
+    _pending_user(app, '3010000021')
+    with app.app_context():
+        user = User.query.filter_by(national_id='3010000021').one()
+        user.national_id = '3010000022'
+        db.session.commit()
+
+    password_hash, pending = _stored(app, '3010000022')
+    assert not pending
+    assert check_password_hash(password_hash, '3010000021')
+    assert _login(app, '3010000022', '3010000022').status_code == 200
+    assert _login(app, '3010000022', '3010000021').status_code == 302
@@ -0,0 +1,26 @@
+"""
+اختبار محرك تقارير PDF
+"""
+from reportlab.lib.units import cm
+from pdf_reports import ARABIC_FONT, ReportColumn, build_table_report, register_fonts, table_data
+from arabic_shaping import shape
+
+
+COLUMNS = [
+    ReportColumn('م', lambda row: str(row[0]), 2*cm, shaped=False),
+    ReportColumn('الحالة', lambda row: row[1], 4*cm),
+]
+
+
+def test_bundled_arabic_font_is_registered():
+    assert register_fonts() == ARABIC_FONT
+
+
+def test_table_data_shapes_text_columns_only():
+    assert table_data(COLUMNS, [(1, 'حاضر')]) == [[shape('م'), shape('الحالة')], ['1', shape('حاضر')]]
+
+
+def test_long_table_spans_pages():
+    pdf = build_table_report('تقرير', COLUMNS, [(i, 'حاضر') for i in range(300)]).getvalue()
+    assert pdf.startswith(b'%PDF')
+    assert pdf.count(b'/Type /Page\n') > 1
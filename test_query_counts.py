@@ -0,0 +1,124 @@
+"""
+اختبار عدد استعلامات SQL في صفحات القوائم
+
+عدد الاستعلامات في كل صفحة يجب أن يبقى ثابتاً مهما زاد عدد الصفوف المعروضة.
+"""
+from datetime import date
+from itertools import count as counter
+import pytest
+from conftest import count_queries
+from models import db, User, Role, LeaveRequest, LeaveType, Attendance, ActivityLog, AbsenceStatus
+
+SUPERVISOR_ID = '2900000001'
+EMPLOYEE_ID = '4900000001'
+
+ADMIN_PAGES = [
+    '/admin/dashboard',
+    '/admin/supervisors',
+    '/admin/employees',
+    '/admin/assign-employees',
+    '/admin/leave-requests?status=all',
+    '/admin/reports/leaves',
+    '/admin/reports/attendance',
+    '/admin/activity-logs',
+]
+
+SUPERVISOR_PAGES = [
+    '/supervisor/leave-requests',
+    '/supervisor/attendance-records',
+    '/supervisor/sub-supervisors',
+    '/supervisor/assign-to-subs',
+]
+
+EMPLOYEE_PAGES = [
+    '/employee/my-leaves',
+    '/employee/my-attendance',
+]
+
+# أرقام فريدة للبيانات المضافة في كل استدعاء
+_serial = counter()
+_seed_number = counter(1)
+
+
+def _seed(app, count):
+    """إضافة موظفين ومشرفين فرعيين مع طلبات إجازة وسجلات حضور ونشاطات"""
+    with app.app_context():
+        supervisor = User.query.filter_by(national_id=SUPERVISOR_ID).first()
+        if not supervisor:
+            supervisor = User(national_id=SUPERVISOR_ID, name='مشرف الاختبار',
+                              role=Role.MAIN_SUPERVISOR, gender='ذكر', password_pending=True)
+            db.session.add(supervisor)
+            db.session.flush()
+            employee = User(national_id=EMPLOYEE_ID, name='موظف الاختبار', role=Role.EMPLOYEE,
+                            gender='ذكر', supervisor_id=supervisor.id, password_pending=True)
+            db.session.add(employee)
+        employee = User.query.filter_by(national_id=EMPLOYEE_ID).first()
+        absence_status = AbsenceStatus.query.first()
+        today = date.today()
+
+        for i in (next(_serial) for _ in range(count)):
+            # مشرف فرعي ونوع إجازة جديدان لكل صف حتى لا تخفي ذاكرة الجلسة الاستعلامات المتكررة
+            sub = User(national_id=f'38{i:08d}', name=f'مشرف فرعي {i}', role=Role.SUB_SUPERVISOR,
+                       gender='ذكر', supervisor_id=supervisor.id, password_pending=True)
+            lt = LeaveType(name=f'نوع اختبار {i}', max_days=5)
+            db.session.add_all([sub, lt])
+            db.session.flush()
+            emp = User(national_id=f'48{i:08d}', name=f'معلم {i}', role=Role.EMPLOYEE,
+                       gender='ذكر', supervisor_id=supervisor.id, password_pending=True)
+            sub_emp = User(national_id=f'47{i:08d}', name=f'معلم فرعي {i}', role=Role.EMPLOYEE,
+                           gender='ذكر', supervisor_id=sub.id, password_pending=True)
+            db.session.add_all([emp, sub_emp])
+            db.session.flush()
+            db.session.add(LeaveRequest(employee_id=emp.id, leave_type_id=lt.id, start_date=today,
+                                        end_date=today, days_count=1, reason='اختبار',
+                                        reviewed_by=sub.id))
+            db.session.add(Attendance(employee_id=emp.id, date=today, status='حاضر',
+                                      absence_status_id=absence_status.id, recorded_by=sub.id))
+            db.session.add(ActivityLog(user_id=sub.id, action='اختبار', target_type='موظف'))
+
+            # سجلات الموظف نفسه لصفحاته
+            db.session.add(LeaveRequest(employee_id=employee.id, leave_type_id=lt.id, start_date=today,
+                                        end_date=today, days_count=1, reason='اختبار',
+                                        reviewed_by=sub.id))
+        db.session.add(Attendance(employee_id=employee.id, date=today.replace(day=next(_seed_number)),
+                                  status='حاضر', recorded_by=sub.id))
+        db.session.commit()
+
+
+def _page_queries(app, client, url):
+    with count_queries(app) as statements:
+        response = client.get(url)
+    assert response.status_code == 200, url
+    return len(statements)
+
+
+@pytest.fixture(scope='module')
+def clients(app):
+    _seed(app, 3)
+    clients = {}
+    for role, (national_id, password) in (
+        ('admin', ('1000000000', 'admin123')),
+        ('supervisor', (SUPERVISOR_ID, SUPERVISOR_ID)),
+        ('employee', (EMPLOYEE_ID, EMPLOYEE_ID)),
+    ):
+        clients[role] = app.test_client()
+        response = clients[role].post('/login', data={'national_id': national_id, 'password': password})
+        assert response.status_code == 302
+    # تحميل إعدادات النظام في الذاكرة المؤقتة قبل القياس
+    app.test_client().get('/login')
+    return clients
+
+
+@pytest.mark.parametrize('role, url', (
+    [('admin', url) for url in ADMIN_PAGES]
+    + [('supervisor', url) for url in SUPERVISOR_PAGES]
+    + [('employee', url) for url in EMPLOYEE_PAGES]
+))
+def test_list_page_query_count_is_constant(app, clients, role, url):
+    client = clients[role]
+    before = _page_queries(app, client, url)
+
+    _seed(app, 5)
+
+    after = _page_queries(app, client, url)
+    assert after == before, f'{url}: {before} -> {after} استعلام'
@@ -0,0 +1,81 @@
+"""
+اختبار الذاكرة المؤقتة لتقارير PDF وعدادات إصدار البيانات
+"""
+import os
+import time
+import pytest
+from conftest import count_queries
+from models import db, User, Role
+from data_versions import data_versions, mark_data_changed
+from report_cache import evict_reports
+
+URL = '/admin/schedules-table/pdf?gender=ذكر'
+
+
+@pytest.fixture(scope='module')
+def admin(app):
+    client = app.test_client()
+    assert client.post('/login', data={'national_id': '1000000000', 'password': 'admin123'}).status_code == 302
+    return client
+
+
+def _report_queries(app, client):
+    with count_queries(app) as statements:
+        response = client.get(URL)
+    assert response.status_code == 200
+    return response.data, [s for s in statements if 'FROM users' in s and 'users.period' in s]
+
+
+def test_identical_request_is_served_from_disk(app, admin):
+    first, built = _report_queries(app, admin)
+    second, rebuilt = _report_queries(app, admin)
+    assert built and not rebuilt
+    assert first == second
+
+
+def test_data_change_invalidates_cached_report(app, admin):
+    _report_queries(app, admin)
+    with app.app_context():
+        before = data_versions(['users'])['users']
+
+    # مسارات الكتابة تعلم الجداول التي تغيرها فيزيد إصدارها عند commit
+    response = admin.post('/admin/employees/add', data={'national_id': '4300000001', 'name': 'معلم التقرير',
+                                                        'gender': 'ذكر', 'department': 'الحلقات'})
+    assert response.status_code == 302
+    with app.app_context():
+        assert data_versions(['users'])['users'] == before + 1
+
+    _, rebuilt = _report_queries(app, admin)
+    assert rebuilt
+
+    with app.app_context():
+        User.query.filter_by(national_id='4300000001').update({'period': 'الأولى'})
+        mark_data_changed('users')
+        db.session.commit()
+        assert data_versions(['users'])['users'] == before + 2
+
+
+def test_unmarked_commit_keeps_versions(app):
+    with app.app_context():
+        before = data_versions(['users', 'attendance'])
+        db.session.add(User(national_id='4300000002', name='معلم دون تعليم', role=Role.EMPLOYEE, gender='ذكر'))
+        db.session.commit()
+        assert data_versions(['users', 'attendance']) == before
+
+        # التعليم يسقط مع التراجع عن المعاملة
+        mark_data_changed('users')
+        db.session.rollback()
+        db.session.commit()
+        assert data_versions(['users', 'attendance']) == before
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    for index, name in enumerate(['old', 'used', 'new']):
+        path = tmp_path / f'{name}.pdf'
+        path.write_bytes(b'x' * 100)
+        os.utime(path, ns=(index * 10**9, index * 10**9))
+    # استخدام الملف القديم يجعله الأحدث
+    os.utime(tmp_path / 'used.pdf', ns=(time.time_ns(), time.time_ns()))
+
+    assert evict_reports(str(tmp_path), 200) == 1
+    assert sorted(os.listdir(tmp_path)) == ['new.pdf', 'used.pdf']
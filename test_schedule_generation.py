@@ -0,0 +1,79 @@
+"""
+اختبار توليد الجداول ونقلها للشهر القادم بجمل جماعية
+"""
+from datetime import date
+import pytest
+from conftest import count_queries
+from models import db, User, Role, Schedule
+
+
+@pytest.fixture(scope='module')
+def team(app):
+    """مشرف رئيسي وأربعة موظفين في قسمين"""
+    with app.app_context():
+        supervisor = User(national_id='3600000001', name='مشرف الجداول', role=Role.MAIN_SUPERVISOR,
+                          gender='ذكر', password_pending=True)
+        db.session.add(supervisor)
+        db.session.flush()
+        employees = [User(national_id=f'360000001{i}', name=f'معلم الجداول {i}', role=Role.EMPLOYEE, gender='ذكر',
+                          department='القسم أ' if i < 2 else 'القسم ب', supervisor_id=supervisor.id)
+                     for i in range(4)]
+        db.session.add_all(employees)
+        db.session.commit()
+        return [employee.id for employee in employees]
+
+
+@pytest.fixture(scope='module')
+def client(app, team):
+    client = app.test_client()
+    client.post('/login', data={'national_id': '3600000001', 'password': '3600000001'})
+    return client
+
+
+def _periods(app, employee_id):
+    with app.app_context():
+        return db.session.query(Schedule.start_date, Schedule.end_date).filter_by(
+            employee_id=employee_id).distinct().order_by(Schedule.start_date).all()
+
+
+def test_schedules_are_written_in_one_insert(app, team, client):
+    form = {'employee_id': team}
+    for employee_id in team:
+        form.update({f'shift_start_{employee_id}': '16:00', f'shift_end_{employee_id}': '20:00',
+                     f'start_date_{employee_id}': '2031-01-31', f'end_date_{employee_id}': '2031-02-28',
+                     f'days_{employee_id}': ['السبت', 'الأحد']})
+
+    for _ in range(2):
+        with count_queries(app) as statements:
+            client.post('/supervisor/schedules', data=form)
+        assert len([s for s in statements if s.startswith('INSERT INTO schedules')]) == 1
+
+    with app.app_context():
+        rows = Schedule.query.filter_by(employee_id=team[0]).all()
+        assert len(rows) == 7
+        assert {row.day_of_week for row in rows if not row.is_rest_day} == {'السبت', 'الأحد'}
+
+
+def test_roll_forward_copies_latest_period_by_department(app, team, client):
+    client.post('/supervisor/roll-schedules', data={'department': 'القسم أ'})
+    client.post('/supervisor/roll-schedules', data={'department': 'القسم أ'})
+
+    # النسخ من آخر جدول فقط، ونهاية الشهر تبقى نهاية الشهر ولا تنزاح إلى يوم 28
+    assert _periods(app, team[0]) == [(date(2031, 1, 31), date(2031, 2, 28)),
+                                      (date(2031, 2, 28), date(2031, 3, 31)),
+                                      (date(2031, 3, 31), date(2031, 4, 30))]
+    assert _periods(app, team[2]) == [(date(2031, 1, 31), date(2031, 2, 28))]
+    with app.app_context():
+        assert Schedule.query.filter_by(employee_id=team[1]).count() == 21
+
+
+def test_roll_forward_keeps_mid_month_days(app, team, client):
+    employee_id = team[3]
+    form = {'employee_id': [employee_id], f'shift_start_{employee_id}': '07:00', f'shift_end_{employee_id}': '12:00',
+            f'start_date_{employee_id}': '2031-01-15', f'end_date_{employee_id}': '2031-01-30',
+            f'days_{employee_id}': ['السبت']}
+    client.post('/supervisor/schedules', data=form)
+    client.post(f'/supervisor/copy-schedule/{employee_id}')
+
+    assert _periods(app, employee_id) == [(date(2031, 1, 15), date(2031, 1, 30)),
+                                          (date(2031, 2, 15), date(2031, 2, 28))]
@@ -0,0 +1,35 @@
+"""
+اختبار الذاكرة المؤقتة لإعدادات النظام
+"""
+from conftest import count_queries
+from models import db, SystemSettings
+from settings_cache import SettingsCache, get_settings, bump_settings_version
+
+
+def test_settings_are_not_queried_on_every_render(app):
+    client = app.test_client()
+    client.get('/login')
+    with count_queries(app) as statements:
+        client.get('/login')
+    assert not [s for s in statements if 'system_settings' in s]
+
+
+def test_bump_refreshes_this_and_other_workers(app):
+    with app.test_request_context():
+        other_worker = SettingsCache()
+        original = get_settings().system_name
+        assert other_worker.get().system_name == original
+
+        settings = SystemSettings.query.first()
+        settings.system_name = 'اسم جديد'
+        db.session.commit()
+        # قبل رفع الإصدار تبقى النسخة المحفوظة
+        assert get_settings().system_name == original
+
+        bump_settings_version()
+        assert get_settings().system_name == 'اسم جديد'
+        assert other_worker.get().system_name == 'اسم جديد'
+
+        settings.system_name = original
+        db.session.commit()
+        bump_settings_version()
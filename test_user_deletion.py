@@ -0,0 +1,71 @@
+"""
+اختبار حذف المستخدمين وسجلاتهم على دفعات
+"""
+from datetime import date
+from models import db, User, Role, Attendance, LeaveRequest, LeaveType, Schedule, Notification
+from attendance_summary import rebuild_attendance_summary, status_counts
+from user_deletion import delete_users
+
+DAY = date(2031, 5, 5)
+
+
+def _add_supervisor_with_employees(national_id, count):
+    supervisor = User(national_id=national_id, name='مشرف الحذف', role=Role.SUB_SUPERVISOR, gender='ذكر')
+    db.session.add(supervisor)
+    db.session.flush()
+
+    leave_type = LeaveType.query.first()
+    employees = []
+    for i in range(count):
+        employee = User(national_id=f'{national_id[:-2]}{i + 10}', name=f'معلم الحذف {i}', role=Role.EMPLOYEE,
+                        gender='ذكر', supervisor_id=supervisor.id)
+        db.session.add(employee)
+        db.session.flush()
+        db.session.add_all([
+            Attendance(employee_id=employee.id, date=DAY, status='حاضر', recorded_by=supervisor.id),
+            LeaveRequest(employee_id=employee.id, leave_type_id=leave_type.id, start_date=DAY, end_date=DAY,
+                         days_count=1, reason='سفر'),
+            Schedule(employee_id=employee.id, day_of_week='الأحد', shift_time='4:00 م - 8:00 م',
+                     start_date=DAY, created_by=supervisor.id),
+            Notification(user_id=employee.id, title='تنبيه', message='رسالة'),
+        ])
+        employees.append(employee)
+    rebuild_attendance_summary(DAY, DAY)
+    db.session.commit()
+    return supervisor.id, [employee.id for employee in employees]
+
+
+def test_delete_users_removes_records_in_batches(app):
+    with app.app_context():
+        supervisor_id, employee_ids = _add_supervisor_with_employees('3900000001', 5)
+        assert status_counts(DAY, supervisor_id) == {'حاضر': 5}
+
+        batches = []
+        deleted = delete_users(User.id.in_(employee_ids), progress=lambda done, total: batches.append((done, total)),
+                               batch_size=2)
+        db.session.commit()
+
+        assert deleted == 5
+        assert batches == [(2, 5), (4, 5), (5, 5)]
+        assert User.query.filter(User.id.in_(employee_ids)).count() == 0
+        for model, column in ((Attendance, Attendance.employee_id), (LeaveRequest, LeaveRequest.employee_id),
+                              (Schedule, Schedule.employee_id), (Notification, Notification.user_id)):
+            assert model.query.filter(column.in_(employee_ids)).count() == 0
+        assert status_counts(DAY, supervisor_id) == {}
+
+
+def test_delete_supervisor_unassigns_employees(app):
+    with app.app_context():
+        supervisor_id, employee_ids = _add_supervisor_with_employees('3900000101', 2)
+
+    admin = app.test_client()
+    admin.post('/login', data={'national_id': '1000000000', 'password': 'admin123'})
+    response = admin.post(f'/admin/supervisors/delete/{supervisor_id}')
+    assert response.get_json() == {'success': True}
+
+    with app.app_context():
+        assert db.session.get(User, supervisor_id) is None
+        assert [e.supervisor_id for e in User.query.filter(User.id.in_(employee_ids))] == [None, None]
+        # الجداول التي أنشأها المشرف تحذف معه
+        assert Schedule.query.filter(Schedule.employee_id.in_(employee_ids)).count() == 0
+        assert Attendance.query.filter(Attendance.employee_id.in_(employee_ids)).count() == 2
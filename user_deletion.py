@@ -0,0 +1,80 @@
+"""
+حذف المستخدمين وسجلاتهم المرتبطة بجمل جماعية
+
+بدلاً من حذف سجلات كل موظف بجمل منفصلة (حضور، إجازات، جداول، تنبيهات لكل
+موظف)، يتم تقسيم المستخدمين إلى دفعات وتنفيذ جملة DELETE ... WHERE IN واحدة لكل
+جدول تابع في كل دفعة. ملخص الحضور وسجل الإجازات المستهلكة يخصم منهما قبل الحذف.
+"""
+from sqlalchemy import delete, or_, select, update
+from models import db, User, Role, Attendance, LeaveRequest, Schedule, Notification
+from attendance_summary import discount_employee_attendance, reattribute_attendance
+from leave_ledger import discount_employee_leaves
+from attachment_store import release_attachments
+from data_versions import mark_data_changed
+
+# عدد المستخدمين في كل دفعة حذف
+DELETE_BATCH_SIZE = 500
+
+# السجلات التي تحذف مع المستخدم: (النموذج، عمود المستخدم)
+DEPENDENT_RECORDS = (
+    (Attendance, Attendance.employee_id),
+    (LeaveRequest, LeaveRequest.employee_id),
+    (Schedule, Schedule.employee_id),
+    (Schedule, Schedule.created_by),
+    (Notification, Notification.user_id),
+)
+
+
+def test_data_filter():
+    """المستخدمون التجريبيون: موظفون 4000/5000 ومشرفون 2000/3000"""
+    return or_(*[User.national_id.like(f'{prefix}%') for prefix in ('4000', '5000', '2000', '3000')])
+
+
+# نطاقات الحذف الجماعي المتاحة للمدير: الاسم -> شرط المستخدمين
+DELETION_SCOPES = {
+    'all_employees': lambda: User.role == Role.EMPLOYEE,
+    'test_data': test_data_filter,
+}
+
+
+def _delete_batch(user_ids):
+    mark_data_changed('users', 'attendance', 'leave_requests')
+    discount_employee_attendance(user_ids)
+    discount_employee_leaves(user_ids)
+    # مراجع مرفقات طلباتهم في المخزن (الملفات تحذف في حذف المرفقات الدوري)
+    release_attachments(db.session.scalars(
+        select(LeaveRequest.attachment_digest)
+        .where(LeaveRequest.employee_id.in_(user_ids), LeaveRequest.attachment_digest.isnot(None))
+    ).all())
+    for model, column in DEPENDENT_RECORDS:
+        db.session.execute(delete(model).where(column.in_(user_ids)), execution_options={'synchronize_session': False})
+
+    # إلغاء إسناد الموظفين التابعين للمشرفين المحذوفين (مع نقل حضورهم في الملخص)
+    orphaned = db.session.scalars(
+        select(User.id).where(User.supervisor_id.in_(user_ids), User.id.notin_(user_ids))
+    ).all()
+    if orphaned:
+        with reattribute_attendance(orphaned):
+            db.session.execute(
+                update(User).where(User.id.in_(orphaned)).values(supervisor_id=None),
+                execution_options={'synchronize_session': False}
+            )
+    db.session.execute(delete(User).where(User.id.in_(user_ids)), execution_options={'synchronize_session': False})
+
+
+def delete_users(condition, progress=None, batch_size=DELETE_BATCH_SIZE):
+    """حذف المستخدمين المطابقين للشرط مع سجلاتهم دون commit
+
+    progress دالة اختيارية تستدعى بعد كل دفعة بالقيم (عدد المحذوفين، الإجمالي).
+    ترجع عدد المستخدمين المحذوفين.
+    """
+    user_ids = db.session.scalars(select(User.id).where(condition).order_by(User.id)).all()
+
+    for i in range(0, len(user_ids), batch_size):
+        _delete_batch(user_ids[i:i + batch_size])
+        if progress:
+            progress(min(i + batch_size, len(user_ids)), len(user_ids))
+
+    # الكائنات المحملة في الجلسة لم تعد موجودة في قاعدة البيانات
+    db.session.expire_all()
+    return len(user_ids)